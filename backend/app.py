@@ -1,14 +1,48 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from controllers.image_controller import ImageController
+from utils.metrics import METRICS
 
 # Khởi tạo Flask app
 app = Flask(__name__)
-CORS(app)
 
 # Khởi tạo controller
 image_controller = ImageController()
 
+# Cho phép frontend đọc metadata trong header khi nhận ảnh nhị phân và
+# thời gian từng stage trong Server-Timing
+CORS(app, expose_headers=ImageController.METADATA_HEADERS + ['Server-Timing'])
+
+
+@app.before_request
+def start_stage_timing():
+    """Gom thời gian các stage chạy trong request hiện tại"""
+    METRICS.start_collecting()
+
+
+@app.after_request
+def add_server_timing(response):
+    """Thêm header Server-Timing với thời gian (ms) của từng stage"""
+    timings = METRICS.stop_collecting()
+    if timings:
+        response.headers['Server-Timing'] = METRICS.server_timing(timings)
+    return response
+
+
+def _make_response(result):
+    """
+    Chuyển kết quả của controller (dict, tuple (dict, status code) hoặc
+    Response) thành Flask response
+    """
+    if isinstance(result, tuple):
+        body, status_code = result
+        return jsonify(body), status_code
+    
+    if isinstance(result, dict):
+        return jsonify(result)
+    
+    return result
+
 
 @app.route('/', methods=['GET'])
 def get_process_info():
@@ -28,13 +62,71 @@ def process_image():
     """
     Endpoint để xử lý ảnh
     """
-    result = image_controller.process_image()
-    
-    if result.get('status') == 'error':
-        error_code = 400 if 'error' in result else 500
-        return jsonify(result), error_code
-    
-    return jsonify(result)
+    return _make_response(image_controller.process_image())
+
+
+@app.route('/process/batch', methods=['POST'])
+def process_batch():
+    """
+    Endpoint để xử lý nhiều ảnh, kết quả trả về dạng NDJSON theo từng ảnh
+    """
+    return _make_response(image_controller.process_batch())
+
+
+@app.route('/process/frames', methods=['POST'])
+def process_frames():
+    """
+    Endpoint để xử lý ảnh nhiều frame (GIF động, TIFF nhiều trang, MJPEG)
+    """
+    return _make_response(image_controller.process_frames())
+
+
+@app.route('/images', methods=['POST'])
+def upload_image():
+    """
+    Endpoint để upload ảnh một lần, trả về image_id dùng cho /process và /jobs
+    """
+    return _make_response(image_controller.upload_image())
+
+
+@app.route('/images/<image_id>', methods=['GET'])
+def get_image_info(image_id):
+    """
+    Endpoint để lấy thông tin của ảnh đã upload
+    """
+    return _make_response(image_controller.get_image_info(image_id))
+
+
+@app.route('/images/<image_id>', methods=['DELETE'])
+def delete_image(image_id):
+    """
+    Endpoint để xóa ảnh đã upload
+    """
+    return _make_response(image_controller.delete_image(image_id))
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Endpoint để tạo job xử lý ảnh bất đồng bộ
+    """
+    return _make_response(image_controller.submit_job())
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """
+    Endpoint để lấy trạng thái và tiến độ của job
+    """
+    return _make_response(image_controller.get_job_status(job_id))
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    Endpoint để lấy kết quả của job
+    """
+    return _make_response(image_controller.get_job_result(job_id))
 
 
 @app.route('/algorithms/<algorithm>', methods=['GET'])
@@ -51,6 +143,14 @@ def get_algorithm_info(algorithm):
     return jsonify(result)
 
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Endpoint xuất số đo theo stage dạng Prometheus
+    """
+    return image_controller.get_metrics()
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
@@ -89,7 +189,16 @@ if __name__ == '__main__':
     print("Available endpoints:")
     print("  GET  / - Get supported algorithms")
     print("  POST /process - Process image")
+    print("  POST /process/batch - Process multiple images")
+    print("  POST /process/frames - Process multi-frame image (GIF, TIFF, MJPEG)")
+    print("  POST /images - Upload image once, returns image_id")
+    print("  GET  /images/<id> - Get uploaded image info")
+    print("  DELETE /images/<id> - Delete uploaded image")
+    print("  POST /jobs - Submit async processing job")
+    print("  GET  /jobs/<id> - Get job status")
+    print("  GET  /jobs/<id>/result - Get job result")
     print("  GET  /algorithms/<name> - Get algorithm info")
+    print("  GET  /metrics - Prometheus metrics")
     print("  GET  /health - Health check")
     
     app.run(port=5000, debug=True)
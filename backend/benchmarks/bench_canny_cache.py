@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark Canny khi chỉ đổi ngưỡng: chạy đầy đủ so với dùng magnitude sau
+NMS trong STAGE_CACHE (chỉ chạy ngưỡng kép và hysteresis)
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_canny_cache
+"""
+
+import argparse
+import time
+import numpy as np
+
+from benchmarks.bench_filters import SIZES, create_image
+from entities.image import Image
+from entities.filters import CannyEdgeDetector, CannyParameters
+from utils.stage_cache import STAGE_CACHE
+
+THRESHOLDS = ((30, 90), (40, 120), (60, 180))
+
+
+def best_time(image, params, repeat):
+    """(thời gian nhỏ nhất - giây, kết quả)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        edges = CannyEdgeDetector(params).apply(image).data
+        times.append(time.perf_counter() - start)
+    return min(times), edges
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cache NMS của Canny')
+    parser.add_argument('--size', default='4k', choices=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    image = Image(image_data=create_image(args.size, 'uint8'))
+    max_bytes = STAGE_CACHE.lru.max_bytes
+
+    print(f"Input: {args.size} {image.shape}")
+    print(f"{'low/high':<9} | {'full (s)':>8} | {'cached (s)':>10} | {'speedup':>7}")
+    for low, high in THRESHOLDS:
+        params = CannyParameters(low_threshold=low, high_threshold=high)
+
+        STAGE_CACHE.lru.max_bytes = 0
+        full, expected = best_time(image, params, args.repeat)
+
+        STAGE_CACHE.lru.max_bytes = max_bytes
+        STAGE_CACHE.clear()
+        CannyEdgeDetector(CannyParameters()).apply(image)  # Lần chạy với ngưỡng cũ
+        cached, edges = best_time(image, params, args.repeat)
+        assert np.array_equal(edges, expected)
+
+        print(f"{low:>3}/{high:<5} | {full:>8.3f} | {cached:>10.3f} | {full / cached:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
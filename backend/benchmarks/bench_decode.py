@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark decode theo nhu cầu của filter (services.decode_planner): decode
+màu rồi cvtColor (cách cũ) so với decode thẳng sang grayscale, và decode
+JPEG thu nhỏ ở chế độ preview. Đo thời gian decode và RSS đỉnh tăng thêm;
+mỗi phép đo chạy trong một process riêng để RSS đỉnh không lẫn nhau (cần
+/proc của Linux).
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_decode --size 4k
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_filters import SIZES, create_image
+from entities.image import Image
+from entities.filters import CannyEdgeDetector, CannyParameters
+from services.decode_planner import DecodePlan, plan_decode, read_header
+from services.preview import build_preview
+
+MODES = ('color', 'planned')
+
+
+def decode(file_data: bytes, mode: str, preview_size):
+    """Decode ảnh cho Canny như ImageProcessor, trả về ảnh grayscale vào filter"""
+    if mode == 'planned':
+        requirements = CannyEdgeDetector(CannyParameters()).input_requirements()
+        plan = plan_decode(requirements, read_header(file_data), preview_size)
+    else:
+        plan = DecodePlan()
+    image = Image(image_data=cv2.imdecode(np.frombuffer(file_data, np.uint8), plan.flags))
+    if preview_size is not None:
+        image, _ = build_preview(image, preview_size, plan.reduction)
+    return image.to_grayscale()
+
+
+def rss_kb(field: str) -> int:
+    """Giá trị (KB) trong /proc/self/status: VmRSS (hiện tại) hoặc VmHWM (đỉnh)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def measure(path: str, mode: str, preview_size, repeat: int, results) -> None:
+    """Chạy trong process con: (thời gian nhỏ nhất - giây, RSS đỉnh tăng thêm - MB)"""
+    with open(path, 'rb') as f:
+        file_data = f.read()
+    # Đặt lại RSS đỉnh (VmHWM) về RSS hiện tại để bỏ phần đỉnh lúc import
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    baseline = rss_kb('VmRSS')
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(file_data, mode, preview_size)
+        times.append(time.perf_counter() - start)
+    results.put((min(times), (rss_kb('VmHWM') - baseline) / 1024))
+
+
+def run(path: str, mode: str, preview_size, repeat: int):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=measure, args=(path, mode, preview_size, repeat, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Đo {mode} thất bại (exit code {process.exitcode})")
+    return results.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark decode theo nhu cầu của filter')
+    parser.add_argument('--size', default='4k', choices=list(SIZES))
+    parser.add_argument('--format', default='jpg', choices=['jpg', 'png'])
+    parser.add_argument('--preview-size', type=int, default=512)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    color = cv2.applyColorMap(create_image(args.size, 'uint8'), cv2.COLORMAP_JET)
+    _, buffer = cv2.imencode(f'.{args.format}', color)
+    fd, path = tempfile.mkstemp(suffix=f'.{args.format}')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(buffer.tobytes())
+
+    try:
+        print(f"Input: {args.size} {color.shape} {args.format}, {len(buffer) / 2 ** 20:.1f} MB")
+        print(f"{'case':<8} | {'mode':<7} | {'decode (ms)':>11} | {'peak RSS (MB)':>13}")
+        for case, preview_size in (('full', None), ('preview', args.preview_size)):
+            for mode in MODES:
+                seconds, peak = run(path, mode, preview_size, args.repeat)
+                print(f"{case:<8} | {mode:<7} | {seconds * 1000:>11.1f} | {peak:>13.1f}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark CannyEdgeDetector và MedianFilter theo kích thước ảnh (256² tới
+8K), kernel size và dtype, với cv2.Canny / cv2.medianBlur làm mốc so sánh
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_filters run --output benchmarks/baselines/quick.json --quick
+    python -m benchmarks.bench_filters compare benchmarks/baselines/quick.json --threshold 0.2
+
+Chế độ compare chạy lại các case có trong baseline và trả về exit code 1
+nếu throughput (megapixel/giây) của case nào giảm quá threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from entities.image import Image
+from entities.filters import CannyEdgeDetector, CannyParameters, MedianFilter, MedianParameters
+from entities.median import HISTOGRAM_MEDIAN_MIN_KERNEL, SORTING_NETWORK_KERNELS
+
+# Tên kích thước -> (height, width)
+SIZES = {
+    '256': (256, 256),
+    '512': (512, 512),
+    '1024': (1024, 1024),
+    '2048': (2048, 2048),
+    '4k': (2160, 3840),
+    '8k': (4320, 7680),
+}
+
+DTYPES = ('uint8', 'float32')
+CANNY_KERNELS = (3, 5, 7)
+MEDIAN_KERNELS = (3, 5, 7, 11)
+
+# Bộ case nhỏ để chạy nhanh (CI, so sánh trước khi merge)
+QUICK_SIZES = ('256', '1024')
+QUICK_CANNY_KERNELS = (5,)
+QUICK_MEDIAN_KERNELS = (3, 7)
+
+# np.median trên sliding window (median float với kernel lớn) cần bộ nhớ
+# tỉ lệ với k² x số pixel nên chỉ chạy tới kích thước này
+SLIDING_MEDIAN_MAX_PIXELS = 1024 * 1024
+
+# Ngưỡng giảm throughput mặc định của chế độ compare
+DEFAULT_THRESHOLD = 0.15
+
+
+def create_image(size: str, dtype: str) -> np.ndarray:
+    """Ảnh grayscale test: các hình khối cộng noise, giống nhau giữa các lần chạy"""
+    height, width = SIZES[size]
+    rng = np.random.default_rng(0)
+    image = np.full((height, width), 180, dtype=np.float32)
+    for _ in range(16):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        radius = int(rng.integers(max(4, width // 64), max(8, width // 8)))
+        cv2.circle(image, (x, y), radius, float(rng.integers(0, 256)), -1)
+    image += rng.normal(0, 12, image.shape).astype(np.float32)
+    np.clip(image, 0, 255, out=image)
+    if dtype == 'uint8':
+        return image.astype(np.uint8)
+    return np.rint(image)
+
+
+def case_id(filter_name: str, size: str, kernel_size: int, dtype: str) -> str:
+    return f'{filter_name}/{size}/k{kernel_size}/{dtype}'
+
+
+def parse_case_id(identifier: str) -> Tuple[str, str, int, str]:
+    filter_name, size, kernel, dtype = identifier.split('/')
+    return filter_name, size, int(kernel[1:]), dtype
+
+
+def build_cases(sizes, canny_kernels, median_kernels, dtypes=DTYPES) -> List[str]:
+    """Danh sách case id, bỏ các case median sliding window quá lớn"""
+    cases = []
+    for size in sizes:
+        height, width = SIZES[size]
+        for dtype in dtypes:
+            for kernel_size in canny_kernels:
+                cases.append(case_id('canny', size, kernel_size, dtype))
+            for kernel_size in median_kernels:
+                sliding = (kernel_size not in SORTING_NETWORK_KERNELS and
+                           (dtype != 'uint8' or kernel_size < HISTOGRAM_MEDIAN_MIN_KERNEL))
+                if sliding and height * width > SLIDING_MEDIAN_MAX_PIXELS:
+                    continue
+                cases.append(case_id('median', size, kernel_size, dtype))
+    return cases
+
+
+def _filter_and_reference(filter_name: str, kernel_size: int, image: np.ndarray
+                          ) -> Tuple[Callable[[], Any], Optional[str], Optional[Callable[[], Any]]]:
+    """(hàm chạy filter, tên mốc OpenCV, hàm chạy mốc hoặc None)"""
+    wrapped = Image(image_data=image)
+    if filter_name == 'canny':
+        params = CannyParameters(kernel_size=kernel_size)
+        detector = CannyEdgeDetector(params)
+        # Mỗi lần đo phải chạy đủ các stage: với STAGE_CACHE, từ lần thứ hai
+        # Gaussian, Sobel và NMS được lấy từ cache
+        detector.use_stage_cache = False
+        # cv2.Canny chỉ nhận ảnh 8-bit và làm mờ bằng Sobel aperture 3
+        image_u8 = image.astype(np.uint8, copy=False)
+        return (lambda: detector.apply(wrapped), 'cv2.Canny',
+                lambda: cv2.Canny(image_u8, params.low_threshold, params.high_threshold))
+
+    median = MedianFilter(MedianParameters(kernel_size=kernel_size))
+    # cv2.medianBlur nhận float32 chỉ với kernel 3 và 5
+    if image.dtype == np.uint8 or kernel_size in (3, 5):
+        reference = lambda: cv2.medianBlur(image, kernel_size)
+        return lambda: median.apply(wrapped), 'cv2.medianBlur', reference
+    return lambda: median.apply(wrapped), None, None
+
+
+def best_time(func: Callable[[], Any], repeat: int, max_seconds: float) -> float:
+    """Thời gian nhỏ nhất (giây) qua tối đa repeat lần, dừng sớm sau max_seconds"""
+    times = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if time.perf_counter() - started > max_seconds:
+            break
+    return min(times)
+
+
+def run_case(identifier: str, repeat: int = 3, max_seconds: float = 5.0) -> Dict[str, Any]:
+    """Chạy một case, trả về kết quả dạng dict (ghi được ra JSON)"""
+    filter_name, size, kernel_size, dtype = parse_case_id(identifier)
+    image = create_image(size, dtype)
+    func, reference_name, reference = _filter_and_reference(filter_name, kernel_size, image)
+
+    func()  # Warm-up (cấp phát buffer, import lazy)
+    seconds = best_time(func, repeat, max_seconds)
+    megapixels = image.size / 1e6
+
+    result = {
+        'filter': filter_name,
+        'size': size,
+        'shape': list(image.shape),
+        'kernel_size': kernel_size,
+        'dtype': dtype,
+        'seconds': seconds,
+        'mpix_per_s': megapixels / seconds,
+        'reference': reference_name,
+        'reference_seconds': None,
+        'reference_mpix_per_s': None,
+    }
+    if reference is not None:
+        reference()
+        reference_seconds = best_time(reference, repeat, max_seconds)
+        result['reference_seconds'] = reference_seconds
+        result['reference_mpix_per_s'] = megapixels / reference_seconds
+    return result
+
+
+def environment() -> Dict[str, str]:
+    """Thông tin máy và phiên bản thư viện, lưu cùng baseline"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def run_suite(cases: List[str], repeat: int = 3, max_seconds: float = 5.0,
+              log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Chạy các case, trả về document baseline {'environment', 'results'}"""
+    results = {}
+    log(f"{'case':<28} | {'s':>8} | {'MPix/s':>8} | {'ref MPix/s':>10} | {'vs ref':>6}")
+    for identifier in cases:
+        result = run_case(identifier, repeat, max_seconds)
+        results[identifier] = result
+        if result['reference_mpix_per_s']:
+            ref = f"{result['reference_mpix_per_s']:>10.1f}"
+            ratio = f"{result['reference_seconds'] / result['seconds']:>5.2f}x"
+        else:
+            ref, ratio = f"{'-':>10}", f"{'-':>6}"
+        log(f"{identifier:<28} | {result['seconds']:>8.4f} | {result['mpix_per_s']:>8.1f} | {ref} | {ratio}")
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    So sánh throughput của các case có trong cả hai document
+
+    Returns:
+        Tuple (các dòng so sánh, danh sách case bị giảm throughput quá threshold)
+    """
+    rows = []
+    regressions = []
+    for identifier, base in baseline['results'].items():
+        result = current['results'].get(identifier)
+        if result is None:
+            continue
+        change = result['mpix_per_s'] / base['mpix_per_s'] - 1
+        regressed = change < -threshold
+        rows.append({'case': identifier, 'baseline': base['mpix_per_s'],
+                     'current': result['mpix_per_s'], 'change': change,
+                     'regressed': regressed})
+        if regressed:
+            regressions.append(identifier)
+    return rows, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark Canny / Median filter')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Chạy benchmark, lưu baseline JSON')
+    run_parser.add_argument('--output', help='File JSON kết quả')
+    run_parser.add_argument('--quick', action='store_true', help='Chỉ chạy bộ case nhỏ')
+    run_parser.add_argument('--sizes', help=f"Danh sách kích thước, cách nhau dấu phẩy ({', '.join(SIZES)})")
+    run_parser.add_argument('--filters', default='canny,median')
+
+    compare_parser = subparsers.add_parser('compare', help='So sánh với baseline')
+    compare_parser.add_argument('baseline', help='File JSON baseline')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='Tỉ lệ giảm throughput tối đa cho phép (0.15 = 15%%)')
+    compare_parser.add_argument('--output', help='Lưu kết quả lần chạy này ra JSON')
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument('--repeat', type=int, default=3)
+        sub.add_argument('--max-seconds', type=float, default=5.0,
+                         help='Thời gian tối đa đo mỗi case trước khi dừng lặp')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        sizes = args.sizes.split(',') if args.sizes else (QUICK_SIZES if args.quick else tuple(SIZES))
+        filters = args.filters.split(',')
+        cases = build_cases(
+            sizes,
+            (QUICK_CANNY_KERNELS if args.quick else CANNY_KERNELS) if 'canny' in filters else (),
+            (QUICK_MEDIAN_KERNELS if args.quick else MEDIAN_KERNELS) if 'median' in filters else (),
+        )
+        document = run_suite(cases, args.repeat, args.max_seconds)
+    else:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        document = run_suite(list(baseline['results']), args.repeat, args.max_seconds)
+        rows, regressions = compare(baseline, document, args.threshold)
+
+        print(f"\n{'case':<28} | {'baseline':>9} | {'current':>9} | {'change':>7}")
+        for row in rows:
+            flag = '  REGRESSION' if row['regressed'] else ''
+            print(f"{row['case']:<28} | {row['baseline']:>9.1f} | {row['current']:>9.1f} | "
+                  f"{row['change']:>+7.1%}{flag}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+            f.write('\n')
+        print(f"Saved {len(document['results'])} results to {args.output}")
+
+    if args.command == 'compare' and regressions:
+        print(f"\n{len(regressions)} case giảm throughput quá {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
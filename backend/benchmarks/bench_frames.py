@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark xử lý ảnh nhiều frame (ImageProcessor.process_frames): số frame
+mỗi giây theo container và thuật toán, chạy tuần tự (prefetch=1: decode rồi
+filter từng frame) so với pipeline prefetch mặc định (decode chạy trước,
+filter trên MULTIFRAME_WORKERS thread). Cột decode là FPS chỉ decode.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_frames --size 720p --frames 60
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from services.image_processor import ImageProcessor
+from services.multiframe import iter_frames
+from services.result_cache import ResultCache
+from utils.constants import MULTIFRAME_PREFETCH, MULTIFRAME_WORKERS
+
+SIZES = {
+    '480p': (480, 640),
+    '720p': (720, 1280),
+    '1080p': (1080, 1920),
+}
+
+ALGORITHMS = {
+    'canny': {'sigma': 1.0, 'low_threshold': 50, 'high_threshold': 150, 'kernel_size': 5},
+    'median': {'kernel_size': 5},
+}
+
+
+def create_frames(size: str, count: int):
+    """Các frame màu: hình tròn di chuyển trên nền nhiễu, giống nhau giữa các lần chạy"""
+    height, width = SIZES[size]
+    rng = np.random.default_rng(0)
+    background = rng.integers(150, 220, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for index in range(count):
+        frame = background.copy()
+        x = int(width * (0.1 + 0.8 * index / max(count - 1, 1)))
+        cv2.circle(frame, (x, height // 2), height // 5, (30, 60, 90), -1)
+        cv2.rectangle(frame, (width // 8, height // 8), (width // 3, height // 3), (90, 20, 20), -1)
+        frames.append(frame)
+    return frames
+
+
+def encode(frames, container: str) -> bytes:
+    if container == 'tiff':
+        return cv2.imencodemulti('.tiff', frames)[1].tobytes()
+    if container == 'gif':
+        animation = cv2.Animation()
+        animation.frames = frames
+        animation.durations = [40] * len(frames)
+        return cv2.imencodeanimation('.gif', animation)[1].tobytes()
+    return b''.join(cv2.imencode('.jpg', frame)[1].tobytes() for frame in frames)
+
+
+def fps(count: int, run) -> float:
+    start = time.perf_counter()
+    run()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FPS của ảnh nhiều frame')
+    parser.add_argument('--size', default='720p', choices=list(SIZES))
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--containers', nargs='+', default=['mjpeg', 'tiff', 'gif'])
+    args = parser.parse_args()
+
+    processor = ImageProcessor(ResultCache(0))
+    frames = create_frames(args.size, args.frames)
+    print(f"Input: {args.frames} frame {args.size}, prefetch={MULTIFRAME_PREFETCH}, "
+          f"workers={MULTIFRAME_WORKERS}")
+    print(f"{'container':<9} | {'MB':>5} | {'decode':>7} | {'algorithm':<9} | "
+          f"{'sequential':>10} | {'pipeline':>8} | {'speedup':>7}")
+    for container in args.containers:
+        data = encode(frames, container)
+        decode = fps(args.frames, lambda: list(iter_frames(data, container, grayscale=True)))
+        for algorithm, parameters in ALGORITHMS.items():
+            results = {}
+            for prefetch in (1, MULTIFRAME_PREFETCH):
+                def run():
+                    _, frames_out = processor.process_frames(data, algorithm, parameters,
+                                                             prefetch=prefetch)
+                    assert sum(1 for _ in frames_out) == args.frames
+                run()  # Khởi động worker pool
+                results[prefetch] = fps(args.frames, run)
+            sequential, pipeline = results[1], results[MULTIFRAME_PREFETCH]
+            print(f"{container:<9} | {len(data) / 2 ** 20:>5.1f} | {decode:>7.1f} | {algorithm:<9} | "
+                  f"{sequential:>10.1f} | {pipeline:>8.1f} | {pipeline / sequential:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark lọc trung vị: np.median trên sliding window so với sorting network
+(3x3, 5x5) và histogram median
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_median
+"""
+
+import argparse
+import time
+import numpy as np
+
+from entities.filters import MedianFilter, MedianParameters
+from entities.median import histogram_median, sorting_network_median, SORTING_NETWORK_KERNELS
+
+
+def best_time(func, repeat):
+    """Thời gian nhỏ nhất (giây) qua repeat lần chạy"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark median filter')
+    parser.add_argument('--size', type=int, default=1024, help='Cạnh ảnh vuông (pixel)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    image = np.random.default_rng(0).integers(0, 256, (args.size, args.size), dtype=np.uint8)
+    median = MedianFilter(MedianParameters())
+
+    print(f"Image: {args.size}x{args.size} uint8")
+    print(f"{'kernel':>6} | {'np.median (s)':>13} | {'network (s)':>11} | "
+          f"{'histogram (s)':>13} | {'dispatch':>8} | {'speedup':>7}")
+    for kernel_size in range(3, 17, 2):
+        reference = median._sliding_window_median(image, kernel_size)
+        assert np.array_equal(histogram_median(image, kernel_size), reference)
+        assert np.array_equal(median._median_filter(image, kernel_size), reference)
+
+        t_ref = best_time(lambda: median._sliding_window_median(image, kernel_size), args.repeat)
+        t_hist = best_time(lambda: histogram_median(image, kernel_size), args.repeat)
+        t_dispatch = best_time(lambda: median._median_filter(image, kernel_size), args.repeat)
+        if kernel_size in SORTING_NETWORK_KERNELS:
+            t_net = best_time(lambda: sorting_network_median(image, kernel_size), args.repeat)
+            net_col = f"{t_net:>11.3f}"
+        else:
+            net_col = f"{'-':>11}"
+        print(f"{kernel_size:>6} | {t_ref:>13.3f} | {net_col} | {t_hist:>13.3f} | "
+              f"{t_dispatch:>8.3f} | {t_ref / t_dispatch:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
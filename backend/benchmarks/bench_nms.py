@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark non-maximum suppression: implementation np.roll ban đầu so với
+entities.nms.non_max_suppression (bộ nhớ đỉnh và thời gian)
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_nms
+"""
+
+import argparse
+import time
+import tracemalloc
+import numpy as np
+
+from entities.filters import CannyEdgeDetector, CannyParameters
+from entities.nms import non_max_suppression
+
+
+def gradients(height, width):
+    """Magnitude và angle giống đầu ra Sobel của Canny trên ảnh ngẫu nhiên"""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (height, width)).astype(np.float32)
+    return CannyEdgeDetector(CannyParameters())._sobel_gradients(image)
+
+
+def measure(func, repeat):
+    """(bộ nhớ đỉnh trong lúc chạy - byte, thời gian nhỏ nhất - giây)"""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return peak, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark NMS')
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    magnitude, angle = gradients(args.height, args.width)
+    detector = CannyEdgeDetector(CannyParameters())
+    out = np.empty_like(magnitude)
+
+    reference = detector._roll_non_max_suppression(magnitude, angle)
+    assert np.array_equal(non_max_suppression(magnitude, angle, out), reference)
+    del reference
+
+    frame_mb = magnitude.nbytes / 2 ** 20
+    print(f"Input: {args.width}x{args.height} float32 ({frame_mb:.1f} MB mỗi mảng)")
+    print(f"{'implementation':<22} | {'peak (MB)':>9} | {'time (s)':>8}")
+    rows = [
+        ('np.roll', lambda: detector._roll_non_max_suppression(magnitude, angle)),
+        ('views, new output', lambda: non_max_suppression(magnitude, angle)),
+        ('views, caller buffer', lambda: non_max_suppression(magnitude, angle, out)),
+    ]
+    for name, func in rows:
+        peak, seconds = measure(func, args.repeat)
+        print(f"{name:<22} | {peak / 2 ** 20:>9.1f} | {seconds:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
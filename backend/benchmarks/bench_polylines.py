@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark tách polyline từ bản đồ cạnh Canny (entities.polylines): thời gian
+tách chuỗi và rút gọn Douglas–Peucker, kích thước payload JSON so với ảnh
+raster (thô, PNG, JPEG như response mặc định). Ngưỡng Canny thấp cho bản
+đồ cạnh dày (nhiều cạnh nhiễu) để xem trường hợp xấu.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_polylines --size 4k
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+
+from benchmarks.bench_filters import SIZES, create_image
+from entities.image import Image
+from entities.filters import CannyEdgeDetector, CannyParameters
+from entities.polylines import simplify_polylines, trace_edges
+
+THRESHOLDS = ((50, 150), (30, 90), (20, 60))
+TOLERANCES = (0.0, 1.0, 2.0)
+
+
+def best_time(function, repeat):
+    """(thời gian nhỏ nhất - giây, kết quả)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tách polyline từ bản đồ cạnh')
+    parser.add_argument('--size', default='4k', choices=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    image = Image(image_data=create_image(args.size, 'uint8'))
+    print(f"Input: {args.size} {image.shape}")
+    print(f"{'low/high':<9} | {'edge px':>9} | {'trace (ms)':>10} | {'tol':>3} | {'simplify (ms)':>13} | "
+          f"{'points':>8} | {'JSON (KB)':>9} | {'PNG (KB)':>8} | {'JPEG (KB)':>9}")
+    for low, high in THRESHOLDS:
+        edges = CannyEdgeDetector(CannyParameters(low_threshold=low, high_threshold=high)).apply(image).data
+        edge_pixels = int(cv2.countNonZero(edges))
+        png = len(cv2.imencode('.png', edges)[1])
+        jpeg = len(cv2.imencode('.jpg', edges, [cv2.IMWRITE_JPEG_QUALITY, 95])[1])
+        trace, chains = best_time(lambda: trace_edges(edges), args.repeat)
+
+        for tolerance in TOLERANCES:
+            simplify, polylines = best_time(lambda: simplify_polylines(chains, tolerance), args.repeat)
+            points = sum(len(polyline) for polyline in polylines)
+            payload = len(json.dumps([p.ravel().tolist() for p in polylines], separators=(',', ':')))
+            print(f"{low:>3}/{high:<5} | {edge_pixels:>9} | {trace * 1000:>10.1f} | {tolerance:>3.0f} | "
+                  f"{simplify * 1000:>13.1f} | {points:>8} | {payload / 1024:>9.1f} | "
+                  f"{png / 1024:>8.1f} | {jpeg / 1024:>9.1f}")
+    print(f"Raster thô: {edges.nbytes / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark xử lý ảnh lớn từ TIFF (ImageProcessor.process_large_image): đọc
+TIFF chia tile qua memory-map (services.tiled_tiff, chỉ đọc các tile của
+dải đang xử lý) so với decode cả ảnh bằng cv2.imread (TIFF nén LZW). Kết
+quả luôn ghi ra TIFF chia tile. Đo thời gian và bộ nhớ ẩn danh đỉnh
+(RssAnon, lấy mẫu mỗi 5 ms; trang của file memory-mapped không tính vì
+kernel thu hồi được); mỗi phép đo chạy trong một process riêng (cần /proc
+của Linux).
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_tiled_tiff --size 8000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_decode import rss_kb
+from services.tiled_tiff import TiledTiffWriter
+
+SOURCES = ('mmap', 'imread')
+
+
+def create_tiff(path: str, size: int, tiled: bool) -> None:
+    """Ảnh màu size x size: hình chữ nhật trên nền nhiễu, ghi theo dải để không giữ cả ảnh"""
+    rng = np.random.default_rng(0)
+    band_height = 1024
+    if tiled:
+        writer = TiledTiffWriter(path, (size, size, 3), np.uint8)
+    else:
+        image = np.empty((size, size, 3), dtype=np.uint8)
+    for start in range(0, size, band_height):
+        stop = min(start + band_height, size)
+        band = rng.integers(150, 200, (stop - start, size, 3), dtype=np.uint8)
+        band[:, size // 4:size // 2] = (30, 60, 90)
+        if tiled:
+            writer[start:stop] = band
+        else:
+            image[start:stop] = band
+    if tiled:
+        writer.flush()
+    else:
+        cv2.imwrite(path, image)
+
+
+def measure(path: str, algorithm: str, results) -> None:
+    """Chạy trong process con: (thời gian - giây, RssAnon đỉnh tăng thêm - MB)"""
+    from services.image_processor import ImageProcessor
+    from services.result_cache import ResultCache
+
+    processor = ImageProcessor(ResultCache(0))
+    baseline = rss_kb('RssAnon')
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.005):
+            peak[0] = max(peak[0], rss_kb('RssAnon'))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    fd, output = tempfile.mkstemp(suffix='.tif')
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        processor.process_large_image(path, algorithm, output_path=output).flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        done.set()
+        sampler.join()
+        os.remove(output)
+    results.put((elapsed, (max(peak[0], rss_kb('RssAnon')) - baseline) / 1024))
+
+
+def run(path: str, algorithm: str):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=measure, args=(path, algorithm, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Đo {algorithm} thất bại (exit code {process.exitcode})")
+    return results.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ảnh lớn từ TIFF')
+    parser.add_argument('--size', type=int, default=8000, help='Cạnh ảnh vuông (pixel)')
+    parser.add_argument('--algorithms', nargs='+', default=['median', 'canny'])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    paths = {'mmap': os.path.join(directory, 'tiled.tif'),
+             'imread': os.path.join(directory, 'lzw.tif')}
+    try:
+        for source, path in paths.items():
+            create_tiff(path, args.size, tiled=source == 'mmap')
+        print(f"Input: {args.size}x{args.size} BGR "
+              f"({args.size * args.size * 3 / 2 ** 20:.0f} MB chưa nén)")
+        print(f"{'algorithm':<9} | {'source':<6} | {'file MB':>7} | {'time (s)':>8} | {'peak MB':>7}")
+        for algorithm in args.algorithms:
+            for source in SOURCES:
+                elapsed, peak = run(paths[source], algorithm)
+                size = os.path.getsize(paths[source]) / 2 ** 20
+                print(f"{algorithm:<9} | {source:<6} | {size:>7.0f} | {elapsed:>8.2f} | {peak:>7.0f}")
+    finally:
+        for path in paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
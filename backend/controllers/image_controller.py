@@ -1,6 +1,27 @@
-from flask import request, jsonify
-from typing import Dict, Any, Optional
+import json
+import uuid
+import numpy as np
+from flask import request, jsonify, Response, stream_with_context
+from werkzeug.exceptions import ClientDisconnected
+from typing import Dict, Any, Mapping, Optional, Tuple, Union
 from services.image_processor import ImageProcessor
+from services.job_manager import JobManager, QueueFullError
+from services.image_store import ImageNotFoundError, StoredImage
+from services.multiframe import CONTAINER_MIMETYPES
+from entities.image import COPY_COUNTER
+from utils.metrics import METRICS
+from utils.stage_cache import STAGE_CACHE
+from utils.validators import ParameterValidator
+from utils.constants import (
+    BATCH_MAX_FILES, RESPONSE_CHUNK_SIZE, DEFAULT_FILTER_BACKEND,
+    PREVIEW_MAX_DIMENSION, PREVIEW_DIMENSION_LIMITS, MAX_FILE_SIZE,
+    OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT, DEFAULT_POLYLINE_TOLERANCE, POLYLINE_TOLERANCE_LIMITS
+)
+
+
+class UploadTooLargeError(ValueError):
+    """File upload lớn hơn MAX_FILE_SIZE (HTTP 413)"""
+    pass
 
 
 class ImageController:
@@ -8,8 +29,23 @@ class ImageController:
     Controller class để xử lý các HTTP requests liên quan đến ảnh
     """
     
+    # Các kiểu response của /process theo header Accept; JSON + base64 là mặc định
+    RESPONSE_MIMETYPES = ['application/json', 'image/png', 'image/jpeg', 'multipart/mixed']
+    
+    # Header chứa metadata khi trả ảnh nhị phân
+    METADATA_HEADERS = [
+        'X-Algorithm-Used', 'X-Parameters',
+        'X-Original-Width', 'X-Original-Height', 'X-Original-Channels', 'X-Original-Dtype',
+        'X-Processed-Width', 'X-Processed-Height', 'X-Processed-Channels', 'X-Processed-Dtype',
+        'X-Preview',
+    ]
+    
+    # Upload thô: body là nguyên file ảnh, tham số nằm trong query string
+    RAW_UPLOAD_MIMETYPE = 'application/octet-stream'
+    
     def __init__(self):
         self.image_processor = ImageProcessor()
+        self.job_manager = JobManager(self.image_processor)
     
     def get_process_info(self) -> Dict[str, Any]:
         """
@@ -32,56 +68,367 @@ class ImageController:
                 'status': 'error'
             }
     
-    def process_image(self) -> Dict[str, Any]:
+    def process_image(self):
         """
         Xử lý ảnh theo thuật toán được chỉ định
         
+        Kiểu response được chọn theo header Accept: application/json (mặc
+        định, ảnh base64), image/png hoặc image/jpeg (ảnh nhị phân, metadata
+        trong header X-*), multipart/mixed (phần JSON metadata + phần ảnh JPEG)
+        
+        Với preview=true hoặc preview_size=<pixel>, ảnh được xử lý trên tầng
+        pyramid có cạnh dài gần kích thước hiển thị để phản hồi nhanh khi
+        chỉnh tham số; client gửi lại request không có preview để lấy kết
+        quả độ phân giải đầy đủ
+        
+        Thay cho file ảnh, có thể gửi image_id của ảnh đã upload qua
+        POST /images để bỏ qua upload và decode, hoặc gửi body
+        application/octet-stream là nguyên file ảnh với tham số trong query
+        string (không qua multipart, từ chối sớm khi quá MAX_FILE_SIZE)
+        
+        Với response JSON, output_format chọn định dạng của processed_image:
+        jpeg (mặc định), png, packbits, rle, sparse (ảnh nhị phân) hoặc auto
+        (payload nhỏ nhất); trường encoding mô tả cách giải mã.
+        output_format=polylines (Canny) trả các chuỗi cạnh dạng polyline
+        trong trường polylines, rút gọn theo polyline_tolerance (pixel)
+        
+        Returns:
+            JSON response với ảnh đã xử lý, hoặc streamed Response nhị phân
+        """
+        try:
+            preview_size = self._extract_preview_size()
+            output_format = self._extract_output_format()
+            polyline_tolerance = self._extract_polyline_tolerance()
+            file_data, algorithm, parameters = self._parse_image_request()
+            
+            response_type = request.accept_mimetypes.best_match(
+                self.RESPONSE_MIMETYPES, default='application/json'
+            )
+            if response_type != 'application/json':
+                return self._binary_response(file_data, algorithm, parameters, response_type,
+                                             preview_size)
+            
+            # Xử lý ảnh
+            result = self.image_processor.process_image_from_file(
+                file_data, 
+                algorithm, 
+                parameters,
+                preview_size=preview_size,
+                output_format=output_format,
+                polyline_tolerance=polyline_tolerance
+            )
+            
+            result['status'] = 'success'
+            return result
+            
+        except UploadTooLargeError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 413
+        except ImageNotFoundError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 404
+        except ValueError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 400
+        except Exception as e:
+            return {
+                'error': f'Lỗi xử lý ảnh: {str(e)}',
+                'status': 'error'
+            }, 500
+    
+    def _binary_response(self, file_data: Union[bytes, StoredImage], algorithm: str,
+                         parameters: Dict[str, Any], response_type: str,
+                         preview_size: Optional[int] = None) -> Response:
+        """
+        Tạo streamed response chứa ảnh nhị phân
+        
+        Args:
+            file_data: Dữ liệu file ảnh hoặc ảnh trong kho
+            algorithm: Thuật toán xử lý
+            parameters: Tham số cho thuật toán
+            response_type: 'image/png', 'image/jpeg' hoặc 'multipart/mixed'
+            preview_size: Cạnh dài mục tiêu của chế độ preview (tùy chọn)
+        """
+        image_format = 'png' if response_type == 'image/png' else 'jpeg'
+        buffer, metadata = self.image_processor.process_image_to_bytes(
+            file_data, algorithm, parameters, image_format, preview_size
+        )
+        headers = self._metadata_headers(metadata)
+        
+        if response_type == 'multipart/mixed':
+            boundary = uuid.uuid4().hex
+            parts = [
+                f'--{boundary}\r\nContent-Type: application/json\r\n\r\n'.encode(),
+                json.dumps(metadata).encode(),
+                (f'\r\n--{boundary}\r\nContent-Type: image/{image_format}\r\n'
+                 f'Content-Length: {buffer.nbytes}\r\n\r\n').encode(),
+                buffer,
+                f'\r\n--{boundary}--\r\n'.encode(),
+            ]
+            mimetype = f'multipart/mixed; boundary={boundary}'
+        else:
+            parts = [buffer]
+            mimetype = response_type
+        
+        headers['Content-Length'] = str(sum(memoryview(part).nbytes for part in parts))
+        return Response(self._stream_parts(parts), mimetype=mimetype, headers=headers)
+    
+    @staticmethod
+    def _stream_parts(parts):
+        """Stream các phần theo chunk bằng memoryview, không chép dữ liệu"""
+        for part in parts:
+            view = memoryview(part)
+            for start in range(0, view.nbytes, RESPONSE_CHUNK_SIZE):
+                yield view[start:start + RESPONSE_CHUNK_SIZE]
+    
+    def _metadata_headers(self, metadata: Dict[str, Any]) -> Dict[str, str]:
+        """Chuyển metadata kết quả thành các header X-*"""
+        original = metadata['original_metadata']
+        processed = metadata['processed_metadata']
+        parameters = {
+            key: value for key, value in metadata.items()
+            if key not in ('algorithm_used', 'original_metadata', 'processed_metadata', 'preview')
+        }
+        headers = {
+            'X-Algorithm-Used': metadata['algorithm_used'],
+            'X-Parameters': json.dumps(parameters),
+            'X-Original-Width': str(original['width']),
+            'X-Original-Height': str(original['height']),
+            'X-Original-Channels': str(original['channels']),
+            'X-Original-Dtype': original['dtype'],
+            'X-Processed-Width': str(processed['width']),
+            'X-Processed-Height': str(processed['height']),
+            'X-Processed-Channels': str(processed['channels']),
+            'X-Processed-Dtype': processed['dtype'],
+        }
+        if 'preview' in metadata:
+            headers['X-Preview'] = json.dumps(metadata['preview'])
+        return headers
+    
+    def submit_job(self):
+        """
+        Tạo job xử lý ảnh bất đồng bộ (cùng form data với /process)
+        
         Returns:
-            JSON response với ảnh đã xử lý
+            JSON response với job_id (HTTP 202), 429 nếu hàng đợi đầy
         """
         try:
-            # Validate request
-            if 'image' not in request.files:
+            file_data, algorithm, parameters = self._parse_image_request()
+            job = self.job_manager.submit(file_data, algorithm, parameters)
+            
+            response = job.to_status()
+            response['status_url'] = f'/jobs/{job.job_id}'
+            response['result_url'] = f'/jobs/{job.job_id}/result'
+            return response, 202
+            
+        except QueueFullError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 429
+        except UploadTooLargeError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 413
+        except ImageNotFoundError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 404
+        except ValueError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 400
+        except Exception as e:
+            return {
+                'error': f'Lỗi tạo job: {str(e)}',
+                'status': 'error'
+            }, 500
+    
+    def get_job_status(self, job_id: str):
+        """
+        Trả về trạng thái và tiến độ của job
+        
+        Args:
+            job_id: Id của job
+        """
+        job = self.job_manager.get(job_id)
+        if job is None:
+            return {
+                'error': f'Job "{job_id}" không tồn tại hoặc đã hết hạn',
+                'status': 'error'
+            }, 404
+        
+        return {'job': job.to_status(), 'status': 'success'}
+    
+    def get_job_result(self, job_id: str):
+        """
+        Trả về kết quả của job đã hoàn thành
+        
+        Args:
+            job_id: Id của job
+            
+        Returns:
+            Kết quả giống /process; HTTP 202 kèm trạng thái nếu job chưa xong
+        """
+        job = self.job_manager.get(job_id)
+        if job is None:
+            return {
+                'error': f'Job "{job_id}" không tồn tại hoặc đã hết hạn',
+                'status': 'error'
+            }, 404
+        
+        if job.status == 'failed':
+            return {
+                'error': job.error,
+                'status': 'error'
+            }, 400
+        
+        if job.status != 'done':
+            return {'job': job.to_status(), 'status': 'pending'}, 202
+        
+        result = dict(job.result)
+        result['status'] = 'success'
+        return result
+    
+    def process_batch(self):
+        """
+        Xử lý nhiều ảnh trong một request
+        
+        Form data:
+            images: Nhiều file ảnh
+            algorithm, sigma, kernel_size, ...: Tham số dùng chung
+            items: (tùy chọn) JSON array, phần tử thứ i là
+                {"algorithm": ..., "parameters": {...}} ghi đè cho file thứ i
+        
+        Returns:
+            Streamed NDJSON response, mỗi dòng là kết quả của một ảnh theo
+            thứ tự hoàn thành (có 'index' và 'filename')
+        """
+        try:
+            files = request.files.getlist('images')
+            if not files:
                 return {
                     'error': 'Không tìm thấy file ảnh',
                     'status': 'error'
                 }, 400
             
-            file = request.files['image']
-            if file.filename == '':
+            if len(files) > BATCH_MAX_FILES:
                 return {
-                    'error': 'File ảnh trống',
+                    'error': f'Tối đa {BATCH_MAX_FILES} ảnh mỗi batch',
                     'status': 'error'
                 }, 400
             
-            # Lấy tham số từ form data
-            algorithm = request.form.get('algorithm', 'canny')
-            parameters = self._extract_parameters(algorithm)
-            
-            # Validate algorithm
-            if algorithm not in self.image_processor.get_supported_algorithms():
+            overrides = json.loads(request.form.get('items', '[]'))
+            if not isinstance(overrides, list):
                 return {
-                    'error': f'Thuật toán "{algorithm}" không được hỗ trợ',
+                    'error': 'Trường items phải là JSON array',
                     'status': 'error'
                 }, 400
             
-            # Validate parameters
-            if not self.image_processor.validate_parameters(algorithm, parameters):
-                return {
-                    'error': 'Tham số không hợp lệ',
-                    'status': 'error'
-                }, 400
+            shared_algorithm = request.form.get('algorithm', 'canny')
             
-            # Xử lý ảnh
-            result = self.image_processor.process_image_from_file(
-                file.read(), 
-                algorithm, 
-                parameters
+            # Đọc file và validate từng ảnh; ảnh lỗi được trả về ngay
+            jobs = []
+            errors = []
+            for index, file in enumerate(files):
+                override = overrides[index] if index < len(overrides) else None
+                try:
+                    if override:
+                        algorithm = override.get('algorithm', shared_algorithm)
+                        parameters = self._extract_parameters(
+                            algorithm, override.get('parameters', {})
+                        )
+                    else:
+                        algorithm = shared_algorithm
+                        parameters = self._extract_parameters(algorithm)
+                    
+                    error = self._validate_algorithm_parameters(algorithm, parameters)
+                    if error:
+                        raise ValueError(error)
+                    
+                    file_data = file.read()
+                    self._check_file_size(len(file_data))
+                    jobs.append((index, (file_data, algorithm, parameters)))
+                except (ValueError, TypeError, AttributeError) as e:
+                    errors.append((index, {'error': str(e), 'status': 'error'}))
+            
+            filenames = [file.filename for file in files]
+            positions = [index for index, _ in jobs]
+            
+            def generate():
+                for index, result in errors:
+                    yield self._batch_line(index, filenames[index], result)
+                
+                batch = self.image_processor.process_batch([item for _, item in jobs])
+                for position, result in batch:
+                    index = positions[position]
+                    yield self._batch_line(index, filenames[index], result)
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+            
+        except ValueError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 400
+        except Exception as e:
+            return {
+                'error': f'Lỗi xử lý batch: {str(e)}',
+                'status': 'error'
+            }, 500
+    
+    def process_frames(self):
+        """
+        Xử lý ảnh nhiều frame: GIF động, TIFF nhiều trang hoặc MJPEG (các
+        JPEG nối tiếp), cùng form data / query string với /process
+        
+        Mặc định trả file kết quả cùng loại container với ảnh vào (metadata
+        trong header X-*). Với Accept: multipart/mixed, mỗi frame kết quả
+        được stream thành một phần image/png ngay khi xử lý xong, sau phần
+        JSON metadata đầu tiên.
+        
+        Returns:
+            Streamed Response nhị phân
+        """
+        try:
+            file_data, algorithm, parameters = self._parse_image_request()
+            if isinstance(file_data, StoredImage):
+                raise ValueError('Ảnh nhiều frame phải được upload trực tiếp, không dùng image_id')
+            
+            response_type = request.accept_mimetypes.best_match(
+                ['application/octet-stream', 'multipart/mixed'], default='application/octet-stream'
             )
+            if response_type == 'multipart/mixed':
+                return self._frame_stream_response(file_data, algorithm, parameters)
             
-            result['status'] = 'success'
-            return result
+            buffer, metadata = self.image_processor.process_frames_to_container(
+                file_data, algorithm, parameters
+            )
+            headers = {
+                'X-Algorithm-Used': algorithm,
+                'X-Parameters': json.dumps(parameters),
+                'X-Container': metadata['container'],
+                'X-Frame-Count': str(metadata['frames']),
+                'X-Frames-Per-Second': str(metadata['fps']),
+                'Content-Length': str(buffer.nbytes),
+            }
+            return Response(self._stream_parts([buffer]),
+                            mimetype=CONTAINER_MIMETYPES[metadata['container']], headers=headers)
             
+        except UploadTooLargeError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 413
         except ValueError as e:
             return {
                 'error': str(e),
@@ -89,32 +436,332 @@ class ImageController:
             }, 400
         except Exception as e:
             return {
-                'error': f'Lỗi xử lý ảnh: {str(e)}',
+                'error': f'Lỗi xử lý ảnh nhiều frame: {str(e)}',
+                'status': 'error'
+            }, 500
+    
+    def _frame_stream_response(self, file_data: Union[bytes, memoryview], algorithm: str,
+                               parameters: Dict[str, Any]) -> Response:
+        """
+        Response multipart/mixed: phần JSON metadata rồi mỗi frame một phần
+        image/png (header X-Frame-Index, X-Frame-Duration với GIF). Lỗi giữa
+        chừng được trả thành một phần JSON cuối cùng.
+        """
+        container, frames = self.image_processor.process_frames(
+            file_data, algorithm, parameters, encode_format='png'
+        )
+        boundary = uuid.uuid4().hex
+        metadata = {'algorithm_used': algorithm, 'container': container, **parameters}
+        
+        def generate():
+            yield f'--{boundary}\r\nContent-Type: application/json\r\n\r\n'.encode()
+            yield json.dumps(metadata).encode()
+            try:
+                for frame in frames:
+                    duration = '' if frame.duration is None else f'X-Frame-Duration: {frame.duration}\r\n'
+                    yield (f'\r\n--{boundary}\r\nContent-Type: image/png\r\n'
+                           f'X-Frame-Index: {frame.index}\r\n{duration}'
+                           f'Content-Length: {frame.encoded.nbytes}\r\n\r\n').encode()
+                    yield from self._stream_parts([frame.encoded])
+            except Exception as e:
+                yield f'\r\n--{boundary}\r\nContent-Type: application/json\r\n\r\n'.encode()
+                yield json.dumps({'error': str(e), 'status': 'error'}).encode()
+            yield f'\r\n--{boundary}--\r\n'.encode()
+        
+        return Response(stream_with_context(generate()),
+                        mimetype=f'multipart/mixed; boundary={boundary}')
+    
+    @staticmethod
+    def _batch_line(index: int, filename: str, result: Dict[str, Any]) -> str:
+        """Một dòng NDJSON cho kết quả của ảnh thứ index"""
+        return json.dumps({'index': index, 'filename': filename, **result}) + '\n'
+    
+    def _parse_image_request(self) -> Tuple[Union[bytes, memoryview, StoredImage], str, Dict[str, Any]]:
+        """
+        Đọc file ảnh (hoặc image_id của ảnh trong kho), thuật toán và tham
+        số từ form data, hoặc từ body và query string với upload thô
+        
+        Returns:
+            Tuple (file_data hoặc StoredImage, algorithm, parameters)
+            
+        Raises:
+            ValueError: Nếu request không hợp lệ
+            UploadTooLargeError: Nếu file lớn hơn MAX_FILE_SIZE
+            ImageNotFoundError: Nếu image_id không có trong kho
+        """
+        fields = self._request_fields()
+        
+        # Validate request
+        image_id = fields.get('image_id')
+        if not self._is_raw_upload() and 'image' not in request.files and not image_id:
+            raise ValueError('Không tìm thấy file ảnh')
+        
+        # Lấy tham số từ form data / query string
+        algorithm = fields.get('algorithm', 'canny')
+        parameters = self._extract_parameters(algorithm)
+        
+        # Validate algorithm và parameters trước khi đọc file
+        error = self._validate_algorithm_parameters(algorithm, parameters)
+        if error:
+            raise ValueError(error)
+        
+        file_data = self._read_upload()
+        if file_data is None:
+            return self.image_processor.image_store.get(image_id), algorithm, parameters
+        return file_data, algorithm, parameters
+    
+    @classmethod
+    def _is_raw_upload(cls) -> bool:
+        """Request gửi nguyên file ảnh trong body (application/octet-stream)"""
+        return request.mimetype == cls.RAW_UPLOAD_MIMETYPE
+    
+    def _request_fields(self) -> Mapping[str, Any]:
+        """Nguồn tham số: query string với upload thô, form data với multipart"""
+        return request.args if self._is_raw_upload() else request.form
+    
+    def _read_upload(self) -> Optional[Union[bytes, memoryview]]:
+        """
+        Đọc file ảnh của request: body với upload thô, trường image với
+        multipart
+        
+        Returns:
+            Dữ liệu file ảnh, hoặc None nếu request không gửi file
+            
+        Raises:
+            ValueError: Nếu file trống
+            UploadTooLargeError: Nếu file lớn hơn MAX_FILE_SIZE
+        """
+        if self._is_raw_upload():
+            return self._read_raw_body()
+        
+        file = request.files.get('image')
+        if file is None:
+            return None
+        if file.filename == '':
+            raise ValueError('File ảnh trống')
+        
+        file_data = file.read()
+        self._check_file_size(len(file_data))
+        return file_data
+    
+    @staticmethod
+    def _check_file_size(file_size: int) -> None:
+        """Validate kích thước file theo MAX_FILE_SIZE"""
+        is_valid, error = ParameterValidator.validate_file_size(file_size)
+        if not is_valid:
+            raise (UploadTooLargeError if file_size > MAX_FILE_SIZE else ValueError)(error)
+    
+    def _read_raw_body(self) -> memoryview:
+        """
+        Stream body vào một buffer cấp phát trước, không qua multipart hay
+        file tạm. Request bị từ chối ngay theo Content-Length, hoặc (khi
+        không có Content-Length) ngay khi số byte đã đọc vượt MAX_FILE_SIZE.
+        
+        Returns:
+            memoryview trên buffer, truyền thẳng vào cv2.imdecode không chép
+        """
+        content_length = request.content_length
+        if content_length is not None:
+            self._check_file_size(content_length)
+            capacity = content_length
+        else:
+            # Thêm 1 byte để phát hiện body dài hơn giới hạn
+            capacity = MAX_FILE_SIZE + 1
+        
+        view = memoryview(np.empty(capacity, dtype=np.uint8))
+        stream = request.stream
+        size = 0
+        with METRICS.stage('upload'):
+            try:
+                while size < capacity:
+                    read = stream.readinto(view[size:])
+                    if not read:
+                        break
+                    size += read
+            except ClientDisconnected:
+                raise ValueError('Client ngắt kết nối trước khi gửi đủ body')
+        
+        if content_length is not None and size < content_length:
+            raise ValueError('Body ngắn hơn Content-Length')
+        self._check_file_size(size)
+        return view[:size]
+    
+    def upload_image(self):
+        """
+        Upload và decode ảnh một lần, lưu vào kho ảnh (trường image của
+        multipart hoặc body application/octet-stream)
+        
+        Returns:
+            JSON response với image_id và thông tin ảnh (HTTP 201)
+        """
+        try:
+            file_data = self._read_upload()
+            if file_data is None:
+                raise ValueError('Không tìm thấy file ảnh')
+            
+            stored = self.image_processor.store_image(file_data)
+            response = self.image_processor.image_store.describe(stored.image_id)
+            response['status'] = 'success'
+            return response, 201
+            
+        except UploadTooLargeError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 413
+        except ValueError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 400
+        except Exception as e:
+            return {
+                'error': f'Lỗi lưu ảnh: {str(e)}',
                 'status': 'error'
             }, 500
     
-    def _extract_parameters(self, algorithm: str) -> Dict[str, Any]:
+    def get_image_info(self, image_id: str):
         """
-        Trích xuất tham số từ form data dựa trên thuật toán
+        Trả về thông tin của ảnh trong kho
+        
+        Args:
+            image_id: Id của ảnh
+        """
+        try:
+            response = self.image_processor.image_store.describe(image_id)
+        except ImageNotFoundError as e:
+            return {
+                'error': str(e),
+                'status': 'error'
+            }, 404
+        
+        response['status'] = 'success'
+        return response
+    
+    def delete_image(self, image_id: str):
+        """
+        Xóa ảnh khỏi kho
+        
+        Args:
+            image_id: Id của ảnh
+        """
+        if not self.image_processor.image_store.delete(image_id):
+            return {
+                'error': f"Không tìm thấy ảnh '{image_id}'",
+                'status': 'error'
+            }, 404
+        
+        return {'image_id': image_id, 'status': 'success'}
+    
+    def _extract_preview_size(self) -> Optional[int]:
+        """
+        Đọc chế độ preview từ form data: preview=true (cạnh dài mặc định
+        PREVIEW_MAX_DIMENSION) hoặc preview_size=<pixel>
+        
+        Returns:
+            Cạnh dài mục tiêu, hoặc None nếu không ở chế độ preview
+        """
+        fields = self._request_fields()
+        preview_size = fields.get('preview_size')
+        if preview_size is None:
+            if fields.get('preview', '').lower() not in ('1', 'true', 'yes'):
+                return None
+            return PREVIEW_MAX_DIMENSION
+        
+        preview_size = int(preview_size)
+        limits = PREVIEW_DIMENSION_LIMITS
+        if not limits['min'] <= preview_size <= limits['max']:
+            raise ValueError(f"preview_size phải nằm trong khoảng [{limits['min']}, {limits['max']}]")
+        return preview_size
+    
+    def _extract_output_format(self) -> str:
+        """
+        Đọc output_format từ form data (hoặc query string với upload thô)
+        
+        Raises:
+            ValueError: Nếu định dạng không được hỗ trợ
+        """
+        output_format = self._request_fields().get('output_format', DEFAULT_OUTPUT_FORMAT).lower()
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format phải là một trong {list(OUTPUT_FORMATS)}")
+        return output_format
+    
+    def _extract_polyline_tolerance(self) -> float:
+        """
+        Đọc polyline_tolerance (ngưỡng Douglas–Peucker, pixel)
+        
+        Raises:
+            ValueError: Nếu giá trị nằm ngoài POLYLINE_TOLERANCE_LIMITS
+        """
+        tolerance = float(self._request_fields().get('polyline_tolerance', DEFAULT_POLYLINE_TOLERANCE))
+        limits = POLYLINE_TOLERANCE_LIMITS
+        if not limits['min'] <= tolerance <= limits['max']:
+            raise ValueError(f"polyline_tolerance phải nằm trong khoảng [{limits['min']}, {limits['max']}]")
+        return tolerance
+    
+    def _validate_algorithm_parameters(self, algorithm: str,
+                                       parameters: Dict[str, Any]) -> Optional[str]:
+        """
+        Validate thuật toán và tham số
+        
+        Returns:
+            Thông báo lỗi, hoặc None nếu hợp lệ
+        """
+        if algorithm not in self.image_processor.get_supported_algorithms():
+            return f'Thuật toán "{algorithm}" không được hỗ trợ'
+        
+        if not self.image_processor.validate_parameters(algorithm, parameters):
+            return 'Tham số không hợp lệ'
+        
+        return None
+    
+    def _extract_parameters(self, algorithm: str,
+                            source: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Trích xuất tham số dựa trên thuật toán
         
         Args:
             algorithm: Tên thuật toán
+            source: Nguồn tham số (mặc định: form data, hoặc query string
+                với upload thô)
             
         Returns:
             Dictionary chứa tham số
         """
+        if source is None:
+            source = self._request_fields()
+        
         parameters = {}
         
         if algorithm == 'canny':
             parameters = {
-                'sigma': float(request.form.get('sigma', 1.0)),
-                'low_threshold': int(request.form.get('low_threshold', 50)),
-                'high_threshold': int(request.form.get('high_threshold', 150)),
-                'kernel_size': int(request.form.get('kernel_size', 5))
+                'sigma': float(source.get('sigma', 1.0)),
+                'low_threshold': int(source.get('low_threshold', 50)),
+                'high_threshold': int(source.get('high_threshold', 150)),
+                'kernel_size': int(source.get('kernel_size', 5))
             }
         elif algorithm == 'median':
             parameters = {
-                'kernel_size': int(request.form.get('kernel_size', 3))
+                'kernel_size': int(source.get('kernel_size', 3))
+            }
+        elif algorithm == 'pipeline':
+            # Form data gửi stages dạng JSON string, items của batch gửi list
+            stages = source.get('stages', [])
+            if isinstance(stages, str):
+                stages = json.loads(stages)
+            if not isinstance(stages, list) or not all(
+                    isinstance(stage, dict) and 'algorithm' in stage for stage in stages):
+                raise ValueError('Trường stages phải là JSON array các {"algorithm", "parameters"}')
+            parameters = {
+                'stages': [
+                    {
+                        'algorithm': stage['algorithm'],
+                        'parameters': self._extract_parameters(
+                            stage['algorithm'], stage.get('parameters', {})
+                        )
+                    }
+                    for stage in stages
+                ]
             }
         
         # Validate kernel size
@@ -123,8 +770,63 @@ class ImageController:
             if kernel_size % 2 == 0:
                 parameters['kernel_size'] = kernel_size + 1
         
+        # Backend tính toán (tùy chọn, mặc định theo cấu hình server)
+        backend = source.get('backend')
+        if backend:
+            parameters['backend'] = str(backend)
+        
         return parameters
     
+    def get_metrics(self) -> Response:
+        """
+        Số đo theo stage (histogram thời gian, bộ nhớ đỉnh) cùng các bộ đếm
+        của cache, hàng đợi job và số byte ảnh bị chép, theo text format
+        của Prometheus
+        """
+        lines = []
+        
+        def counter(name: str, help_text: str, metric_type: str, samples) -> None:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples:
+                lines.append(f'{name}{labels} {value}')
+        
+        cache_stats = self.image_processor.get_cache_stats()
+        tiers = [(tier, stats) for tier, stats in cache_stats.items() if stats is not None]
+        for key, metric_type in (('hits', 'counter'), ('misses', 'counter'),
+                                 ('evictions', 'counter'), ('bytes', 'gauge')):
+            suffix = '_total' if metric_type == 'counter' else ''
+            counter(f'result_cache_{key}{suffix}', f'Result cache {key}', metric_type,
+                    [(f'{{tier="{tier}"}}', stats[key]) for tier, stats in tiers])
+        
+        stage_stats = STAGE_CACHE.stats()
+        for key, metric_type in (('hits', 'counter'), ('misses', 'counter'),
+                                 ('evictions', 'counter'), ('bytes', 'gauge')):
+            suffix = '_total' if metric_type == 'counter' else ''
+            counter(f'stage_cache_{key}{suffix}', f'Stage cache {key}', metric_type,
+                    [('', stage_stats[key])])
+        
+        store_stats = self.image_processor.image_store.stats()
+        counter('image_store_entries', 'Số ảnh trong kho ảnh', 'gauge',
+                [('', store_stats['entries'])])
+        counter('image_store_bytes', 'Dung lượng kho ảnh (byte)', 'gauge',
+                [('', store_stats['bytes'])])
+        counter('image_store_evictions_total', 'Số ảnh bị loại do vượt dung lượng', 'counter',
+                [('', store_stats['evictions'])])
+        counter('image_store_expirations_total', 'Số ảnh hết hạn TTL', 'counter',
+                [('', store_stats['expirations'])])
+        
+        counter('job_queue_depth', 'Số job đang chờ trong hàng đợi', 'gauge',
+                [('', self.job_manager.queue_depth())])
+        copies = COPY_COUNTER.snapshot()
+        counter('image_copies_total', 'Số lần Image chép dữ liệu ảnh', 'counter',
+                [('', copies['copies'])])
+        counter('image_bytes_copied_total', 'Số byte Image đã chép', 'counter',
+                [('', copies['bytes_copied'])])
+        
+        return Response(METRICS.render_prometheus(lines),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
+    
     def get_algorithm_info(self, algorithm: str) -> Dict[str, Any]:
         """
         Trả về thông tin chi tiết về một thuật toán
@@ -149,6 +851,8 @@ class ImageController:
                 'algorithm': algorithm,
                 'description': description,
                 'parameters': parameters,
+                'backends': self.image_processor.get_algorithm_backends(algorithm),
+                'default_backend': DEFAULT_FILTER_BACKEND,
                 'status': 'success'
             }
             
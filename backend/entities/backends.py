@@ -0,0 +1,125 @@
+"""
+Backend tính toán thay thế cho các filter: OpenCV và SciPy
+
+Implementation NumPy thủ công trong entities.filters là backend 'numpy'. Các
+class ở đây kế thừa filter tương ứng (cùng parameters, validate, halo và
+output_spec) và chỉ thay phần tính toán. Sai khác cho phép so với backend
+'numpy' được ghi trong test_backends.py:
+
+- Median: cả ba backend cho kết quả giống hệt (biên lặp pixel cạnh).
+- Canny 'scipy': Gaussian và Sobel bằng scipy.ndimage, NMS và hysteresis
+  dùng chung; chỉ khác do làm tròn float32 ở các pixel có magnitude sát
+  ngưỡng hoặc hướng sát biên 22.5°.
+- Canny 'opencv': cv2.Canny trên gradient làm tròn về int16, NMS của OpenCV
+  phá hòa theo một phía và không xóa viền 1 pixel, nên khác ở một phần nhỏ
+  pixel cạnh.
+"""
+
+from typing import Optional
+
+import cv2
+import numpy as np
+from scipy import ndimage
+
+from utils.metrics import METRICS
+from .convolution import gaussian_kernel_1d
+from .filters import CannyEdgeDetector, CannyThresholdStage, MedianFilter
+from .hysteresis import strip_hysteresis
+from .median import SORTING_NETWORK_KERNELS
+
+# Tên các backend, 'numpy' là implementation thủ công
+BACKENDS = ('numpy', 'opencv', 'scipy')
+
+
+class OpenCVCannyEdgeDetector(CannyEdgeDetector):
+    """Canny dùng cv2.GaussianBlur, cv2.Sobel và cv2.Canny"""
+
+    backend = 'opencv'
+
+    def get_strip_plan(self):
+        # cv2.Canny gộp NMS, ngưỡng kép và hysteresis nên không tách được
+        raise ValueError("Backend opencv của Canny không hỗ trợ xử lý ảnh lớn theo dải, "
+                         "hãy dùng backend numpy hoặc scipy")
+
+    def _canny(self, image: np.ndarray, sigma: float, low_thresh: int,
+               high_thresh: int, kernel_size: int,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        with METRICS.stage('canny_gaussian'):
+            smoothed = cv2.GaussianBlur(image.astype(np.float32, copy=False),
+                                        (kernel_size, kernel_size), sigma,
+                                        borderType=cv2.BORDER_REPLICATE)
+
+        with METRICS.stage('canny_sobel'):
+            # cv2.Canny nhận gradient int16 (CV_16S)
+            dx = np.rint(cv2.Sobel(smoothed, cv2.CV_32F, 1, 0, ksize=3,
+                                   borderType=cv2.BORDER_REPLICATE)).astype(np.int16)
+            dy = np.rint(cv2.Sobel(smoothed, cv2.CV_32F, 0, 1, ksize=3,
+                                   borderType=cv2.BORDER_REPLICATE)).astype(np.int16)
+
+        with METRICS.stage('canny_hysteresis'):
+            self.hysteresis_stats = None
+            if out is None:
+                return cv2.Canny(dx, dy, low_thresh, high_thresh, L2gradient=True)
+            return cv2.Canny(dx, dy, low_thresh, high_thresh, edges=out, L2gradient=True)
+
+
+class SciPyCannyEdgeDetector(CannyEdgeDetector):
+    """Canny với Gaussian và Sobel bằng scipy.ndimage"""
+
+    backend = 'scipy'
+
+    def get_strip_plan(self):
+        return SciPyCannyThresholdStage(self.parameters), strip_hysteresis
+
+    def _gradients(self, image, sigma, kernel_size):
+        with METRICS.stage('canny_gaussian'):
+            weights = gaussian_kernel_1d(kernel_size, sigma)
+            smoothed = ndimage.correlate1d(image, weights, axis=1, mode='nearest')
+            ndimage.correlate1d(smoothed, weights, axis=0, mode='nearest', output=smoothed)
+
+        with METRICS.stage('canny_sobel'):
+            gx = ndimage.sobel(smoothed, axis=1, mode='nearest')
+            gy = ndimage.sobel(smoothed, axis=0, mode='nearest')
+            magnitude, angle = self._polar_gradients(gx, gy)
+        return smoothed, magnitude, angle
+
+
+class SciPyCannyThresholdStage(CannyThresholdStage, SciPyCannyEdgeDetector):
+    """Bản đồ ngưỡng kép theo dải của backend scipy"""
+
+
+class OpenCVMedianFilter(MedianFilter):
+    """
+    Median bằng cv2.medianBlur. OpenCV chỉ nhận ảnh float32/uint16 với
+    kernel 3 và 5; các trường hợp khác dùng implementation NumPy
+    """
+
+    backend = 'opencv'
+
+    def _median_filter(self, image: np.ndarray, kernel_size: int,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        supported = image.dtype == np.uint8 or (
+            image.dtype in (np.uint16, np.float32) and kernel_size in SORTING_NETWORK_KERNELS
+        )
+        if not supported:
+            return super()._median_filter(image, kernel_size, out)
+
+        filtered = cv2.medianBlur(np.ascontiguousarray(image), kernel_size)
+        if out is None:
+            return filtered
+        np.copyto(out, filtered)
+        return out
+
+
+class SciPyMedianFilter(MedianFilter):
+    """Median bằng scipy.ndimage.median_filter"""
+
+    backend = 'scipy'
+
+    def _median_filter(self, image: np.ndarray, kernel_size: int,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is not None and np.shares_memory(out, image):
+            # out được phép trùng ảnh vào: lọc ra mảng mới rồi chép lại
+            np.copyto(out, ndimage.median_filter(image, size=kernel_size, mode='nearest'))
+            return out
+        return ndimage.median_filter(image, size=kernel_size, mode='nearest', output=out)
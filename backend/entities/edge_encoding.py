@@ -0,0 +1,116 @@
+"""
+Encode gọn cho ảnh nhị phân (bản đồ cạnh 0/255 của Canny): bit-packed,
+run-length theo hàng và danh sách tọa độ pixel cạnh
+
+Mọi định dạng dùng thứ tự hàng (row-major) và little-endian; shape của ảnh
+được trả kèm trong thông tin encode để client giải mã.
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# Các định dạng gọn cho ảnh nhị phân
+EDGE_FORMATS = ('packbits', 'rle', 'sparse')
+
+
+def is_binary_mask(array: np.ndarray) -> bool:
+    """Ảnh 2 chiều uint8 chỉ gồm 0 và 255"""
+    if array.ndim != 2 or array.dtype != np.uint8:
+        return False
+    return np.count_nonzero(array) == np.count_nonzero(array == 255)
+
+
+def _index_dtype(limit: int) -> np.dtype:
+    """uint16 nếu mọi giá trị nhỏ hơn limit vừa 16 bit, ngược lại uint32"""
+    return np.dtype('<u2') if limit <= 0xFFFF else np.dtype('<u4')
+
+
+def encode_packbits(mask: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """1 bit mỗi pixel (np.packbits, bit cao trước), hàng nối tiếp nhau"""
+    return np.packbits(mask.ravel() != 0), {'bit_order': 'big'}
+
+
+def encode_rle(mask: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Độ dài các run của từng hàng, xen kẽ nền/cạnh và luôn bắt đầu bằng run
+    nền (có thể dài 0); tổng các run của một hàng bằng chiều rộng ảnh nên
+    không cần lưu số run mỗi hàng
+    """
+    height, width = mask.shape
+    bits = (mask != 0).view(np.uint8)
+    # Vị trí đổi giá trị trong hàng (coi pixel trước cột 0 là nền), cộng mốc
+    # cuối hàng ở cột width; chỉ số trải phẳng giữ thứ tự (hàng, cột)
+    changes = np.empty((height, width + 1), dtype=bool)
+    np.not_equal(bits, np.roll(bits, 1, axis=1), out=changes[:, :width])
+    changes[:, 0] = bits[:, 0] != 0
+    changes[:, width] = True
+    rows, cols = np.divmod(np.flatnonzero(changes), width + 1)
+
+    previous = np.empty_like(cols)
+    previous[0] = 0
+    previous[1:] = cols[:-1]
+    previous[np.flatnonzero(np.diff(rows)) + 1] = 0
+    dtype = _index_dtype(width)
+    return (cols - previous).astype(dtype), {'dtype': dtype.str}
+
+
+def encode_sparse(mask: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Cặp (y, x) của các pixel cạnh theo thứ tự hàng"""
+    rows, cols = np.divmod(np.flatnonzero(mask), mask.shape[1])
+    dtype = _index_dtype(max(mask.shape) - 1)
+    coordinates = np.empty((len(rows), 2), dtype=dtype)
+    coordinates[:, 0] = rows
+    coordinates[:, 1] = cols
+    return coordinates.ravel(), {'dtype': dtype.str, 'count': len(rows)}
+
+
+_ENCODERS = {
+    'packbits': encode_packbits,
+    'rle': encode_rle,
+    'sparse': encode_sparse,
+}
+
+
+def encode_edges(mask: np.ndarray, edge_format: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Encode ảnh nhị phân theo một định dạng trong EDGE_FORMATS
+
+    Returns:
+        Tuple (payload uint8, thông tin để giải mã: format, shape, ...)
+    """
+    if edge_format not in _ENCODERS:
+        raise ValueError(f"Định dạng '{edge_format}' không được hỗ trợ")
+    if not is_binary_mask(mask):
+        raise ValueError(f"Định dạng '{edge_format}' chỉ dùng cho ảnh nhị phân (0/255)")
+    payload, info = _ENCODERS[edge_format](mask)
+    info = dict(info, format=edge_format, shape=list(mask.shape))
+    return payload.view(np.uint8), info
+
+
+def decode_edges(payload, info: Dict[str, Any]) -> np.ndarray:
+    """Giải mã payload của encode_edges thành ảnh 0/255"""
+    height, width = info['shape']
+    data = np.frombuffer(payload, dtype=np.uint8)
+    mask = np.zeros((height, width), dtype=np.uint8)
+
+    if info['format'] == 'packbits':
+        mask[...] = np.unpackbits(data, count=height * width).reshape(height, width)
+    elif info['format'] == 'rle':
+        runs = data.view(info['dtype']).astype(np.int64)
+        # Các run nối tiếp nhau trên ảnh đã trải phẳng (tổng mỗi hàng = width)
+        starts = np.cumsum(runs) - runs
+        # Run đầu hàng bắt đầu ở cột 0; run cạnh đầu hàng đi sau run nền dài 0
+        # cùng vị trí (run dài 0 chỉ có ở đầu hàng)
+        first = starts % width == 0
+        first[1:] &= ~((runs[:-1] == 0) & (starts[:-1] == starts[1:]))
+        index = np.arange(len(runs))
+        row_start = np.maximum.accumulate(np.where(first, index, 0))
+        edge = ((index - row_start) % 2).astype(np.uint8)
+        mask.ravel()[:] = np.repeat(edge, runs)
+    elif info['format'] == 'sparse':
+        coordinates = data.view(info['dtype']).reshape(-1, 2).astype(np.intp)
+        mask[coordinates[:, 0], coordinates[:, 1]] = 1
+    else:
+        raise ValueError(f"Định dạng '{info['format']}' không được hỗ trợ")
+    return mask * np.uint8(255)
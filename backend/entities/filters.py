@@ -1,13 +1,21 @@
 import cv2
 import numpy as np
 from abc import ABC, abstractmethod
-from typing import Optional, Tuple
+from typing import Any, Callable, Optional, Tuple
 from dataclasses import dataclass
-from scipy import ndimage
 from numpy.lib.stride_tricks import sliding_window_view
 import math
 
+from utils.metrics import METRICS
+from utils.stage_cache import STAGE_CACHE
 from .image import Image
+from .convolution import SeparableConvolver, gaussian_kernel, SOBEL_X, SOBEL_Y
+from .nms import non_max_suppression
+from .hysteresis import hysteresis, strip_hysteresis, HysteresisStats
+from .median import (
+    histogram_median, sorting_network_median,
+    HISTOGRAM_MEDIAN_MIN_KERNEL, SORTING_NETWORK_KERNELS
+)
 
 
 @dataclass
@@ -31,9 +39,23 @@ class MedianParameters(FilterParameters):
     kernel_size: int = 3
 
 
+@dataclass
+class InputRequirements:
+    """
+    Ảnh vào mà filter cần, để decode không thừa (xem services.decode_planner)
+    """
+    # Filter chỉ đọc ảnh grayscale (ảnh màu bị chuyển ngay khi apply)
+    grayscale: bool = False
+    # Cạnh dài tối đa filter dùng tới, None nếu cần độ phân giải đầy đủ
+    max_dimension: Optional[int] = None
+
+
 class BaseFilter(ABC):
     """Base class cho tất cả các filter"""
     
+    # Backend tính toán của implementation (xem entities.backends)
+    backend = 'numpy'
+    
     def __init__(self, parameters: FilterParameters):
         self.parameters = parameters
     
@@ -46,12 +68,51 @@ class BaseFilter(ABC):
     def get_name(self) -> str:
         """Trả về tên của filter"""
         pass
+    
+    def get_halo(self) -> int:
+        """
+        Số hàng lân cận cần có ở mỗi phía của một dải ảnh để kết quả xử lý
+        theo dải (StripExecutor) giống hệt xử lý cả ảnh
+        """
+        raise NotImplementedError(f"{self.get_name()} không hỗ trợ xử lý theo dải")
+    
+    def get_strip_plan(self) -> Tuple['BaseFilter', Optional[Callable[[np.ndarray, int], Any]]]:
+        """
+        Cách chạy filter theo dải (StripExecutor)
+        
+        Returns:
+            Tuple (filter cục bộ chạy trên từng dải với halo get_halo(), bước
+            toàn cục chạy tại chỗ trên toàn bộ output theo dải hoặc None)
+        """
+        return self, None
+    
+    def output_spec(self, shape: Tuple[int, ...], dtype: np.dtype) -> Optional[Tuple[Tuple[int, ...], np.dtype]]:
+        """
+        Shape và dtype của kết quả cho ảnh vào có shape/dtype đã cho, nếu
+        filter ghi được kết quả vào buffer cho trước (apply(image, out=...)).
+        Buffer out được phép trùng với dữ liệu ảnh vào: filter phải đọc xong
+        ảnh vào trước khi ghi.
+        
+        Returns:
+            Tuple (shape, dtype), hoặc None nếu filter không hỗ trợ out
+        """
+        return None
+    
+    def input_requirements(self) -> InputRequirements:
+        """Ảnh vào filter cần; mặc định là ảnh màu độ phân giải đầy đủ"""
+        return InputRequirements()
 
 
 class CannyEdgeDetector(BaseFilter):
+    # Lưu magnitude sau NMS vào STAGE_CACHE để lần chạy chỉ đổi ngưỡng bỏ
+    # qua Gaussian, Sobel và NMS
+    use_stage_cache = True
+    
     def __init__(self, parameters: CannyParameters):
         super().__init__(parameters)
         self._validate_parameters()
+        # Bộ đếm của lần hysteresis gần nhất
+        self.hysteresis_stats: Optional[HysteresisStats] = None
     
     def _validate_parameters(self):
         params = self.parameters
@@ -65,24 +126,43 @@ class CannyEdgeDetector(BaseFilter):
     def get_name(self) -> str:
         return "Canny Edge Detection"
     
-    def apply(self, image: Image) -> Image:
-        if len(image.shape) == 3:
-            gray_image = image.to_grayscale()
-        else:
-            gray_image = image
-        
-        float_image = gray_image.to_float32()
+    def get_halo(self) -> int:
+        # Hysteresis nối pixel ở khoảng cách bất kỳ nên không có halo hữu hạn
+        raise NotImplementedError(
+            "Hysteresis của Canny liên thông trên toàn ảnh, dùng get_strip_plan"
+        )
+    
+    def get_strip_plan(self):
+        # Ngưỡng kép chạy theo dải, hysteresis gộp nhãn qua biên các dải
+        return CannyThresholdStage(self.parameters), strip_hysteresis
+    
+    def output_spec(self, shape, dtype):
+        return shape[:2], np.dtype(np.uint8)
+    
+    def input_requirements(self) -> InputRequirements:
+        return InputRequirements(grayscale=True)
+    
+    def apply(self, image: Image, out: Optional[np.ndarray] = None) -> Image:
+        with METRICS.stage('grayscale'):
+            if len(image.shape) == 3:
+                gray_image = image.to_grayscale()
+            else:
+                gray_image = image
         
+        # Chuyển sang float32 trong _threshold_map, chỉ khi cache NMS bị miss
         edges = self._canny(
-            float_image.data,
+            gray_image.data,
             self.parameters.sigma,
             self.parameters.low_threshold,
             self.parameters.high_threshold,
-            self.parameters.kernel_size
+            self.parameters.kernel_size,
+            out
         )
         
-        return Image(image_data=edges.astype(np.uint8))
+        return Image(image_data=edges)
     
+    # _gaussian_kernel và _convolve là implementation 2D tham chiếu (O(k²) mỗi
+    # pixel); pipeline dùng SeparableConvolver cho kết quả tương đương
     def _gaussian_kernel(self, size: int, sigma: float) -> np.ndarray:
         if size % 2 == 0:
             raise ValueError("Kernel size phải là số lẻ!")
@@ -105,19 +185,37 @@ class CannyEdgeDetector(BaseFilter):
         
         return result
     
-    def _sobel_gradients(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        sobel_x = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32)
-        sobel_y = np.array([[-1, -2, -1], [0, 0, 0], [1, 2, 1]], dtype=np.float32)
+    def _sobel_gradients(self, image: np.ndarray,
+                         convolver: Optional[SeparableConvolver] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if convolver is None:
+            convolver = SeparableConvolver()
         
-        gx = self._convolve(image, sobel_x)
-        gy = self._convolve(image, sobel_y)
+        gx = convolver.convolve(image, SOBEL_X)
+        gy = convolver.convolve(image, SOBEL_Y)
+        return self._polar_gradients(gx, gy)
+    
+    @staticmethod
+    def _polar_gradients(gx: np.ndarray, gy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # magnitude = sqrt(gx² + gy²), tính tại chỗ trên các buffer float32
+        magnitude = np.multiply(gx, gx)
+        angle = np.multiply(gy, gy)
+        np.add(magnitude, angle, out=magnitude)
+        np.sqrt(magnitude, out=magnitude)
         
-        magnitude = np.sqrt(gx ** 2 + gy ** 2)
-        angle = np.arctan2(gy, gx) * (180 / np.pi) % 180
+        # angle = arctan2(gy, gx) * (180 / pi) % 180
+        np.arctan2(gy, gx, out=angle)
+        np.multiply(angle, np.float32(180 / np.pi), out=angle)
+        np.remainder(angle, np.float32(180), out=angle)
         
         return magnitude, angle
     
-    def _non_max_suppression(self, magnitude: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    def _non_max_suppression(self, magnitude: np.ndarray, angle: np.ndarray,
+                             out: Optional[np.ndarray] = None) -> np.ndarray:
+        return non_max_suppression(magnitude, angle, out)
+    
+    # Implementation NMS tham chiếu dùng np.roll (8 bản sao cả ảnh); pipeline
+    # dùng entities.nms.non_max_suppression cho kết quả giống hệt
+    def _roll_non_max_suppression(self, magnitude: np.ndarray, angle: np.ndarray) -> np.ndarray:
         h, w = magnitude.shape
         result = np.zeros_like(magnitude)
         
@@ -154,41 +252,99 @@ class CannyEdgeDetector(BaseFilter):
         return result
     
     def _double_threshold(self, image: np.ndarray, low: int, high: int) -> np.ndarray:
-        strong = (image >= high)
-        weak = (image >= low) & (image < high)
-        
-        result = np.zeros_like(image, dtype=np.uint8)
-        result[strong] = 255
-        result[weak] = 128
+        # 128 * (x >= low) + 127 * (x >= high): 255 cho pixel mạnh, 128 cho
+        # pixel yếu (low < high), tính trên uint8 thay vì gán theo mask
+        result = np.greater_equal(image, low).view(np.uint8)
+        np.multiply(result, np.uint8(128), out=result)
+        strong = np.greater_equal(image, high).view(np.uint8)
+        np.multiply(strong, np.uint8(127), out=strong)
+        np.add(result, strong, out=result)
         
         return result
     
-    def _hysteresis(self, image: np.ndarray) -> np.ndarray:
-        result = image.copy()
-        weak_mask = (result == 128)
-        kernel = np.ones((3, 3), dtype=np.uint8)
-        strong_mask = (result == 255)
+    def _hysteresis(self, image: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        # Giữ pixel yếu nối với pixel mạnh ở khoảng cách bất kỳ (gán nhãn
+        # thành phần liên thông, tuyến tính theo số pixel)
+        edges, self.hysteresis_stats = hysteresis(image, out)
+        return edges
+    
+    def _threshold_map(self, image: np.ndarray, sigma: float, low_thresh: int,
+                       high_thresh: int, kernel_size: int) -> np.ndarray:
+        # Magnitude sau NMS không phụ thuộc ngưỡng: lấy từ cache nếu có
+        key, nms = None, None
+        if self.use_stage_cache:
+            with METRICS.stage('canny_stage_cache'):
+                key = STAGE_CACHE.key(image, 'canny_nms', self.backend, float(sigma), int(kernel_size))
+                nms = STAGE_CACHE.get(key)
         
-        strong_dilated = ndimage.binary_dilation(strong_mask, structure=kernel)
-        result[weak_mask & strong_dilated] = 255
-        result[weak_mask & ~strong_dilated] = 0
+        if nms is None:
+            nms = self._nms_magnitude(image, sigma, kernel_size)
+            STAGE_CACHE.put(key, nms)
         
-        return result
+        with METRICS.stage('canny_threshold'):
+            return self._double_threshold(nms, low_thresh, high_thresh)
     
-    def _canny(self, image: np.ndarray, sigma: float, low_thresh: int, 
-                        high_thresh: int, kernel_size: int) -> np.ndarray:
+    def _nms_magnitude(self, image: np.ndarray, sigma: float, kernel_size: int) -> np.ndarray:
+        """Gaussian, Sobel rồi NMS, trả về magnitude đã loại điểm không cực đại"""
         if image.dtype != np.float32:
             image = image.astype(np.float32)
         
-        gaussian_k = self._gaussian_kernel(kernel_size, sigma)
-        smoothed = self._convolve(image, gaussian_k)
-        
-        magnitude, angle = self._sobel_gradients(smoothed)
-        nms = self._non_max_suppression(magnitude, angle)
-        thresh = self._double_threshold(nms, low_thresh, high_thresh)
-        edges = self._hysteresis(thresh)
+        smoothed, magnitude, angle = self._gradients(image, sigma, kernel_size)
+        # Ảnh đã làm mờ không còn dùng sau Sobel: tái sử dụng làm output NMS
+        with METRICS.stage('canny_nms'):
+            return self._non_max_suppression(magnitude, angle, out=smoothed)
+    
+    def _gradients(self, image: np.ndarray, sigma: float,
+                   kernel_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Làm mờ Gaussian rồi Sobel, trả về (ảnh đã làm mờ, magnitude, angle)"""
+        convolver = SeparableConvolver()
+        with METRICS.stage('canny_gaussian'):
+            smoothed = convolver.convolve(image, gaussian_kernel(kernel_size, sigma))
         
-        return edges.astype(np.uint8)
+        with METRICS.stage('canny_sobel'):
+            magnitude, angle = self._sobel_gradients(smoothed, convolver)
+        return smoothed, magnitude, angle
+    
+    def _canny(self, image: np.ndarray, sigma: float, low_thresh: int, 
+                        high_thresh: int, kernel_size: int,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+        thresh = self._threshold_map(image, sigma, low_thresh, high_thresh, kernel_size)
+        with METRICS.stage('canny_hysteresis'):
+            return self._hysteresis(thresh, out)
+
+
+class CannyThresholdStage(CannyEdgeDetector):
+    """
+    Phần cục bộ của Canny khi chạy theo dải: trả về bản đồ ngưỡng kép
+    (0/128/255), hysteresis được chạy sau trên toàn bộ output
+    """
+    
+    # Mỗi dải là một ảnh khác nhau, lưu cache chỉ đẩy kết quả hữu ích ra ngoài
+    use_stage_cache = False
+    
+    def get_name(self) -> str:
+        return "Canny Double Threshold"
+    
+    def get_halo(self) -> int:
+        # Gaussian + Sobel (1) + NMS (1)
+        return self.parameters.kernel_size // 2 + 2
+    
+    def get_strip_plan(self):
+        return self, None
+    
+    def apply(self, image: Image, out: Optional[np.ndarray] = None) -> Image:
+        gray_image = image.to_grayscale() if len(image.shape) == 3 else image
+        thresh = self._threshold_map(
+            gray_image.to_float32().data,
+            self.parameters.sigma,
+            self.parameters.low_threshold,
+            self.parameters.high_threshold,
+            self.parameters.kernel_size
+        )
+        if out is not None:
+            np.copyto(out, thresh)
+            thresh = out
+        return Image(image_data=thresh)
 
 
 class MedianFilter(BaseFilter):    
@@ -205,20 +361,48 @@ class MedianFilter(BaseFilter):
     def get_name(self) -> str:
         return "Median Filter"
     
-    def apply(self, image: Image) -> Image:
-        if len(image.shape) == 3:
-            gray_image = image.to_grayscale()
-        else:
-            gray_image = image
+    def get_halo(self) -> int:
+        return self.parameters.kernel_size // 2
+    
+    def output_spec(self, shape, dtype):
+        return shape[:2], np.dtype(dtype)
+    
+    def input_requirements(self) -> InputRequirements:
+        return InputRequirements(grayscale=True)
+    
+    def apply(self, image: Image, out: Optional[np.ndarray] = None) -> Image:
+        with METRICS.stage('grayscale'):
+            if len(image.shape) == 3:
+                gray_image = image.to_grayscale()
+            else:
+                gray_image = image
         
-        filtered_data = self._median_filter(
-            gray_image.data, 
-            self.parameters.kernel_size
-        )
+        with METRICS.stage('median_filter'):
+            filtered_data = self._median_filter(
+                gray_image.data, 
+                self.parameters.kernel_size,
+                out
+            )
+        
+        return Image(image_data=filtered_data.astype(image.dtype, copy=False))
+    
+    def _median_filter(self, image: np.ndarray, kernel_size: int,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        # Kernel 3x3 / 5x5: mạng so sánh min/max trên dtype gốc
+        if kernel_size in SORTING_NETWORK_KERNELS:
+            return sorting_network_median(image, kernel_size, out)
+        
+        # Histogram trượt nhanh hơn nhiều với kernel lớn trên ảnh 8-bit
+        if image.dtype == np.uint8 and kernel_size >= HISTOGRAM_MEDIAN_MIN_KERNEL:
+            return histogram_median(image, kernel_size, out)
         
-        return Image(image_data=filtered_data.astype(image.dtype))
+        filtered = self._sliding_window_median(image, kernel_size)
+        if out is None:
+            return filtered
+        np.copyto(out, filtered)
+        return out
     
-    def _median_filter(self, image: np.ndarray, kernel_size: int) -> np.ndarray:
+    def _sliding_window_median(self, image: np.ndarray, kernel_size: int) -> np.ndarray:
         m, n = image.shape
         pad_size = kernel_size // 2
         padded_image = np.pad(image, pad_size, mode='edge')
@@ -0,0 +1,170 @@
+"""
+Hysteresis của Canny theo thành phần liên thông (8 láng giềng)
+"""
+
+import cv2
+import numpy as np
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Giá trị pixel trong bản đồ ngưỡng kép của Canny
+STRONG = 255
+WEAK = 128
+
+EIGHT_CONNECTIVITY = np.ones((3, 3), dtype=bool)
+
+
+@dataclass
+class HysteresisStats:
+    """Bộ đếm chi phí của một lần chạy hysteresis"""
+    pixels: int = 0             # Số pixel được quét
+    strong_pixels: int = 0      # Pixel vượt ngưỡng cao
+    weak_pixels: int = 0        # Pixel nằm giữa hai ngưỡng
+    promoted_pixels: int = 0    # Pixel yếu được giữ lại vì nối với pixel mạnh
+    components: int = 0         # Số thành phần liên thông của các pixel ứng viên
+    label_passes: int = 0       # Số lần gán nhãn (mỗi lần O(số pixel))
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def hysteresis(thresh: np.ndarray,
+               out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, HysteresisStats]:
+    """
+    Giữ mọi pixel yếu nối (trực tiếp hoặc qua các pixel yếu khác, ở khoảng
+    cách bất kỳ) với một pixel mạnh
+
+    Các pixel ứng viên (yếu hoặc mạnh) được gán nhãn thành phần liên thông
+    một lần; thành phần nào chứa pixel mạnh thì được giữ.
+    Chi phí tuyến tính theo số pixel, không phụ thuộc độ dài đường biên như
+    khi lặp binary_dilation.
+
+    Args:
+        thresh: Bản đồ ngưỡng kép uint8 (0, WEAK, STRONG)
+        out: Buffer kết quả (tùy chọn, được phép trùng với thresh)
+
+    Returns:
+        Tuple (ảnh biên uint8 0/255, bộ đếm)
+    """
+    # cv2.connectedComponents cho cùng phân hoạch 8 láng giềng như
+    # ndimage.label nhưng nhanh hơn; nhãn 0 là nền
+    candidates = thresh > 0
+    count, labels = cv2.connectedComponents(candidates.view(np.uint8), connectivity=8,
+                                            ltype=cv2.CV_32S)
+    count -= 1
+    strong = thresh == STRONG
+
+    keep = np.zeros(count + 1, dtype=bool)
+    keep[labels[strong]] = True
+    keep[0] = False
+
+    strong_pixels = int(np.count_nonzero(strong))
+    weak_pixels = int(np.count_nonzero(candidates)) - strong_pixels
+
+    result = np.empty(thresh.shape, dtype=np.uint8) if out is None else out
+    np.multiply(keep[labels], np.uint8(STRONG), out=result, casting='unsafe')
+
+    stats = HysteresisStats(
+        pixels=thresh.size,
+        strong_pixels=strong_pixels,
+        weak_pixels=weak_pixels,
+        promoted_pixels=int(np.count_nonzero(result)) - strong_pixels,
+        components=count,
+        label_passes=1,
+    )
+    return result, stats
+
+
+def strip_hysteresis(thresh: np.ndarray, strip_height: int) -> HysteresisStats:
+    """
+    Hysteresis tại chỗ trên bản đồ ngưỡng kép lớn (ví dụ np.memmap) theo dải
+
+    Lượt 1 gán nhãn từng dải, ghi nhận thành phần nào chứa pixel mạnh và các
+    cặp nhãn chạm nhau qua biên hai dải liền kề. Các nhãn được gộp toàn cục
+    (connected_components trên đồ thị nhãn), rồi lượt 2 gán nhãn lại từng dải
+    và ghi kết quả. Bộ nhớ tỉ lệ với chiều cao dải và số thành phần; kết quả
+    giống hệt hysteresis() trên cả ảnh.
+
+    Args:
+        thresh: Bản đồ ngưỡng kép uint8 2D, bị ghi đè bằng ảnh biên 0/255
+        strip_height: Số hàng mỗi dải
+
+    Returns:
+        Bộ đếm
+    """
+    height = thresh.shape[0]
+    stats = HysteresisStats(pixels=thresh.size)
+    bounds = [(start, min(start + strip_height, height)) for start in range(0, height, strip_height)]
+
+    # Lượt 1: nhãn toàn cục của dải i là nhãn cục bộ + offsets[i]
+    offsets: List[int] = []
+    strong_labels: List[np.ndarray] = []
+    pairs: List[np.ndarray] = []
+    previous_row: Optional[np.ndarray] = None
+    total = 0
+
+    for start, stop in bounds:
+        strip = np.asarray(thresh[start:stop])
+        labels, count = ndimage.label(strip > 0, structure=EIGHT_CONNECTIVITY)
+        stats.label_passes += 1
+        strong = strip == STRONG
+        stats.strong_pixels += int(np.count_nonzero(strong))
+        stats.weak_pixels += int(np.count_nonzero(labels)) - int(np.count_nonzero(strong))
+
+        strong_labels.append(np.unique(labels[strong]).astype(np.intp) + total)
+        first_row = np.where(labels[0] > 0, labels[0].astype(np.intp) + total, 0)
+        if previous_row is not None:
+            pairs.extend(_boundary_pairs(previous_row, first_row))
+        previous_row = np.where(labels[-1] > 0, labels[-1].astype(np.intp) + total, 0)
+
+        offsets.append(total)
+        total += count
+
+    # Gộp nhãn qua biên các dải; nhãn 0 là nền
+    if pairs:
+        edges = np.concatenate(pairs, axis=1)
+    else:
+        edges = np.empty((2, 0), dtype=np.int64)
+    graph = coo_matrix((np.ones(edges.shape[1], dtype=np.int8), (edges[0], edges[1])),
+                       shape=(total + 1, total + 1))
+    component_count, component = connected_components(graph, directed=False)
+    stats.components = component_count - 1
+
+    keep = np.zeros(component_count, dtype=bool)
+    keep[component[np.concatenate(strong_labels)]] = True
+    keep_label = keep[component]
+    keep_label[0] = False
+
+    # Lượt 2: gán nhãn lại (cùng kết quả với lượt 1) và ghi ảnh biên
+    kept_pixels = 0
+    for (start, stop), offset in zip(bounds, offsets):
+        strip = np.asarray(thresh[start:stop])
+        labels, _ = ndimage.label(strip > 0, structure=EIGHT_CONNECTIVITY)
+        stats.label_passes += 1
+        labels = labels.astype(np.intp, copy=False)
+        labels[labels > 0] += offset
+        edges_strip = keep_label[labels]
+        kept_pixels += int(np.count_nonzero(edges_strip))
+        thresh[start:stop] = edges_strip.astype(np.uint8) * np.uint8(STRONG)
+
+    stats.promoted_pixels = kept_pixels - stats.strong_pixels
+    return stats
+
+
+def _boundary_pairs(upper: np.ndarray, lower: np.ndarray) -> List[np.ndarray]:
+    """Các cặp nhãn (trên, dưới) chạm nhau theo 8 láng giềng qua biên hai dải"""
+    result = []
+    for shift in (-1, 0, 1):
+        if shift < 0:
+            a, b = upper[:shift], lower[-shift:]
+        elif shift > 0:
+            a, b = upper[shift:], lower[:-shift]
+        else:
+            a, b = upper, lower
+        touching = (a > 0) & (b > 0)
+        if touching.any():
+            result.append(np.stack([a[touching], b[touching]]).astype(np.int64))
+    return result
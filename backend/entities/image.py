@@ -1,6 +1,7 @@
+import threading
 import cv2
 import numpy as np
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from dataclasses import dataclass
 
 
@@ -14,32 +15,88 @@ class ImageMetadata:
     size_bytes: int
 
 
+class CopyCounter:
+    """
+    Bộ đếm số lần và số byte dữ liệu ảnh bị chép bởi Image (thread-safe)
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.copies = 0
+        self.bytes_copied = 0
+    
+    def add(self, nbytes: int) -> None:
+        """Ghi nhận một lần chép nbytes byte"""
+        with self._lock:
+            self.copies += 1
+            self.bytes_copied += nbytes
+    
+    def snapshot(self) -> Dict[str, int]:
+        """Trả về giá trị hiện tại của bộ đếm"""
+        with self._lock:
+            return {'copies': self.copies, 'bytes_copied': self.bytes_copied}
+    
+    def reset(self) -> None:
+        """Đặt lại bộ đếm về 0"""
+        with self._lock:
+            self.copies = 0
+            self.bytes_copied = 0
+
+
+# Bộ đếm toàn cục cho mọi lần chép dữ liệu của Image
+COPY_COUNTER = CopyCounter()
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """Tạo view chỉ đọc của mảng (không chép dữ liệu)"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
 class Image:
     """
     Entity class đại diện cho một ảnh và các thao tác cơ bản
+    
+    Image giữ dữ liệu dưới dạng view chỉ đọc và nhận buffer được truyền vào
+    mà không chép: caller không được sửa mảng sau khi tạo Image (truyền
+    copy=True nếu vẫn cần sửa). Nhiều Image có thể dùng chung một buffer;
+    dữ liệu chỉ bị chép khi cần ghi (writable_data) - copy-on-write. Mọi lần
+    chép được ghi vào COPY_COUNTER.
     """
     
-    def __init__(self, image_data: Optional[np.ndarray] = None, file_path: Optional[str] = None):
+    def __init__(self, image_data: Optional[np.ndarray] = None, file_path: Optional[str] = None,
+                 copy: bool = False):
         """
         Khởi tạo Image entity
         
         Args:
             image_data: Dữ liệu ảnh dạng numpy array
             file_path: Đường dẫn file ảnh
+            copy: Chép image_data thay vì dùng chung buffer
         """
         if image_data is not None:
-            self._data = image_data.copy()
+            self._data = _read_only(self._copy_array(image_data) if copy else image_data)
         elif file_path is not None:
-            self._data = self._load_from_file(file_path)
+            self._data = _read_only(self._load_from_file(file_path))
         else:
             raise ValueError("Phải cung cấp image_data hoặc file_path")
         
         self._metadata = self._extract_metadata()
     
+    @staticmethod
+    def _copy_array(array: np.ndarray) -> np.ndarray:
+        COPY_COUNTER.add(array.nbytes)
+        return array.copy()
+    
     @property
     def data(self) -> np.ndarray:
-        """Trả về dữ liệu ảnh"""
-        return self._data.copy()
+        """Trả về dữ liệu ảnh (view chỉ đọc, không chép)"""
+        return self._data
+    
+    def writable_data(self) -> np.ndarray:
+        """Trả về bản sao ghi được của dữ liệu ảnh"""
+        return self._copy_array(self._data)
     
     @property
     def metadata(self) -> ImageMetadata:
@@ -122,12 +179,29 @@ class Image:
             return Image(image_data=self._data.astype(np.float32))
         return self
     
+    # Phần mở rộng tương ứng của các định dạng encode được hỗ trợ
+    ENCODE_EXTENSIONS = {'jpeg': '.jpg', 'png': '.png'}
+    
+    def encode_to_buffer(self, image_format: str = 'jpeg', quality: int = 95) -> np.ndarray:
+        """
+        Encode ảnh, trả về buffer uint8 của OpenCV (không chép sang bytes)
+        
+        Args:
+            image_format: 'jpeg' hoặc 'png'
+            quality: Chất lượng JPEG (bỏ qua với PNG)
+        """
+        if image_format not in self.ENCODE_EXTENSIONS:
+            raise ValueError(f"Định dạng encode '{image_format}' không được hỗ trợ")
+        
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality] if image_format == 'jpeg' else []
+        success, buffer = cv2.imencode(self.ENCODE_EXTENSIONS[image_format], self._data, params)
+        if not success:
+            raise ValueError(f"Không thể encode ảnh thành {image_format.upper()}")
+        return buffer
+    
     def encode_to_jpeg(self, quality: int = 95) -> bytes:
         """Encode ảnh thành JPEG bytes"""
-        success, buffer = cv2.imencode('.jpg', self._data, [cv2.IMWRITE_JPEG_QUALITY, quality])
-        if not success:
-            raise ValueError("Không thể encode ảnh thành JPEG")
-        return buffer.tobytes()
+        return self.encode_to_buffer('jpeg', quality).tobytes()
     
     def encode_to_base64(self, quality: int = 95) -> str:
         """Encode ảnh thành base64 string"""
@@ -136,8 +210,11 @@ class Image:
         return base64.b64encode(jpeg_bytes).decode('utf-8')
     
     def copy(self) -> 'Image':
-        """Tạo bản sao của ảnh"""
-        return Image(image_data=self._data.copy())
+        """
+        Tạo bản sao của ảnh: dùng chung buffer chỉ đọc, dữ liệu chỉ bị chép
+        khi gọi writable_data
+        """
+        return Image(image_data=self._data)
     
     def __str__(self) -> str:
         return f"Image(shape={self.shape}, dtype={self.dtype})"
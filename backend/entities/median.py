@@ -0,0 +1,228 @@
+"""
+Các thuật toán lọc trung vị nhanh cho MedianFilter
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Kernel size nhỏ nhất dùng histogram median (xem benchmarks/bench_median.py)
+HISTOGRAM_MEDIAN_MIN_KERNEL = 5
+
+# Số byte mỗi mặt phẳng (plane) khi chạy sorting network theo dải, đủ nhỏ
+# để các plane đang sống của một dải nằm gọn trong cache
+SORTING_NETWORK_BAND_BYTES = 1 << 16
+
+# Mạng so sánh chọn trung vị (Devillard, "Fast median search"): mỗi cặp (a, b)
+# đặt min vào a và max vào b; trung vị nằm ở phần tử giữa. Tính đúng đã được
+# kiểm tra đầy đủ bằng nguyên lý 0-1.
+_MEDIAN_NETWORKS: Dict[int, List[Tuple[int, int]]] = {
+    3: [
+        (1, 2), (4, 5), (7, 8), (0, 1), (3, 4), (6, 7), (1, 2), (4, 5), (7, 8),
+        (0, 3), (5, 8), (4, 7), (3, 6), (1, 4), (2, 5), (4, 7), (4, 2), (6, 4),
+        (4, 2),
+    ],
+    5: [
+        (0, 1), (3, 4), (2, 4), (2, 3), (6, 7), (5, 7), (5, 6), (9, 10),
+        (8, 10), (8, 9), (12, 13), (11, 13), (11, 12), (15, 16), (14, 16),
+        (14, 15), (18, 19), (17, 19), (17, 18), (21, 22), (20, 22), (20, 21),
+        (23, 24), (2, 5), (3, 6), (0, 6), (0, 3), (4, 7), (1, 7), (1, 4),
+        (11, 14), (8, 14), (8, 11), (12, 15), (9, 15), (9, 12), (13, 16),
+        (10, 16), (10, 13), (20, 23), (17, 23), (17, 20), (21, 24), (18, 24),
+        (18, 21), (19, 22), (8, 17), (9, 18), (0, 18), (0, 9), (10, 19),
+        (1, 19), (1, 10), (11, 20), (2, 20), (2, 11), (12, 21), (3, 21),
+        (3, 12), (13, 22), (4, 22), (4, 13), (14, 23), (5, 23), (5, 14),
+        (15, 24), (6, 24), (6, 15), (7, 16), (7, 19), (13, 21), (15, 23),
+        (7, 13), (7, 15), (1, 9), (3, 11), (5, 17), (11, 17), (9, 17), (4, 10),
+        (6, 12), (7, 14), (4, 6), (4, 7), (12, 14), (10, 14), (6, 7), (10, 12),
+        (6, 10), (6, 17), (12, 17), (7, 17), (7, 10), (12, 18), (7, 12),
+        (10, 18), (12, 20), (10, 20), (10, 12),
+    ],
+}
+
+SORTING_NETWORK_KERNELS = tuple(sorted(_MEDIAN_NETWORKS))
+
+
+def _prune_network(network: List[Tuple[int, int]],
+                   output: int) -> List[Tuple[int, int, bool, bool]]:
+    """
+    Bỏ các phép so sánh không ảnh hưởng tới output
+
+    Returns:
+        Danh sách (a, b, cần_min, cần_max)
+    """
+    needed = {output}
+    operations = []
+    for a, b in reversed(network):
+        need_min, need_max = a in needed, b in needed
+        if need_min or need_max:
+            operations.append((a, b, need_min, need_max))
+            needed.update((a, b))
+    return operations[::-1]
+
+
+_PRUNED_NETWORKS = {
+    k: _prune_network(network, (k * k) // 2) for k, network in _MEDIAN_NETWORKS.items()
+}
+
+
+def sorting_network_median(image: np.ndarray, kernel_size: int,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Lọc trung vị 3x3 / 5x5 bằng mạng so sánh min/max
+
+    Mỗi phần tử của cửa sổ là một plane dịch chuyển (view) của ảnh đã pad, mạng
+    so sánh chạy bằng np.minimum/np.maximum trên cả plane với dtype gốc. Ảnh
+    được xử lý theo dải hàng và các buffer được tái sử dụng, nên không có mảng
+    tạm H x W x k x k. Kết quả giống hệt np.median trên cửa sổ k x k.
+
+    Args:
+        image: Ảnh grayscale 2D
+        kernel_size: 3 hoặc 5
+        out: Buffer kết quả (tùy chọn, được phép trùng với image)
+
+    Returns:
+        Ảnh đã lọc, cùng dtype với ảnh vào
+    """
+    if kernel_size not in _PRUNED_NETWORKS:
+        raise ValueError(f"Không có sorting network cho kernel size {kernel_size}")
+    if image.ndim != 2:
+        raise ValueError("Sorting network median chỉ hỗ trợ ảnh 2D")
+
+    h, w = image.shape
+    k = kernel_size
+    padded = np.pad(image, k // 2, mode='edge')
+    operations = _PRUNED_NETWORKS[k]
+    median_wire = (k * k) // 2
+
+    result = np.empty_like(image) if out is None else out
+    band_rows = max(1, SORTING_NETWORK_BAND_BYTES // max(w * image.itemsize, 1))
+
+    for top in range(0, h, band_rows):
+        bottom = min(h, top + band_rows)
+        # wires[i]: plane của phần tử thứ i trong cửa sổ; owned[i] cho biết
+        # plane là buffer riêng (ghi đè được) hay view chỉ đọc vào ảnh pad
+        wires = [padded[top + dy:bottom + dy, dx:dx + w]
+                 for dy in range(k) for dx in range(k)]
+        owned = [False] * len(wires)
+        free: List[np.ndarray] = []
+
+        def take(a: int, b: int) -> np.ndarray:
+            # Ghi kết quả tại chỗ vào buffer riêng của một đầu vào nếu có
+            if owned[a]:
+                return wires[a]
+            if owned[b]:
+                return wires[b]
+            return free.pop() if free else np.empty((bottom - top, w), dtype=image.dtype)
+
+        for a, b, need_min, need_max in operations:
+            low, high = wires[a], wires[b]
+            if need_min and need_max:
+                new_high = np.maximum(low, high, out=free.pop() if free else None)
+                new_low = np.minimum(low, high, out=take(a, b))
+                if owned[b] and high is not new_low:
+                    free.append(high)
+                wires[a], wires[b] = new_low, new_high
+                owned[a] = owned[b] = True
+            elif need_min:
+                target = take(a, b)
+                wires[a] = np.minimum(low, high, out=target)
+                if owned[b] and high is not target:
+                    free.append(high)
+                owned[a], owned[b] = True, False
+                wires[b] = None
+            else:
+                target = take(b, a)
+                wires[b] = np.maximum(low, high, out=target)
+                if owned[a] and low is not target:
+                    free.append(low)
+                owned[a], owned[b] = False, True
+                wires[a] = None
+
+        result[top:bottom] = wires[median_wire]
+
+    return result
+
+
+def histogram_median(image: np.ndarray, kernel_size: int,
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Lọc trung vị bằng histogram trượt (Huang) cho ảnh uint8
+
+    Ảnh được quét theo cột; histogram của cửa sổ cho mọi hàng output được cập
+    nhật cùng lúc bằng cách bỏ cột bên trái và thêm cột bên phải (O(k) mỗi
+    pixel). Trung vị được tìm qua histogram hai mức (16 bin thô x 16 bin mịn)
+    nên chi phí tìm kiếm không phụ thuộc kernel size. Biên xử lý như
+    np.pad(mode='edge'); kết quả giống hệt np.median trên cửa sổ k x k.
+
+    Args:
+        image: Ảnh grayscale uint8
+        kernel_size: Kích thước kernel (số lẻ)
+        out: Buffer kết quả (tùy chọn, được phép trùng với image)
+
+    Returns:
+        Ảnh uint8 đã lọc
+    """
+    if image.dtype != np.uint8 or image.ndim != 2:
+        raise ValueError("Histogram median chỉ hỗ trợ ảnh grayscale uint8")
+    if kernel_size % 2 == 0:
+        raise ValueError("Kernel size phải là số lẻ!")
+
+    h, w = image.shape
+    k = kernel_size
+    pad = k // 2
+    rank = (k * k) // 2 + 1
+
+    # Quét theo cột ảnh gốc = quét theo hàng ảnh chuyển vị (bộ nhớ liên tục)
+    columns = np.ascontiguousarray(np.pad(image, pad, mode='edge').T)
+
+    # Số đếm tối đa là k²: histogram dùng uint8 khi k² <= 255 (k <= 15), kernel
+    # lớn hơn dùng uint32 để không bị tràn. Histogram của hàng output i nằm ở
+    # fine[(k + i) * 256:...]; view lệch fine_views[a] cho phép dùng trực tiếp
+    # chỉ số của hàng ảnh nguồn i + a mà không cần tính lại.
+    small = k * k <= np.iinfo(np.uint8).max
+    count_dtype, cum_dtype = (np.uint8, np.int16) if small else (np.uint32, np.int32)
+    fine = np.zeros((h + k) * 256, dtype=count_dtype)
+    coarse = np.zeros((h + k) * 16, dtype=count_dtype)
+    fine_views = [fine[(k - a) * 256:] for a in range(k)]
+    coarse_views = [coarse[(k - a) * 16:] for a in range(k)]
+    fine_rows = np.arange(h + 2 * pad, dtype=np.intp) * 256
+    coarse_rows = np.arange(h + 2 * pad, dtype=np.intp) * 16
+
+    def update(column: int, add: bool) -> None:
+        values = columns[column]
+        fine_index = fine_rows + values
+        coarse_index = coarse_rows + (values >> 4)
+        for a in range(k):
+            if add:
+                fine_views[a][fine_index[a:a + h]] += 1
+                coarse_views[a][coarse_index[a:a + h]] += 1
+            else:
+                fine_views[a][fine_index[a:a + h]] -= 1
+                coarse_views[a][coarse_index[a:a + h]] -= 1
+
+    fine_hist = fine[k * 256:].reshape(h, 16, 16)
+    coarse_hist = coarse[k * 16:].reshape(h, 16)
+    rows = np.arange(h)
+    result = np.empty((w, h), dtype=np.uint8)
+
+    for column in range(k):
+        update(column, True)
+
+    for j in range(w):
+        if j:
+            update(j - 1, False)
+            update(j + k - 1, True)
+
+        # Bin thô chứa phần tử thứ rank, rồi bin mịn bên trong nó
+        coarse_cum = np.cumsum(coarse_hist, axis=1, dtype=cum_dtype)
+        coarse_bin = (coarse_cum < rank).sum(axis=1)
+        below = coarse_cum[rows, coarse_bin] - coarse_hist[rows, coarse_bin]
+        fine_cum = np.cumsum(fine_hist[rows, coarse_bin], axis=1, dtype=cum_dtype)
+        fine_bin = (fine_cum < (rank - below)[:, None]).sum(axis=1)
+
+        result[j] = coarse_bin * 16 + fine_bin
+
+    if out is None:
+        return result.T.copy()
+    out[...] = result.T
+    return out
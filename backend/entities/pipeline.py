@@ -0,0 +1,74 @@
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from .image import Image
+from .filters import BaseFilter, FilterParameters, InputRequirements
+
+
+@dataclass
+class PipelineParameters(FilterParameters):
+    """
+    Tham số cho pipeline: danh sách stage theo thứ tự, mỗi stage là
+    {"algorithm": ..., "parameters": {...}}
+    """
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class FilterPipeline(BaseFilter):
+    """
+    Chạy nhiều filter nối tiếp trên cùng một ảnh đã decode
+
+    Kết quả trung gian giữ trong bộ nhớ với dtype gốc, không encode/decode
+    giữa các stage. Stage nào hỗ trợ output_spec ghi kết quả vào buffer do
+    pipeline quản lý; các stage có cùng shape/dtype output dùng chung một
+    buffer (stage sau ghi đè lên kết quả của stage trước), nên chuỗi
+    median -> canny chỉ cấp phát một ảnh kết quả.
+    """
+
+    def __init__(self, parameters: PipelineParameters, stages: List[BaseFilter]):
+        super().__init__(parameters)
+        self.stages = stages
+        self._validate_parameters()
+
+    def _validate_parameters(self):
+        if not self.stages:
+            raise ValueError("Pipeline phải có ít nhất một stage!")
+        if any(isinstance(stage, FilterPipeline) for stage in self.stages):
+            raise ValueError("Pipeline không được lồng nhau!")
+
+    def get_name(self) -> str:
+        return " -> ".join(stage.get_name() for stage in self.stages)
+
+    def get_halo(self) -> int:
+        # Mỗi stage cần thêm halo của chính nó quanh vùng mà stage sau cần
+        return sum(stage.get_halo() for stage in self.stages)
+
+    def get_strip_plan(self):
+        # Chỉ stage cuối được có bước toàn cục; các stage trước phải có halo
+        *head, last = self.stages
+        local_stage, global_pass = last.get_strip_plan()
+        if global_pass is None:
+            return self, None
+        return FilterPipeline(self.parameters, head + [local_stage]), global_pass
+
+    def input_requirements(self) -> InputRequirements:
+        # Chỉ stage đầu đọc ảnh đã decode, các stage sau đọc output của nó
+        return self.stages[0].input_requirements()
+
+    def apply(self, image: Image) -> Image:
+        buffers: Dict[Tuple[Tuple[int, ...], np.dtype], np.ndarray] = {}
+        current = image
+
+        for stage in self.stages:
+            spec = stage.output_spec(current.shape, current.dtype)
+            if spec is None:
+                current = stage.apply(current)
+                continue
+
+            out = buffers.get(spec)
+            if out is None:
+                out = buffers[spec] = np.empty(*spec)
+            current = stage.apply(current, out=out)
+
+        return current
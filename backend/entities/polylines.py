@@ -0,0 +1,175 @@
+"""
+Tách bản đồ cạnh nhị phân (kết quả hysteresis của Canny) thành các chuỗi
+cạnh dạng polyline, có thể rút gọn bằng Douglas–Peucker
+
+Các pixel cạnh là đỉnh của đồ thị 8 láng giềng; cạnh chéo bị bỏ khi hai
+pixel đã nối với nhau qua một láng giềng 4 hướng chung (bậc thang của
+đường biên mảnh không tạo ra điểm rẽ nhánh giả). Mỗi chuỗi đi từ một điểm
+đầu mút hoặc điểm rẽ nhánh (bậc khác 2) tới điểm tiếp theo như vậy; các
+vòng kín không có điểm nào như vậy thành chuỗi khép kín (điểm cuối trùng
+điểm đầu). Mỗi cạnh của đồ thị được đi qua đúng một lần.
+"""
+
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, depth_first_order
+
+
+def _edge_graph(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Đồ thị láng giềng của các pixel cạnh
+
+    Returns:
+        Tuple (chỉ số trải phẳng của các pixel cạnh, đầu A, đầu B của mỗi
+        cạnh đồ thị - theo thứ tự trong mảng pixel, bậc của mỗi pixel)
+    """
+    height, width = mask.shape
+    flat = np.flatnonzero(mask)
+    rows, cols = np.divmod(flat, width)
+
+    def neighbour(dr: int, dc: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Tìm láng giềng (dr, dc) trong danh sách pixel đã sắp xếp
+        target = flat + (dr * width + dc)
+        index = np.minimum(np.searchsorted(flat, target), len(flat) - 1)
+        found = ((flat[index] == target) & (rows + dr >= 0) & (rows + dr < height)
+                 & (cols + dc >= 0) & (cols + dc < width))
+        return found, index
+
+    east, east_index = neighbour(0, 1)
+    south, south_index = neighbour(1, 0)
+    west, _ = neighbour(0, -1)
+    south_east, south_east_index = neighbour(1, 1)
+    south_west, south_west_index = neighbour(1, -1)
+    south_east &= ~(east | south)
+    south_west &= ~(west | south)
+
+    links_a, links_b = [], []
+    for found, index in ((east, east_index), (south, south_index),
+                         (south_east, south_east_index), (south_west, south_west_index)):
+        links_a.append(np.flatnonzero(found))
+        links_b.append(index[found])
+    links_a = np.concatenate(links_a)
+    links_b = np.concatenate(links_b)
+    degree = np.bincount(links_a, minlength=len(flat)) + np.bincount(links_b, minlength=len(flat))
+    return flat, links_a, links_b, degree
+
+
+def trace_edges(mask: np.ndarray) -> List[np.ndarray]:
+    """
+    Tách các chuỗi cạnh của ảnh nhị phân (khác 0 là cạnh)
+
+    Mỗi điểm rẽ nhánh được tách thành một bản sao cho mỗi cạnh nối vào nó,
+    nên đồ thị còn lại chỉ gồm đường đi và vòng kín (mọi đỉnh bậc không quá
+    2). Các đỉnh ảo được nối tới một đầu của mỗi đường đi (vòng kín bị cắt
+    tại một cạnh), rồi một lần duyệt theo chiều sâu (DFS, tuyến tính theo
+    số pixel cạnh) đi hết từng chuỗi theo thứ tự.
+
+    Returns:
+        Danh sách mảng int32 (n, 2) tọa độ (x, y) theo thứ tự dọc chuỗi;
+        pixel đứng riêng là chuỗi một điểm
+    """
+    if mask.ndim != 2:
+        raise ValueError("Chỉ tách chuỗi cạnh trên ảnh 2 chiều")
+    flat, links_a, links_b, degree = _edge_graph(mask)
+    count = len(flat)
+    if count == 0:
+        return []
+
+    # Đỉnh 0..count-1 là pixel; mỗi đầu cạnh nối vào điểm rẽ nhánh (bậc >= 3)
+    # được thay bằng một đỉnh mới là bản sao của điểm đó
+    junction = degree >= 3
+    pixel_of = [np.arange(count)]
+    vertex_count = count
+    for links in (links_a, links_b):
+        copies = np.flatnonzero(junction[links])
+        pixel_of.append(links[copies])
+        links[copies] = vertex_count + np.arange(len(copies))
+        vertex_count += len(copies)
+    pixel_of = np.concatenate(pixel_of)
+    vertex_degree = (np.bincount(links_a, minlength=vertex_count)
+                     + np.bincount(links_b, minlength=vertex_count))
+
+    # Mỗi thành phần liên thông bắt đầu ở đỉnh có bậc nhỏ nhất: đầu mút của
+    # đường đi, pixel đứng riêng, hoặc một đỉnh bất kỳ của vòng kín
+    used = np.ones(vertex_count, dtype=bool)
+    used[:count] = ~junction
+    graph = coo_matrix((np.ones(len(links_a), dtype=np.int8), (links_a, links_b)),
+                       shape=(vertex_count, vertex_count)).tocsr()
+    _, labels = connected_components(graph, directed=False)
+    vertices = np.flatnonzero(used)
+    vertices = vertices[np.lexsort((vertices, vertex_degree[vertices], labels[vertices]))]
+    _, first = np.unique(labels[vertices], return_index=True)
+    starts = vertices[first]
+
+    # Cắt mỗi vòng kín tại một cạnh của đỉnh bắt đầu. Cạnh luôn nối tới pixel
+    # đứng sau (xem _edge_graph) nên đỉnh có id nhỏ nhất của vòng là đầu A
+    # của cả hai cạnh của nó
+    cycle_starts = starts[vertex_degree[starts] == 2]
+    is_cycle_start = np.zeros(vertex_count, dtype=bool)
+    is_cycle_start[cycle_starts] = True
+    incident = np.flatnonzero(is_cycle_start[links_a])
+    _, cut = np.unique(links_a[incident], return_index=True)
+    keep = np.ones(len(links_a), dtype=bool)
+    keep[incident[cut]] = False
+
+    # Gốc ảo là một dãy đỉnh nối nhau, đỉnh thứ i nối tới đầu chuỗi thứ i: DFS
+    # của scipy duyệt lại danh sách kề mỗi lần quay về một đỉnh, nên một gốc
+    # nối tới mọi chuỗi sẽ tốn thời gian bình phương theo số chuỗi
+    spine = vertex_count + np.arange(len(starts))
+    total = vertex_count + len(starts)
+    tree = coo_matrix((np.ones(int(keep.sum()) + 2 * len(starts) - 1, dtype=np.int8),
+                       (np.concatenate([links_a[keep], spine, spine[:-1]]),
+                        np.concatenate([links_b[keep], starts, spine[1:]]))),
+                      shape=(total, total)).tocsr()
+    order, predecessors = depth_first_order(tree, spine[0], directed=False,
+                                            return_predecessors=True)
+    order = order[order < vertex_count]
+    boundaries = np.flatnonzero(predecessors[order] >= vertex_count)
+
+    rows, cols = np.divmod(flat, mask.shape[1])
+    points = np.stack([cols, rows], axis=1).astype(np.int32)[pixel_of[order]]
+    bounds = np.append(boundaries, len(order)).tolist()
+    chains = [points[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    # Khép các vòng kín: thêm lại điểm đầu vào cuối chuỗi
+    for index in np.flatnonzero(is_cycle_start[order[boundaries]]).tolist():
+        chains[index] = np.concatenate([chains[index], chains[index][:1]])
+    return chains
+
+
+def simplify_polylines(chains: List[np.ndarray], tolerance: float) -> List[np.ndarray]:
+    """
+    Rút gọn từng chuỗi bằng Douglas–Peucker (cv2.approxPolyDP)
+
+    Args:
+        chains: Kết quả của trace_edges
+        tolerance: Khoảng cách lớn nhất (pixel) từ điểm bị bỏ tới polyline;
+            0 chỉ bỏ các điểm nằm thẳng hàng
+
+    Returns:
+        Danh sách mảng int32 (k, 2); hai đầu mỗi chuỗi luôn được giữ
+    """
+    if tolerance < 0:
+        raise ValueError("tolerance phải không âm")
+    return [_simplify(chain, tolerance) if len(chain) > 2 else chain for chain in chains]
+
+
+def _simplify(chain: np.ndarray, tolerance: float) -> np.ndarray:
+    if not np.array_equal(chain[0], chain[-1]):
+        return cv2.approxPolyDP(chain.reshape(-1, 1, 2), tolerance, False).reshape(-1, 2)
+    # Chuỗi khép kín: rút gọn như đa giác rồi khép lại
+    polygon = cv2.approxPolyDP(chain[:-1].reshape(-1, 1, 2), tolerance, True).reshape(-1, 2)
+    return np.concatenate([polygon, polygon[:1]])
+
+
+def rasterize_polylines(polylines: List[np.ndarray], shape: Tuple[int, int]) -> np.ndarray:
+    """Vẽ lại các polyline (độ dày 1, 8 láng giềng) thành ảnh 0/255"""
+    image = np.zeros(shape, dtype=np.uint8)
+    for polyline in polylines:
+        if len(polyline) == 1:
+            image[polyline[0, 1], polyline[0, 0]] = 255
+        else:
+            cv2.polylines(image, [polyline.reshape(-1, 1, 2)], False, 255, 1, cv2.LINE_8)
+    return image
@@ -0,0 +1,140 @@
+"""
+Chọn cách decode ảnh theo nhu cầu của filter: decode thẳng sang grayscale
+khi filter chỉ đọc grayscale, và decode thu nhỏ (IMREAD_REDUCED_*) với JPEG
+khi chỉ cần độ phân giải thấp (chế độ preview)
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+
+from entities.filters import InputRequirements
+from .preview import pyramid_level
+
+# Tỉ lệ thu nhỏ mà cv2.imdecode hỗ trợ -> (flag ảnh màu, flag grayscale)
+REDUCED_FLAGS = {
+    1: (cv2.IMREAD_COLOR, cv2.IMREAD_GRAYSCALE),
+    2: (cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    4: (cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    8: (cv2.IMREAD_REDUCED_COLOR_8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+}
+
+# Marker SOF (start of frame) của JPEG, chứa kích thước ảnh
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Số kênh của ảnh PNG theo color type trong IHDR (palette được decode thành màu)
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+# Số kênh của ảnh màu khi decode bằng cv2.IMREAD_COLOR
+COLOR_CHANNELS = 3
+
+
+@dataclass
+class ImageHeader:
+    """Định dạng, kích thước và số kênh ảnh đọc từ header, chưa decode"""
+    format: str
+    width: int
+    height: int
+    channels: Optional[int] = None
+
+
+@dataclass
+class DecodePlan:
+    """Cách decode: grayscale hay màu, và tỉ lệ thu nhỏ (1, 2, 4 hoặc 8)"""
+    grayscale: bool = False
+    reduction: int = 1
+
+    @property
+    def flags(self) -> int:
+        """Flag cho cv2.imdecode"""
+        return REDUCED_FLAGS[self.reduction][1 if self.grayscale else 0]
+
+    def original_size(self, header: Optional[ImageHeader],
+                      decoded_shape: Tuple[int, ...]) -> Tuple[int, int]:
+        """
+        (width, height) của ảnh gốc: lấy từ header khi ảnh bị decode thu
+        nhỏ (tính cả trường hợp EXIF xoay ảnh 90 độ)
+        """
+        height, width = decoded_shape[:2]
+        if self.reduction == 1 or header is None:
+            return width, height
+        if math.ceil(header.height / self.reduction) == height:
+            return header.width, header.height
+        return header.height, header.width
+
+    def original_channels(self, header: Optional[ImageHeader], decoded_channels: int) -> int:
+        """
+        Số kênh của ảnh gốc: khi decode grayscale lấy từ header (JPEG/PNG),
+        định dạng khác coi như ảnh màu như khi decode IMREAD_COLOR
+        """
+        if not self.grayscale:
+            return decoded_channels
+        if header is not None and header.channels is not None:
+            return header.channels
+        return COLOR_CHANNELS
+
+
+def read_header(file_data: bytes) -> Optional[ImageHeader]:
+    """
+    Đọc kích thước và số kênh ảnh JPEG/PNG từ header mà không decode
+
+    Returns:
+        ImageHeader, hoặc None với định dạng khác hoặc header hỏng
+    """
+    if file_data[:8] == _PNG_SIGNATURE and file_data[12:16] == b'IHDR':
+        if len(file_data) < 26:
+            return None
+        return ImageHeader('png', int.from_bytes(file_data[16:20], 'big'),
+                           int.from_bytes(file_data[20:24], 'big'),
+                           _PNG_CHANNELS.get(file_data[25]))
+
+    if file_data[:2] != b'\xff\xd8':
+        return None
+    position = 2
+    while position + 4 <= len(file_data):
+        if file_data[position] != 0xFF:
+            return None
+        marker = file_data[position + 1]
+        if marker == 0xFF:
+            # Byte đệm trước marker
+            position += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Marker không có độ dài
+            position += 2
+            continue
+        length = int.from_bytes(file_data[position + 2:position + 4], 'big')
+        if marker in _JPEG_SOF_MARKERS:
+            if position + 10 > len(file_data):
+                return None
+            height = int.from_bytes(file_data[position + 5:position + 7], 'big')
+            width = int.from_bytes(file_data[position + 7:position + 9], 'big')
+            return ImageHeader('jpeg', width, height, file_data[position + 9])
+        position += 2 + length
+    return None
+
+
+def plan_decode(requirements: InputRequirements, header: Optional[ImageHeader],
+                max_dimension: Optional[int] = None) -> DecodePlan:
+    """
+    Chọn cách decode cho filter
+
+    Args:
+        requirements: Ảnh vào filter cần (BaseFilter.input_requirements)
+        header: Header của ảnh (read_header), None nếu không đọc được
+        max_dimension: Cạnh dài cần dùng tới (ví dụ preview_size), None nếu
+            cần độ phân giải đầy đủ
+
+    Returns:
+        DecodePlan. Chỉ thu nhỏ khi decode JPEG (libjpeg thu nhỏ ngay trong
+        bước IDCT); tỉ lệ thu nhỏ không vượt quá tầng pyramid của preview
+        nên ảnh decode vẫn có cạnh dài không nhỏ hơn max_dimension.
+    """
+    targets = [d for d in (requirements.max_dimension, max_dimension) if d is not None]
+    reduction = 1
+    if targets and header is not None and header.format == 'jpeg':
+        level = pyramid_level((header.height, header.width), min(targets))
+        reduction = min(1 << level, max(REDUCED_FLAGS))
+    return DecodePlan(grayscale=requirements.grayscale, reduction=reduction)
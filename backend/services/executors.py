@@ -0,0 +1,194 @@
+import multiprocessing
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+from entities.image import Image
+from entities.filters import BaseFilter
+from utils.constants import (
+    EXECUTOR_BACKEND, PROCESS_POOL_SIZE, PROCESS_POOL_MAX_TASKS_PER_CHILD, PROCESS_POOL_MAX_RETRIES,
+    STAGE_CACHE_MAX_BYTES, STAGE_CACHE_MIN_WORKER_BYTES
+)
+from utils.stage_cache import STAGE_CACHE
+
+
+class InlineExecutor:
+    """
+    Chạy filter ngay trong process hiện tại
+    """
+
+    def run(self, filter_instance: BaseFilter, image: Image) -> Image:
+        """Áp dụng filter lên ảnh"""
+        return filter_instance.apply(image)
+
+    def shutdown(self) -> None:
+        """Không có tài nguyên cần giải phóng"""
+        pass
+
+
+def _copy_to_shared_memory(array: np.ndarray) -> shared_memory.SharedMemory:
+    """Tạo shared memory và chép mảng vào đó"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm
+
+
+def worker_stage_cache_bytes(max_workers: int) -> int:
+    """
+    Ngân sách STAGE_CACHE của mỗi worker: chia đều STAGE_CACHE_MAX_BYTES
+    nhưng không nhỏ hơn STAGE_CACHE_MIN_WORKER_BYTES, để magnitude của ảnh
+    4K vẫn vừa cache (0 nếu cache bị tắt)
+    """
+    if STAGE_CACHE_MAX_BYTES <= 0:
+        return 0
+    share = STAGE_CACHE_MAX_BYTES // max(max_workers, 1)
+    return min(STAGE_CACHE_MAX_BYTES, max(share, STAGE_CACHE_MIN_WORKER_BYTES))
+
+
+def _init_worker(stage_cache_bytes: int) -> None:
+    """Khởi tạo worker process: đặt ngân sách STAGE_CACHE của worker"""
+    STAGE_CACHE.lru.max_bytes = stage_cache_bytes
+
+
+def _run_filter_in_worker(filter_instance: BaseFilter, name: str, shape: Tuple[int, ...],
+                          dtype: str) -> Tuple[str, Tuple[int, ...], str]:
+    """
+    Hàm chạy trong worker process: đọc ảnh từ shared memory, áp dụng filter
+    và ghi kết quả vào một shared memory mới
+
+    Returns:
+        Tuple (tên shared memory kết quả, shape, dtype)
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    data = None
+    try:
+        data = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        result = filter_instance.apply(Image(image_data=data)).data
+    finally:
+        # Bỏ view vào shm.buf trước khi close; nếu traceback của một lỗi vẫn
+        # giữ view thì segment được đóng khi worker thoát
+        del data
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+    out = _copy_to_shared_memory(result)
+    out_name = out.name
+    out.close()
+    return out_name, result.shape, result.dtype.str
+
+
+class ProcessPoolFilterExecutor:
+    """
+    Chạy filter.apply trên pool các worker process để dùng được nhiều core.
+
+    Ảnh vào và ảnh kết quả được truyền qua multiprocessing.shared_memory, chỉ
+    tên segment, shape và dtype đi qua pickle. Worker dùng chung resource
+    tracker với process cha nên segment nào cũng chỉ được unlink một lần bởi
+    process cha. Worker được thay mới sau
+    max_tasks_per_child task; nếu một worker bị crash, pool được tạo lại và
+    task được thử lại tối đa max_retries lần.
+
+    Mỗi worker có STAGE_CACHE riêng với ngân sách
+    STAGE_CACHE_MAX_BYTES / max_workers, không nhỏ hơn
+    STAGE_CACHE_MIN_WORKER_BYTES (xem worker_stage_cache_bytes).
+    """
+
+    def __init__(self, max_workers: int = PROCESS_POOL_SIZE,
+                 max_tasks_per_child: Optional[int] = PROCESS_POOL_MAX_TASKS_PER_CHILD,
+                 max_retries: int = PROCESS_POOL_MAX_RETRIES):
+        """
+        Args:
+            max_workers: Số worker process
+            max_tasks_per_child: Số task trước khi một worker được thay mới
+                (None để không giới hạn)
+            max_retries: Số lần thử lại khi worker bị crash
+        """
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_retries = max_retries
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    max_tasks_per_child=self.max_tasks_per_child,
+                    initializer=_init_worker,
+                    initargs=(worker_stage_cache_bytes(self.max_workers),)
+                )
+            return self._pool
+
+    def _reset_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            # Một thread khác có thể đã tạo lại pool
+            if self._pool is broken:
+                self._pool = None
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, filter_instance: BaseFilter, image: Image) -> Image:
+        """
+        Áp dụng filter lên ảnh trong một worker process
+
+        Raises:
+            RuntimeError: Nếu worker vẫn crash sau max_retries lần thử lại
+        """
+        data = image.data
+        shm = _copy_to_shared_memory(data)
+        try:
+            for _ in range(self.max_retries + 1):
+                pool = self._get_pool()
+                try:
+                    future = pool.submit(_run_filter_in_worker, filter_instance,
+                                         shm.name, data.shape, data.dtype.str)
+                    out_name, shape, dtype = future.result()
+                    break
+                except BrokenProcessPool:
+                    self._reset_pool(pool)
+            else:
+                raise RuntimeError("Worker process bị dừng bất thường khi xử lý ảnh")
+        finally:
+            shm.close()
+            shm.unlink()
+
+        out = shared_memory.SharedMemory(name=out_name)
+        try:
+            result = Image(image_data=np.ndarray(shape, dtype=np.dtype(dtype), buffer=out.buf),
+                           copy=True)
+        finally:
+            out.close()
+            out.unlink()
+
+        return result
+
+    def shutdown(self) -> None:
+        """Dừng pool và các worker process"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def create_executor(backend: str = EXECUTOR_BACKEND):
+    """
+    Tạo executor theo cấu hình
+
+    Args:
+        backend: 'inline' hoặc 'process'
+
+    Returns:
+        InlineExecutor hoặc ProcessPoolFilterExecutor
+    """
+    if backend == 'inline':
+        return InlineExecutor()
+    if backend == 'process':
+        return ProcessPoolFilterExecutor()
+    raise ValueError(f"Executor backend '{backend}' không được hỗ trợ")
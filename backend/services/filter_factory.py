@@ -1,5 +1,16 @@
-from typing import Dict, Any
-from entities.filters import BaseFilter, CannyEdgeDetector, MedianFilter, CannyParameters, MedianParameters
+from dataclasses import asdict, fields
+from typing import Dict, Any, List, Tuple
+from entities.filters import (
+    BaseFilter, FilterParameters, CannyEdgeDetector, MedianFilter, CannyParameters, MedianParameters
+)
+from entities.backends import (
+    BACKENDS, OpenCVCannyEdgeDetector, SciPyCannyEdgeDetector, OpenCVMedianFilter, SciPyMedianFilter
+)
+from entities.pipeline import FilterPipeline, PipelineParameters
+from utils.constants import DEFAULT_FILTER_BACKEND, PARAMETER_LIMITS
+
+# Key trong parameters để chọn backend tính toán cho một request
+BACKEND_PARAMETER = 'backend'
 
 
 class FilterFactory:
@@ -10,6 +21,19 @@ class FilterFactory:
     _filter_registry = {
         'canny': CannyEdgeDetector,
         'median': MedianFilter,
+        'pipeline': FilterPipeline,
+    }
+    
+    # Implementation theo backend; backend 'numpy' là class trong _filter_registry
+    _backend_registry = {
+        'canny': {
+            'opencv': OpenCVCannyEdgeDetector,
+            'scipy': SciPyCannyEdgeDetector,
+        },
+        'median': {
+            'opencv': OpenCVMedianFilter,
+            'scipy': SciPyMedianFilter,
+        },
     }
     
     @classmethod
@@ -18,8 +42,11 @@ class FilterFactory:
         Tạo filter instance dựa trên type và parameters
         
         Args:
-            filter_type: Loại filter ('canny', 'median')
-            parameters: Dictionary chứa các tham số
+            filter_type: Loại filter ('canny', 'median', 'pipeline')
+            parameters: Dictionary chứa các tham số, có thể kèm 'backend'
+                ('numpy', 'opencv', 'scipy'; mặc định DEFAULT_FILTER_BACKEND).
+                Backend của pipeline là mặc định cho các stage không chọn
+                backend riêng.
             
         Returns:
             BaseFilter instance
@@ -27,17 +54,144 @@ class FilterFactory:
         if filter_type not in cls._filter_registry:
             raise ValueError(f"Filter type '{filter_type}' không được hỗ trợ")
         
-        filter_class = cls._filter_registry[filter_type]
+        backend, parameters = cls._split_backend(filter_type, parameters)
+        params = cls.create_parameters(filter_type, parameters)
+        
+        if filter_type == 'pipeline':
+            stages = [
+                cls.create_filter(stage['algorithm'], cls._stage_parameters(stage, backend))
+                for stage in params.stages
+            ]
+            return cls._filter_registry[filter_type](params, stages)
+        
+        if backend == 'numpy':
+            return cls._filter_registry[filter_type](params)
+        return cls._backend_registry[filter_type][backend](params)
+    
+    @classmethod
+    def get_backends(cls, filter_type: str) -> List[str]:
+        """
+        Trả về các backend dùng được cho filter type
         
-        # Tạo parameters object tương ứng
+        Args:
+            filter_type: Loại filter
+            
+        Returns:
+            Danh sách tên backend theo thứ tự của BACKENDS
+        """
+        if filter_type not in cls._filter_registry:
+            raise ValueError(f"Filter type '{filter_type}' không được hỗ trợ")
+        if filter_type == 'pipeline':
+            # Mỗi stage chọn backend riêng
+            return list(BACKENDS)
+        available = cls._backend_registry.get(filter_type, {})
+        return [backend for backend in BACKENDS if backend == 'numpy' or backend in available]
+    
+    @classmethod
+    def _split_backend(cls, filter_type: str, parameters: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Tách backend khỏi parameters, kiểm tra backend có sẵn cho filter"""
+        parameters = dict(parameters)
+        backend = parameters.pop(BACKEND_PARAMETER, None) or DEFAULT_FILTER_BACKEND
+        if backend not in cls.get_backends(filter_type):
+            raise ValueError(f"Backend '{backend}' không hỗ trợ filter '{filter_type}'")
+        return backend, parameters
+    
+    @staticmethod
+    def _stage_parameters(stage: Dict[str, Any], backend: str) -> Dict[str, Any]:
+        """Tham số của một stage pipeline, kế thừa backend của pipeline"""
+        parameters = dict(stage.get('parameters', {}))
+        parameters.setdefault(BACKEND_PARAMETER, backend)
+        return parameters
+    
+    @classmethod
+    def create_parameters(cls, filter_type: str, parameters: Dict[str, Any]) -> FilterParameters:
+        """
+        Tạo parameters object tương ứng với filter type
+        
+        Args:
+            filter_type: Loại filter
+            parameters: Dictionary chứa các tham số
+            
+        Returns:
+            FilterParameters instance
+        """
         if filter_type == 'canny':
-            params = CannyParameters(**parameters)
+            return CannyParameters(**parameters)
         elif filter_type == 'median':
-            params = MedianParameters(**parameters)
-        else:
-            raise ValueError(f"Không thể tạo parameters cho filter type '{filter_type}'")
+            return MedianParameters(**parameters)
+        elif filter_type == 'pipeline':
+            return PipelineParameters(**parameters)
+        
+        raise ValueError(f"Không thể tạo parameters cho filter type '{filter_type}'")
+    
+    @classmethod
+    def normalize_parameters(cls, filter_type: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Chuẩn hóa tham số: điền giá trị mặc định (kể cả backend) và ép kiểu
+        theo khai báo của parameters dataclass, để các request tương đương
+        cho cùng kết quả
+        
+        Args:
+            filter_type: Loại filter
+            parameters: Dictionary chứa các tham số
+            
+        Returns:
+            Dictionary tham số đầy đủ đã chuẩn hóa
+        """
+        backend, parameters = cls._split_backend(filter_type, parameters)
         
-        return filter_class(params)
+        if filter_type == 'pipeline':
+            # Backend của pipeline được gộp vào từng stage
+            stages = cls.create_parameters(filter_type, parameters).stages
+            return {'stages': [
+                {
+                    'algorithm': stage['algorithm'],
+                    'parameters': cls.normalize_parameters(
+                        stage['algorithm'], cls._stage_parameters(stage, backend)
+                    )
+                }
+                for stage in stages
+            ]}
+        
+        params = cls.create_parameters(filter_type, parameters)
+        types = {field.name: field.type for field in fields(params)}
+        normalized = {name: types[name](value) for name, value in asdict(params).items()}
+        normalized[BACKEND_PARAMETER] = backend
+        return normalized
+    
+    @classmethod
+    def scale_parameters(cls, filter_type: str, parameters: Dict[str, Any], scale: float) -> Dict[str, Any]:
+        """
+        Đổi các tham số tính theo pixel (sigma, kernel_size) cho ảnh đã thu
+        nhỏ theo tỉ lệ scale, để kết quả trên ảnh nhỏ tương ứng với ảnh gốc
+        
+        Args:
+            filter_type: Loại filter
+            parameters: Dictionary chứa các tham số
+            scale: Tỉ lệ kích thước ảnh mới / ảnh gốc
+            
+        Returns:
+            Dictionary tham số mới (kernel_size vẫn lẻ, không nhỏ hơn 3)
+        """
+        if filter_type == 'pipeline':
+            scaled = dict(parameters)
+            scaled['stages'] = [
+                dict(stage, parameters=cls.scale_parameters(
+                    stage['algorithm'], stage.get('parameters', {}), scale
+                ))
+                for stage in parameters.get('stages', [])
+            ]
+            return scaled
+        
+        defaults = cls.get_default_parameters(filter_type)
+        scaled = dict(parameters)
+        if 'kernel_size' in defaults:
+            kernel_size = max(3, int(round(scaled.get('kernel_size', defaults['kernel_size']) * scale)))
+            scaled['kernel_size'] = kernel_size if kernel_size % 2 else kernel_size + 1
+        if 'sigma' in defaults:
+            sigma = float(scaled.get('sigma', defaults['sigma'])) * scale
+            scaled['sigma'] = max(sigma, PARAMETER_LIMITS[filter_type]['sigma']['min'])
+        return scaled
     
     @classmethod
     def get_supported_filters(cls) -> Dict[str, str]:
@@ -49,7 +203,8 @@ class FilterFactory:
         """
         return {
             'canny': 'Phát hiện biên (Canny) - Thủ công',
-            'median': 'Lọc trung vị (Median Filter)'
+            'median': 'Lọc trung vị (Median Filter)',
+            'pipeline': 'Chuỗi nhiều filter trong một request (Pipeline)'
         }
     
     @classmethod
@@ -72,6 +227,9 @@ class FilterFactory:
             },
             'median': {
                 'kernel_size': 3
+            },
+            'pipeline': {
+                'stages': []
             }
         }
         
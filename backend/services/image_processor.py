@@ -1,9 +1,36 @@
+import base64
+import dataclasses
+import json
+import time
 import cv2
 import numpy as np
-from typing import Dict, Any, Optional
-from entities.image import Image
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple, Union
+from entities.image import Image, ImageMetadata
 from entities.filters import BaseFilter
+from entities.edge_encoding import EDGE_FORMATS, encode_edges, is_binary_mask
+from entities.polylines import simplify_polylines, trace_edges
 from .filter_factory import FilterFactory
+from .strip_executor import StripExecutor
+from .result_cache import ResultCache
+from .executors import create_executor
+from .image_store import ImageStore, StoredImage
+from .preview import build_preview
+from .decode_planner import DecodePlan, ImageHeader, plan_decode, read_header
+from .multiframe import Frame, detect_container, encode_container, iter_frames
+from .tiled_tiff import TiledTiffReader, TiledTiffWriter, is_tiff_path
+from utils.metrics import METRICS
+from utils.constants import (
+    RESULT_CACHE_MAX_BYTES, RESULT_CACHE_DIR, RESULT_CACHE_DISK_MAX_BYTES, BATCH_MAX_WORKERS,
+    IMAGE_STORE_DIR, IMAGE_STORE_MAX_BYTES, IMAGE_STORE_TTL, DECODE_PLANNING,
+    OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT, DEFAULT_POLYLINE_TOLERANCE,
+    MULTIFRAME_MAX_FRAMES, MULTIFRAME_PREFETCH, MULTIFRAME_WORKERS
+)
+
+# Ảnh đầu vào: file ảnh chưa decode (bytes, hoặc memoryview của upload thô)
+# hoặc ảnh đã lưu trong ImageStore
+ImageSource = Union[bytes, memoryview, StoredImage]
 
 
 class ImageProcessor:
@@ -11,65 +38,488 @@ class ImageProcessor:
     Service class để xử lý ảnh với các filter khác nhau
     """
     
-    def __init__(self):
+    def __init__(self, result_cache: Optional[ResultCache] = None, executor=None,
+                 image_store: Optional[ImageStore] = None):
+        """
+        Args:
+            result_cache: Cache kết quả (mặc định tạo theo utils.constants)
+            executor: Executor chạy filter (InlineExecutor,
+                ProcessPoolFilterExecutor; mặc định theo EXECUTOR_BACKEND)
+            image_store: Kho ảnh đã decode (mặc định tạo theo utils.constants)
+        """
         self.filter_factory = FilterFactory()
+        self.executor = executor if executor is not None else create_executor()
+        
+        if result_cache is None:
+            result_cache = ResultCache(
+                RESULT_CACHE_MAX_BYTES, RESULT_CACHE_DIR, RESULT_CACHE_DISK_MAX_BYTES
+            )
+        self.result_cache = result_cache
+        
+        if image_store is None:
+            image_store = ImageStore(IMAGE_STORE_DIR, IMAGE_STORE_MAX_BYTES, IMAGE_STORE_TTL)
+        self.image_store = image_store
+        self._batch_executor: Optional[ThreadPoolExecutor] = None
+        self._frame_executor: Optional[ThreadPoolExecutor] = None
     
-    def process_image_from_file(self, file_data: bytes, algorithm: str, 
-                              parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def process_image_from_file(self, file_data: ImageSource, algorithm: str, 
+                              parameters: Optional[Dict[str, Any]] = None,
+                              progress_callback: Optional[Callable[[str, float], None]] = None,
+                              preview_size: Optional[int] = None,
+                              output_format: str = DEFAULT_OUTPUT_FORMAT,
+                              polyline_tolerance: float = DEFAULT_POLYLINE_TOLERANCE
+                              ) -> Dict[str, Any]:
         """
         Xử lý ảnh từ file data
         
         Args:
-            file_data: Dữ liệu file ảnh
+            file_data: Dữ liệu file ảnh, hoặc StoredImage trong image_store
+                (bỏ qua bước decode)
             algorithm: Thuật toán xử lý
             parameters: Tham số cho thuật toán
+            progress_callback: Hàm nhận (stage, progress trong [0, 1]) khi
+                chuyển sang mỗi bước xử lý
+            preview_size: Nếu có, xử lý ở chế độ preview trên tầng pyramid
+                có cạnh dài gần preview_size (xem services.preview)
+            output_format: Định dạng của processed_image (OUTPUT_FORMATS);
+                cách giải mã, kích thước và thời gian encode nằm trong
+                trường 'encoding' của kết quả. Với 'polylines', kết quả có
+                trường 'polylines' thay cho processed_image
+            polyline_tolerance: Ngưỡng Douglas–Peucker (pixel) khi rút gọn
+                polyline
             
         Returns:
             Dictionary chứa kết quả xử lý
         """
+        report = self._progress_reporter(progress_callback)
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format phải là một trong {list(OUTPUT_FORMATS)}")
+        
         try:
-            # Tạo Image entity từ file data
-            image = self._create_image_from_bytes(file_data)
-            
             # Lấy tham số mặc định nếu không có
             if parameters is None:
                 parameters = self.filter_factory.get_default_parameters(algorithm)
             
-            # Tạo filter
-            filter_instance = self.filter_factory.create_filter(algorithm, parameters)
+            # Cache hit: bỏ qua decode, filter và encode
+            with METRICS.stage('cache_lookup'):
+                json_format = 'json' if output_format == 'jpeg' else f'json-{output_format}'
+                if output_format == 'polylines':
+                    json_format = f'{json_format}-{float(polyline_tolerance)}'
+                cache_key = self._cache_key(file_data, algorithm, parameters,
+                                            self._output_format(json_format, preview_size))
+                cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                report('done', 1.0)
+                return cached
             
-            # Xử lý ảnh
-            processed_image = filter_instance.apply(image)
-            
-            # Encode kết quả
-            processed_base64 = processed_image.encode_to_base64()
-            
-            # Tạo response data
-            response_data = {
-                'processed_image': processed_base64,
-                'algorithm_used': algorithm,
-                'original_metadata': {
-                    'width': image.metadata.width,
-                    'height': image.metadata.height,
-                    'channels': image.metadata.channels,
-                    'dtype': image.metadata.dtype
-                },
-                'processed_metadata': {
-                    'width': processed_image.metadata.width,
-                    'height': processed_image.metadata.height,
-                    'channels': processed_image.metadata.channels,
-                    'dtype': processed_image.metadata.dtype
-                }
-            }
+            original, processed_image, preview = self._decode_and_filter(
+                file_data, algorithm, parameters, report, preview_size
+            )
+            
+            # Encode kết quả (hoặc tách polyline) rồi thêm metadata
+            report('encoding', 0.9)
+            if output_format == 'polylines':
+                with METRICS.stage('trace'):
+                    response_data = self._trace_result(processed_image, polyline_tolerance)
+            else:
+                with METRICS.stage('encode'):
+                    buffer, encoding = self._encode_result(processed_image, output_format)
+                with METRICS.stage('base64'):
+                    processed_base64 = base64.b64encode(buffer).decode('utf-8')
+                response_data = {'processed_image': processed_base64, 'encoding': encoding}
+            response_data.update(self._build_metadata(algorithm, parameters, original, processed_image))
+            if preview is not None:
+                response_data['preview'] = preview
             
-            # Thêm tham số đã sử dụng
-            response_data.update(parameters)
+            self.result_cache.put(cache_key, response_data)
+            report('done', 1.0)
             
             return response_data
             
         except Exception as e:
             raise ValueError(f"Lỗi xử lý ảnh: {str(e)}")
     
+    def process_image_to_bytes(self, file_data: ImageSource, algorithm: str,
+                               parameters: Optional[Dict[str, Any]] = None,
+                               image_format: str = 'jpeg',
+                               preview_size: Optional[int] = None) -> Tuple[memoryview, Dict[str, Any]]:
+        """
+        Xử lý ảnh từ file data và trả về ảnh đã encode dạng nhị phân (không
+        base64), dùng cho response image/png, image/jpeg
+        
+        Args:
+            file_data: Dữ liệu file ảnh hoặc StoredImage
+            algorithm: Thuật toán xử lý
+            parameters: Tham số cho thuật toán
+            image_format: 'jpeg' hoặc 'png'
+            preview_size: Cạnh dài mục tiêu của chế độ preview (tùy chọn)
+            
+        Returns:
+            Tuple (buffer ảnh đã encode, metadata giống response JSON nhưng
+            không có 'processed_image')
+        """
+        try:
+            if parameters is None:
+                parameters = self.filter_factory.get_default_parameters(algorithm)
+            
+            with METRICS.stage('cache_lookup'):
+                cache_key = self._cache_key(file_data, algorithm, parameters,
+                                            self._output_format(image_format, preview_size))
+                cached = self.result_cache.get_binary(cache_key)
+            if cached is not None:
+                metadata, buffer = cached
+                return buffer, metadata
+            
+            original, processed_image, preview = self._decode_and_filter(
+                file_data, algorithm, parameters, self._progress_reporter(None), preview_size
+            )
+            
+            # Buffer của cv2.imencode được dùng trực tiếp, không chép sang bytes
+            with METRICS.stage('encode'):
+                buffer = processed_image.encode_to_buffer(image_format)
+            metadata = self._build_metadata(algorithm, parameters, original, processed_image)
+            if preview is not None:
+                metadata['preview'] = preview
+            
+            self.result_cache.put_binary(cache_key, metadata, buffer)
+            
+            return memoryview(buffer), metadata
+            
+        except Exception as e:
+            raise ValueError(f"Lỗi xử lý ảnh: {str(e)}")
+    
+    @staticmethod
+    def _encode_result(image: Image, output_format: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Encode ảnh kết quả theo output_format
+        
+        Với 'auto', ảnh nhị phân (bản đồ cạnh 0/255) được encode theo mọi
+        định dạng gọn và PNG rồi chọn payload nhỏ nhất; ảnh khác trả JPEG.
+        
+        Returns:
+            Tuple (buffer uint8, thông tin encode: format, bytes, encode_ms,
+            thông tin giải mã của định dạng gọn và candidates - kích thước
+            và thời gian encode của từng định dạng đã thử)
+        """
+        if output_format != 'auto':
+            candidates = [output_format]
+        elif is_binary_mask(image.data):
+            candidates = list(EDGE_FORMATS) + ['png']
+        else:
+            candidates = ['jpeg']
+        
+        best = None
+        report = {}
+        for candidate in candidates:
+            start = time.perf_counter()
+            if candidate in EDGE_FORMATS:
+                buffer, info = encode_edges(image.data, candidate)
+            else:
+                buffer, info = image.encode_to_buffer(candidate), {'format': candidate}
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            report[candidate] = {'bytes': int(buffer.nbytes), 'encode_ms': round(elapsed_ms, 3)}
+            if best is None or buffer.nbytes < best[0].nbytes:
+                best = (buffer, info)
+        
+        buffer, info = best
+        encoding = dict(info, **report[info['format']])
+        encoding['candidates'] = report
+        return buffer, encoding
+    
+    @staticmethod
+    def _trace_result(image: Image, tolerance: float) -> Dict[str, Any]:
+        """
+        Tách bản đồ cạnh thành các polyline (entities.polylines)
+        
+        Returns:
+            Dict gồm 'polylines' (mỗi polyline là list phẳng [x0, y0, x1,
+            y1, ...]; chuỗi khép kín có điểm cuối trùng điểm đầu) và
+            'encoding' (số polyline, số điểm, kích thước JSON, thời gian)
+        """
+        if not is_binary_mask(image.data):
+            raise ValueError("Định dạng 'polylines' chỉ dùng cho ảnh nhị phân (0/255)")
+        
+        start = time.perf_counter()
+        chains = trace_edges(image.data)
+        traced = time.perf_counter()
+        polylines = [chain.ravel().tolist() for chain in simplify_polylines(chains, tolerance)]
+        simplified = time.perf_counter()
+        
+        encoding = {
+            'format': 'polylines',
+            'shape': list(image.shape[:2]),
+            'tolerance': float(tolerance),
+            'count': len(polylines),
+            'points': sum(len(polyline) for polyline in polylines) // 2,
+            'bytes': len(json.dumps(polylines, separators=(',', ':'))),
+            'trace_ms': round((traced - start) * 1000, 3),
+            'encode_ms': round((simplified - start) * 1000, 3),
+        }
+        return {'polylines': polylines, 'encoding': encoding}
+    
+    @staticmethod
+    def _progress_reporter(progress_callback: Optional[Callable[[str, float], None]]
+                           ) -> Callable[[str, float], None]:
+        """Bọc progress_callback tùy chọn thành hàm luôn gọi được"""
+        def report(stage: str, progress: float) -> None:
+            if progress_callback is not None:
+                progress_callback(stage, progress)
+        return report
+    
+    def _cache_key(self, file_data: ImageSource, algorithm: str, parameters: Dict[str, Any],
+                   output_format: str = 'json') -> str:
+        """Key của cache kết quả cho ảnh, thuật toán và tham số"""
+        if isinstance(file_data, StoredImage):
+            # Ảnh trong kho luôn là ảnh màu đầy đủ, còn file có thể được
+            # decode grayscale/thu nhỏ (decode_planner) nên kết quả có thể
+            # lệch vài mức xám: không dùng chung key
+            file_data = file_data.digest
+            output_format = f'{output_format}@stored'
+        elif DECODE_PLANNING:
+            output_format = f'{output_format}@planned'
+        return self.result_cache.make_key(
+            file_data, algorithm,
+            self.filter_factory.normalize_parameters(algorithm, parameters),
+            output_format
+        )
+    
+    @staticmethod
+    def _output_format(output_format: str, preview_size: Optional[int]) -> str:
+        """Định dạng kết quả trong cache key, phân biệt kết quả preview"""
+        return output_format if preview_size is None else f'{output_format}@preview{preview_size}'
+    
+    def _decode_and_filter(self, file_data: ImageSource, algorithm: str, parameters: Dict[str, Any],
+                           report: Callable[[str, float], None],
+                           preview_size: Optional[int] = None
+                           ) -> Tuple[ImageMetadata, Image, Optional[Dict[str, Any]]]:
+        """
+        Decode ảnh và áp dụng filter
+        
+        Returns:
+            Tuple (metadata ảnh gốc, ảnh đã xử lý, thông tin preview hoặc None)
+        """
+        # Tạo filter trước để decode theo ảnh vào mà filter cần
+        filter_instance = self.filter_factory.create_filter(algorithm, parameters)
+        
+        # Tạo Image entity từ file data; ảnh trong kho đã decode sẵn (memmap)
+        report('decoding', 0.05)
+        if isinstance(file_data, StoredImage):
+            image, plan = file_data.image, DecodePlan()
+            original = image.metadata
+        else:
+            with METRICS.stage('decode'):
+                plan, header = self._plan_decode(file_data, filter_instance, preview_size)
+                image = self._create_image_from_bytes(file_data, plan)
+            width, height = plan.original_size(header, image.shape)
+            channels = plan.original_channels(header, image.metadata.channels)
+            original = dataclasses.replace(image.metadata, width=width, height=height,
+                                           channels=channels)
+        
+        # Preview: thu nhỏ theo pyramid (phần chưa thu nhỏ khi decode) và đổi
+        # tham số theo tỉ lệ
+        source, preview = image, None
+        if preview_size is not None:
+            with METRICS.stage('preview_pyramid'):
+                source, info = build_preview(image, preview_size, plan.reduction)
+            parameters = self.filter_factory.scale_parameters(algorithm, parameters, info.scale)
+            preview = dict(info.to_dict(), parameters=parameters)
+            filter_instance = self.filter_factory.create_filter(algorithm, parameters)
+        
+        # Xử lý ảnh
+        report('filtering', 0.2)
+        with METRICS.stage('filter'):
+            processed_image = self.executor.run(filter_instance, source)
+        
+        return original, processed_image, preview
+    
+    @staticmethod
+    def _plan_decode(file_data: bytes, filter_instance: BaseFilter,
+                     preview_size: Optional[int]) -> Tuple[DecodePlan, Optional[ImageHeader]]:
+        """
+        Cách decode file ảnh cho filter (xem services.decode_planner)
+        
+        Returns:
+            Tuple (DecodePlan, header của ảnh hoặc None)
+        """
+        if not DECODE_PLANNING:
+            return DecodePlan(), None
+        header = read_header(file_data)
+        return plan_decode(filter_instance.input_requirements(), header, preview_size), header
+    
+    @staticmethod
+    def _build_metadata(algorithm: str, parameters: Dict[str, Any],
+                        original: ImageMetadata, processed_image: Image) -> Dict[str, Any]:
+        """
+        Metadata của kết quả: thuật toán, thông tin ảnh và tham số đã dùng.
+        Kích thước và số kênh của ảnh gốc là của ảnh nguồn kể cả khi decode
+        thu nhỏ hoặc decode grayscale.
+        """
+        metadata = {
+            'algorithm_used': algorithm,
+            'original_metadata': {
+                'width': original.width,
+                'height': original.height,
+                'channels': original.channels,
+                'dtype': original.dtype
+            },
+            'processed_metadata': {
+                'width': processed_image.metadata.width,
+                'height': processed_image.metadata.height,
+                'channels': processed_image.metadata.channels,
+                'dtype': processed_image.metadata.dtype
+            }
+        }
+        
+        # Thêm tham số đã sử dụng
+        metadata.update(parameters)
+        
+        return metadata
+    
+    def process_batch(self, items: List[Tuple[bytes, str, Optional[Dict[str, Any]]]]
+                      ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Xử lý nhiều ảnh song song trên worker pool
+        
+        Args:
+            items: Danh sách (file_data, algorithm, parameters)
+            
+        Yields:
+            Tuple (index, result) theo thứ tự hoàn thành. Ảnh lỗi cho result
+            dạng {'error': ..., 'status': 'error'} và không làm hỏng cả batch.
+        """
+        if self._batch_executor is None:
+            self._batch_executor = ThreadPoolExecutor(
+                max_workers=BATCH_MAX_WORKERS, thread_name_prefix='batch'
+            )
+        
+        futures = {
+            self._batch_executor.submit(self.process_image_from_file, file_data, algorithm, parameters): index
+            for index, (file_data, algorithm, parameters) in enumerate(items)
+        }
+        
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+                result['status'] = 'success'
+            except Exception as e:
+                result = {
+                    'error': str(e),
+                    'status': 'error'
+                }
+            yield index, result
+    
+    def process_frames(self, file_data: Union[bytes, memoryview], algorithm: str,
+                       parameters: Optional[Dict[str, Any]] = None,
+                       encode_format: Optional[str] = None,
+                       prefetch: int = MULTIFRAME_PREFETCH) -> Tuple[str, Iterator[Frame]]:
+        """
+        Xử lý ảnh nhiều frame (GIF động, TIFF nhiều trang, MJPEG)
+        
+        Frame được decode lần lượt và đưa vào worker pool; tối đa prefetch
+        frame được decode trước và đang xử lý cùng lúc, nên bộ nhớ không
+        phụ thuộc số frame và decode chạy song song với filter.
+        
+        Args:
+            file_data: Dữ liệu file ảnh
+            algorithm: Thuật toán xử lý
+            parameters: Tham số cho thuật toán
+            encode_format: Nếu có ('png' hoặc 'jpeg'), mỗi frame kết quả được
+                encode trong worker (Frame.encoded)
+            prefetch: Số frame tối đa đang được xử lý (1: tuần tự)
+            
+        Returns:
+            Tuple (loại container, iterator các Frame kết quả theo thứ tự)
+            
+        Raises:
+            ValueError: Nếu file không phải ảnh nhiều frame hoặc tham số sai
+                (kiểm tra trước khi decode frame nào)
+        """
+        container = detect_container(file_data)
+        if container is None:
+            raise ValueError("File không phải ảnh nhiều frame (GIF, TIFF hoặc MJPEG)")
+        
+        if parameters is None:
+            parameters = self.filter_factory.get_default_parameters(algorithm)
+        filter_instance = self.filter_factory.create_filter(algorithm, parameters)
+        # Mỗi frame là một ảnh khác và không được chạy lại với ngưỡng khác:
+        # lưu STAGE_CACHE chỉ tốn thời gian hash và đẩy các entry hữu ích ra
+        for stage in getattr(filter_instance, 'stages', [filter_instance]):
+            stage.use_stage_cache = False
+        grayscale = DECODE_PLANNING and filter_instance.input_requirements().grayscale
+        
+        frames = iter_frames(file_data, container, grayscale)
+        return container, self._frame_pipeline(frames, filter_instance, encode_format, max(1, prefetch))
+    
+    def _frame_pipeline(self, frames: Iterator[Frame], filter_instance: BaseFilter,
+                        encode_format: Optional[str], prefetch: int) -> Iterator[Frame]:
+        """Decode frame tiếp theo trong khi tối đa prefetch frame đang chạy filter"""
+        if self._frame_executor is None:
+            self._frame_executor = ThreadPoolExecutor(
+                max_workers=MULTIFRAME_WORKERS, thread_name_prefix='frames'
+            )
+        
+        pending = deque()
+        try:
+            while True:
+                with METRICS.stage('decode'):
+                    frame = next(frames, None)
+                if frame is None:
+                    break
+                if frame.index >= MULTIFRAME_MAX_FRAMES:
+                    raise ValueError(f"Tối đa {MULTIFRAME_MAX_FRAMES} frame mỗi ảnh")
+                pending.append(self._frame_executor.submit(
+                    self._process_frame, filter_instance, frame, encode_format
+                ))
+                if len(pending) >= prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Client ngắt kết nối hoặc lỗi giữa chừng: bỏ các frame chưa chạy
+            for future in pending:
+                future.cancel()
+    
+    def _process_frame(self, filter_instance: BaseFilter, frame: Frame,
+                       encode_format: Optional[str]) -> Frame:
+        """Chạy filter (và encode) một frame trong worker"""
+        with METRICS.stage('filter'):
+            processed = self.executor.run(filter_instance, Image(image_data=frame.image))
+        result = Frame(frame.index, processed.data, frame.duration)
+        if encode_format is not None:
+            with METRICS.stage('encode'):
+                result.encoded = processed.encode_to_buffer(encode_format)
+        return result
+    
+    def process_frames_to_container(self, file_data: Union[bytes, memoryview], algorithm: str,
+                                    parameters: Optional[Dict[str, Any]] = None
+                                    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Xử lý ảnh nhiều frame và ghi kết quả thành container cùng loại
+        
+        Returns:
+            Tuple (buffer file kết quả, metadata: container, frames, fps,
+            algorithm_used và tham số)
+        """
+        if parameters is None:
+            parameters = self.filter_factory.get_default_parameters(algorithm)
+        
+        start = time.perf_counter()
+        container, frames = self.process_frames(file_data, algorithm, parameters)
+        results = list(frames)
+        elapsed = time.perf_counter() - start
+        with METRICS.stage('encode'):
+            buffer = encode_container(results, container)
+        
+        metadata = {
+            'algorithm_used': algorithm,
+            'container': container,
+            'frames': len(results),
+            'fps': round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        }
+        metadata.update(parameters)
+        return buffer, metadata
+    
     def process_image_from_array(self, image_array: np.ndarray, algorithm: str,
                                parameters: Optional[Dict[str, Any]] = None) -> Image:
         """
@@ -95,19 +545,82 @@ class ImageProcessor:
             filter_instance = self.filter_factory.create_filter(algorithm, parameters)
             
             # Xử lý ảnh
-            processed_image = filter_instance.apply(image)
+            processed_image = self.executor.run(filter_instance, image)
             
             return processed_image
             
         except Exception as e:
             raise ValueError(f"Lỗi xử lý ảnh: {str(e)}")
     
-    def _create_image_from_bytes(self, file_data: bytes) -> Image:
+    def process_large_image(self, source_path: str, algorithm: str,
+                            parameters: Optional[Dict[str, Any]] = None,
+                            output_path: Optional[str] = None,
+                            strip_height: Optional[int] = None) -> Union[np.memmap, TiledTiffWriter]:
+        """
+        Xử lý ảnh lớn theo từng dải ngang, ghi kết quả ra file memory-mapped
+        
+        Args:
+            source_path: Đường dẫn ảnh nguồn (.npy và TIFF được memory-map,
+                TIFF chỉ đọc các tile của dải đang xử lý; các định dạng khác
+                được decode bằng cv2.imread)
+            algorithm: Thuật toán xử lý
+            parameters: Tham số cho thuật toán
+            output_path: Đường dẫn file kết quả .npy hoặc .tif/.tiff (TIFF
+                chia tile) (mặc định: file .npy tạm)
+            strip_height: Số hàng mỗi dải
+            
+        Returns:
+            Kết quả dạng np.memmap hoặc TiledTiffWriter
+        """
+        try:
+            if parameters is None:
+                parameters = self.filter_factory.get_default_parameters(algorithm)
+            
+            filter_instance = self.filter_factory.create_filter(algorithm, parameters)
+            
+            grayscale = DECODE_PLANNING and filter_instance.input_requirements().grayscale
+            source = self._open_strip_source(source_path, grayscale)
+            
+            executor = StripExecutor(strip_height) if strip_height else StripExecutor()
+            return executor.run(source, filter_instance, output_path)
+            
+        except Exception as e:
+            raise ValueError(f"Lỗi xử lý ảnh lớn: {str(e)}")
+    
+    def _open_strip_source(self, source_path: str,
+                           grayscale: bool = False) -> Union[np.ndarray, TiledTiffReader]:
+        """
+        Mở ảnh nguồn cho StripExecutor
+        
+        Args:
+            source_path: Đường dẫn ảnh nguồn
+            grayscale: Decode thẳng sang grayscale (filter chỉ đọc grayscale)
+            
+        Returns:
+            Mảng ảnh (memory-mapped với file .npy) hoặc TiledTiffReader
+        """
+        if source_path.lower().endswith('.npy'):
+            return np.load(source_path, mmap_mode='r')
+        if is_tiff_path(source_path):
+            try:
+                return TiledTiffReader(source_path)
+            except ValueError:
+                # TIFF nén LZW/JPEG, ... : decode cả ảnh bằng OpenCV
+                pass
+        
+        img = cv2.imread(source_path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError(f"Không thể tải ảnh từ {source_path}")
+        return img
+    
+    def _create_image_from_bytes(self, file_data: bytes,
+                                 plan: Optional[DecodePlan] = None) -> Image:
         """
         Tạo Image entity từ file bytes
         
         Args:
             file_data: Dữ liệu file ảnh
+            plan: Cách decode (mặc định: ảnh màu độ phân giải đầy đủ)
             
         Returns:
             Image entity
@@ -115,7 +628,7 @@ class ImageProcessor:
         try:
             # Decode ảnh từ bytes
             img_array = np.frombuffer(file_data, np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+            img = cv2.imdecode(img_array, (plan or DecodePlan()).flags)
             
             if img is None:
                 raise ValueError("Không thể decode ảnh từ file data")
@@ -125,6 +638,28 @@ class ImageProcessor:
         except Exception as e:
             raise ValueError(f"Lỗi tạo ảnh từ bytes: {str(e)}")
     
+    def store_image(self, file_data: bytes) -> StoredImage:
+        """
+        Decode file ảnh một lần và lưu vào image_store
+        
+        Args:
+            file_data: Dữ liệu file ảnh
+            
+        Returns:
+            StoredImage, dùng image_id cho các lần xử lý sau
+        """
+        with METRICS.stage('decode'):
+            return self.image_store.put(file_data)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Trả về bộ đếm hit/miss/eviction của cache kết quả
+        
+        Returns:
+            Dictionary thống kê theo từng tầng cache
+        """
+        return self.result_cache.stats()
+    
     def get_supported_algorithms(self) -> Dict[str, str]:
         """
         Trả về danh sách các thuật toán được hỗ trợ
@@ -146,6 +681,18 @@ class ImageProcessor:
         """
         return self.filter_factory.get_default_parameters(algorithm)
     
+    def get_algorithm_backends(self, algorithm: str) -> List[str]:
+        """
+        Trả về các backend tính toán dùng được cho thuật toán
+        
+        Args:
+            algorithm: Tên thuật toán
+            
+        Returns:
+            Danh sách tên backend
+        """
+        return self.filter_factory.get_backends(algorithm)
+    
     def validate_parameters(self, algorithm: str, parameters: Dict[str, Any]) -> bool:
         """
         Validate tham số cho thuật toán
@@ -0,0 +1,200 @@
+"""
+Kho ảnh đã decode (POST /images): ảnh được decode một lần, lưu thành file
+.npy và mở lại bằng memory-map cho các lần xử lý sau
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from entities.image import Image
+
+
+class ImageNotFoundError(LookupError):
+    """Không có ảnh với id đã cho (chưa upload, đã hết hạn hoặc bị loại)"""
+
+
+@dataclass
+class StoredImage:
+    """Ảnh trong kho: id (sha256 của file upload) và Image trên memmap"""
+    image_id: str
+    image: Image
+
+    @property
+    def digest(self) -> str:
+        """sha256 hex của file upload gốc, dùng chung key với ResultCache"""
+        return self.image_id
+
+
+class ImageStore:
+    """
+    Kho ảnh trên đĩa, mỗi ảnh là một file .npy tên theo sha256 của file
+    upload (upload lại cùng file trả về cùng id)
+
+    Ảnh hết hạn khi không được truy cập trong ttl giây; khi tổng kích thước
+    vượt quá max_bytes, ảnh truy cập lâu nhất bị loại trước. Thứ tự truy cập
+    lấy theo mtime của file nên được giữ qua các lần khởi động.
+    """
+
+    SUFFIX = '.npy'
+
+    def __init__(self, directory: Optional[str], max_bytes: int, ttl: float):
+        """
+        Args:
+            directory: Thư mục lưu ảnh (None: thư mục tạm tạo khi cần)
+            max_bytes: Tổng kích thước tối đa của các mảng đã decode (byte)
+            ttl: Thời gian (giây) giữ ảnh kể từ lần truy cập cuối
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._directory = directory
+        self._lock = threading.Lock()
+        # id -> (kích thước, thời điểm truy cập cuối)
+        self._entries: Dict[str, list] = {}
+        self.current_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if directory is not None and os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(self.SUFFIX):
+                    path = os.path.join(directory, name)
+                    self._entries[name[:-len(self.SUFFIX)]] = [os.path.getsize(path),
+                                                               os.path.getmtime(path)]
+            self.current_bytes = sum(size for size, _ in self._entries.values())
+
+    @property
+    def directory(self) -> str:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='image-store-')
+        os.makedirs(self._directory, exist_ok=True)
+        return self._directory
+
+    def _path(self, image_id: str) -> str:
+        return os.path.join(self.directory, image_id + self.SUFFIX)
+
+    def put(self, file_data: bytes) -> StoredImage:
+        """
+        Decode file ảnh và lưu vào kho
+
+        Raises:
+            ValueError: Nếu không decode được hoặc ảnh lớn hơn max_bytes
+        """
+        image_id = hashlib.sha256(file_data).hexdigest()
+        with self._lock:
+            self._expire()
+            if image_id in self._entries:
+                self._entries[image_id][1] = time.time()
+                os.utime(self._path(image_id))
+                return StoredImage(image_id, self._open(image_id))
+
+        img = cv2.imdecode(np.frombuffer(file_data, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Không thể decode ảnh từ file data")
+        if img.nbytes > self.max_bytes:
+            raise ValueError("Ảnh sau khi decode vượt quá dung lượng của kho ảnh")
+
+        # Ghi file tạm rồi đổi tên để không ai mở được file ghi dở
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, img)
+        os.replace(tmp_path, self._path(image_id))
+
+        with self._lock:
+            size = os.path.getsize(self._path(image_id))
+            old = self._entries.get(image_id)
+            self.current_bytes += size - (old[0] if old else 0)
+            self._entries[image_id] = [size, time.time()]
+            self._evict(keep=image_id)
+        return StoredImage(image_id, self._open(image_id))
+
+    def get(self, image_id: str) -> StoredImage:
+        """
+        Mở ảnh theo id (memory-map, không chép dữ liệu)
+
+        Raises:
+            ImageNotFoundError: Nếu id không có trong kho
+        """
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(image_id)
+            if entry is None:
+                raise ImageNotFoundError(f"Không tìm thấy ảnh '{image_id}'")
+            entry[1] = time.time()
+            try:
+                os.utime(self._path(image_id))
+                return StoredImage(image_id, self._open(image_id))
+            except OSError:
+                self._remove(image_id)
+                raise ImageNotFoundError(f"Không tìm thấy ảnh '{image_id}'")
+
+    def delete(self, image_id: str) -> bool:
+        """Xóa ảnh khỏi kho, trả về False nếu không có"""
+        with self._lock:
+            if image_id not in self._entries:
+                return False
+            self._remove(image_id)
+            return True
+
+    def describe(self, image_id: str) -> Dict[str, Any]:
+        """Thông tin của ảnh trong kho (không làm mới thời điểm truy cập)"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(image_id)
+            if entry is None:
+                raise ImageNotFoundError(f"Không tìm thấy ảnh '{image_id}'")
+            array = np.load(self._path(image_id), mmap_mode='r')
+            return {
+                'image_id': image_id,
+                'width': array.shape[1],
+                'height': array.shape[0],
+                'channels': array.shape[2] if array.ndim == 3 else 1,
+                'dtype': str(array.dtype),
+                'bytes': entry[0],
+                'expires_in': max(0.0, entry[1] + self.ttl - time.time()),
+            }
+
+    def _open(self, image_id: str) -> Image:
+        # np.memmap read-only; Image giữ view, không chép
+        return Image(image_data=np.load(self._path(image_id), mmap_mode='r'))
+
+    def _remove(self, image_id: str) -> None:
+        size, _ = self._entries.pop(image_id)
+        self.current_bytes -= size
+        # Các memmap đang mở vẫn đọc được sau khi file bị xóa (POSIX)
+        try:
+            os.remove(self._path(image_id))
+        except OSError:
+            pass
+
+    def _expire(self) -> None:
+        deadline = time.time() - self.ttl
+        for image_id in [k for k, (_, accessed) in self._entries.items() if accessed < deadline]:
+            self._remove(image_id)
+            self.expirations += 1
+
+    def _evict(self, keep: str) -> None:
+        for image_id in sorted(self._entries, key=lambda k: self._entries[k][1]):
+            if self.current_bytes <= self.max_bytes:
+                break
+            if image_id != keep:
+                self._remove(image_id)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Trả về các bộ đếm của kho ảnh"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
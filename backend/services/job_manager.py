@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Union
+from .image_store import StoredImage
+from utils.constants import JOB_QUEUE_MAX_DEPTH, JOB_WORKERS, JOB_RESULT_TTL
+
+
+class QueueFullError(Exception):
+    """Hàng đợi job đã đầy"""
+    pass
+
+
+@dataclass
+class Job:
+    """Một job xử lý ảnh bất đồng bộ"""
+    job_id: str
+    algorithm: str
+    parameters: Optional[Dict[str, Any]]
+    file_data: Optional[Union[bytes, StoredImage]] = None
+    status: str = 'queued'          # queued | running | done | failed
+    stage: str = 'queued'
+    progress: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_status(self) -> Dict[str, Any]:
+        """Thông tin trạng thái (không kèm kết quả)"""
+        return {
+            'job_id': self.job_id,
+            'algorithm': self.algorithm,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': round(self.progress, 3),
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Quản lý job bất đồng bộ: hàng đợi giới hạn độ sâu, worker pool chạy
+    ImageProcessor.process_image_from_file và kết quả hết hạn sau TTL
+    """
+
+    def __init__(self, image_processor, max_queue_depth: int = JOB_QUEUE_MAX_DEPTH,
+                 num_workers: int = JOB_WORKERS, result_ttl: float = JOB_RESULT_TTL):
+        """
+        Args:
+            image_processor: ImageProcessor dùng để xử lý
+            max_queue_depth: Số job tối đa đang chờ trong hàng đợi
+            num_workers: Số worker thread
+            result_ttl: Thời gian giữ kết quả sau khi job kết thúc (giây)
+        """
+        self.image_processor = image_processor
+        self.num_workers = num_workers
+        self.result_ttl = result_ttl
+        self._queue: 'queue.Queue[Job]' = queue.Queue(maxsize=max_queue_depth)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    def submit(self, file_data: Union[bytes, StoredImage], algorithm: str,
+               parameters: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        Đưa job vào hàng đợi
+
+        Raises:
+            QueueFullError: Nếu hàng đợi đã đầy
+        """
+        self._start_workers()
+        self._purge_expired()
+
+        job = Job(job_id=uuid.uuid4().hex, algorithm=algorithm,
+                  parameters=parameters, file_data=file_data)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError("Hàng đợi job đã đầy, vui lòng thử lại sau")
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Lấy job theo id, trả về None nếu không tồn tại hoặc đã hết hạn"""
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """Số job đang chờ trong hàng đợi"""
+        return self._queue.qsize()
+
+    def _start_workers(self) -> None:
+        with self._lock:
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'job-worker-{len(self._workers)}',
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Job) -> None:
+        job.status = 'running'
+
+        def on_progress(stage: str, progress: float) -> None:
+            job.stage = stage
+            job.progress = progress
+
+        try:
+            job.result = self.image_processor.process_image_from_file(
+                job.file_data, job.algorithm, job.parameters,
+                progress_callback=on_progress
+            )
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.file_data = None
+            job.finished_at = time.time()
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and now - job.finished_at > self.result_ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
@@ -0,0 +1,146 @@
+"""
+Ảnh nhiều frame: GIF động, TIFF nhiều trang và MJPEG (các file JPEG nối
+tiếp nhau). Frame được decode lần lượt theo generator, kết quả được ghi lại
+thành container cùng loại với ảnh vào.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from utils.constants import GIF_DECODE_CHUNK
+
+# Loại container được hỗ trợ và Content-Type tương ứng
+CONTAINER_MIMETYPES = {
+    'gif': 'image/gif',
+    'tiff': 'image/tiff',
+    'mjpeg': 'video/x-motion-jpeg',
+}
+
+# Thời lượng mặc định (ms) của một frame GIF khi ảnh vào không có thông tin
+DEFAULT_FRAME_DURATION = 100
+
+_TIFF_SIGNATURES = (b'II*\x00', b'MM\x00*')
+_GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+_JPEG_SOI = b'\xff\xd8\xff'
+# Ranh giới giữa hai frame MJPEG: EOI của frame trước, SOI của frame sau
+_MJPEG_BOUNDARY = re.compile(rb'\xff\xd9\xff\xd8')
+
+
+@dataclass
+class Frame:
+    """Một frame: ảnh (hoặc kết quả đã encode) và thời lượng hiển thị (ms, GIF)"""
+    index: int
+    image: np.ndarray
+    duration: Optional[int] = None
+    encoded: Optional[np.ndarray] = None
+
+
+def detect_container(file_data: Union[bytes, memoryview]) -> Optional[str]:
+    """
+    Nhận dạng container nhiều frame theo chữ ký đầu file
+
+    Returns:
+        'gif', 'tiff', 'mjpeg' hoặc None (một JPEG đơn lẻ cũng là None)
+    """
+    head = bytes(file_data[:6])
+    if head in _GIF_SIGNATURES:
+        return 'gif'
+    if head[:4] in _TIFF_SIGNATURES:
+        return 'tiff'
+    if head[:3] == _JPEG_SOI and _MJPEG_BOUNDARY.search(file_data) is not None:
+        return 'mjpeg'
+    return None
+
+
+def iter_frames(file_data: Union[bytes, memoryview], container: str,
+                grayscale: bool = False) -> Iterator[Frame]:
+    """
+    Decode lần lượt các frame, mỗi lần một frame (GIF: một nhóm
+    GIF_DECODE_CHUNK frame, vì decoder GIF của OpenCV phải decode lại từ
+    frame đầu để tới frame cần đọc)
+
+    Args:
+        file_data: Dữ liệu file
+        container: Kết quả của detect_container
+        grayscale: Decode sang grayscale (filter chỉ đọc grayscale)
+
+    Raises:
+        ValueError: Nếu không decode được frame đầu tiên
+    """
+    buffer = np.frombuffer(file_data, np.uint8)
+    flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+
+    if container == 'tiff':
+        index = 0
+        while True:
+            success, pages = cv2.imdecodemulti(buffer, flags, range=(index, index + 1))
+            if not success or not pages:
+                break
+            yield Frame(index, pages[0])
+            index += 1
+    elif container == 'gif':
+        index = 0
+        while True:
+            success, animation = cv2.imdecodeanimation(buffer, index, GIF_DECODE_CHUNK)
+            if not success or not animation.frames:
+                break
+            for image, duration in zip(animation.frames, animation.durations):
+                yield Frame(index, _convert_gif_frame(image, grayscale), int(duration))
+                index += 1
+            if len(animation.frames) < GIF_DECODE_CHUNK:
+                break
+    elif container == 'mjpeg':
+        index = start = 0
+        boundaries = [match.start() + 2 for match in _MJPEG_BOUNDARY.finditer(file_data)]
+        for end in boundaries + [len(buffer)]:
+            image = cv2.imdecode(buffer[start:end], flags)
+            if image is None:
+                raise ValueError(f"Không thể decode frame {index} của MJPEG")
+            yield Frame(index, image)
+            index, start = index + 1, end
+    else:
+        raise ValueError(f"Container '{container}' không được hỗ trợ")
+
+    if index == 0:
+        raise ValueError(f"Không thể decode ảnh {container.upper()}")
+
+
+def _convert_gif_frame(image: np.ndarray, grayscale: bool) -> np.ndarray:
+    """Frame GIF (BGR hoặc BGRA) -> BGR hoặc grayscale như cv2.imdecode"""
+    if image.ndim == 2:
+        return image if grayscale else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if grayscale else cv2.COLOR_BGRA2BGR)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if grayscale else image
+
+
+def encode_container(frames: Iterable[Frame], container: str) -> np.ndarray:
+    """
+    Ghi các frame thành container (GIF giữ thời lượng của từng frame)
+
+    Returns:
+        Buffer uint8 của file kết quả
+    """
+    frames: List[Frame] = list(frames)
+    if container == 'tiff':
+        success, buffer = cv2.imencodemulti('.tiff', [frame.image for frame in frames])
+    elif container == 'gif':
+        # Encoder GIF của OpenCV chỉ nhận ảnh màu
+        animation = cv2.Animation()
+        animation.frames = [cv2.cvtColor(frame.image, cv2.COLOR_GRAY2BGR) if frame.image.ndim == 2
+                            else frame.image for frame in frames]
+        animation.durations = [frame.duration or DEFAULT_FRAME_DURATION for frame in frames]
+        success, buffer = cv2.imencodeanimation('.gif', animation)
+    elif container == 'mjpeg':
+        parts = [cv2.imencode('.jpg', frame.image)[1] for frame in frames]
+        success, buffer = True, np.concatenate(parts) if parts else np.empty(0, np.uint8)
+    else:
+        raise ValueError(f"Container '{container}' không được hỗ trợ")
+
+    if not success:
+        raise ValueError(f"Không thể encode kết quả thành {container.upper()}")
+    return np.asarray(buffer, dtype=np.uint8).ravel()
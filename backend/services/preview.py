@@ -0,0 +1,61 @@
+"""
+Chế độ preview: chạy filter trên một tầng của Gaussian pyramid có kích thước
+gần độ phân giải hiển thị, để phản hồi nhanh khi người dùng chỉnh tham số
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Tuple
+
+import cv2
+
+from entities.image import Image
+
+
+@dataclass
+class PreviewInfo:
+    """Thông tin tầng pyramid đã dùng cho preview"""
+    level: int
+    # Tỉ lệ kích thước preview / ảnh gốc (1 / 2^level)
+    scale: float
+    max_dimension: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def pyramid_level(shape: Tuple[int, ...], max_dimension: int) -> int:
+    """
+    Tầng pyramid sâu nhất mà cạnh dài vẫn không nhỏ hơn max_dimension (ảnh
+    preview không bị phóng to khi hiển thị ở max_dimension)
+    """
+    level = 0
+    longest = max(shape[:2])
+    while longest // 2 >= max_dimension:
+        longest = (longest + 1) // 2
+        level += 1
+    return level
+
+
+def build_preview(image: Image, max_dimension: int,
+                  reduction: int = 1) -> Tuple[Image, PreviewInfo]:
+    """
+    Thu nhỏ ảnh bằng cv2.pyrDown (làm mờ Gaussian 5x5 rồi bỏ một nửa số
+    hàng/cột) tới tầng pyramid_level
+
+    Args:
+        image: Ảnh cần thu nhỏ
+        max_dimension: Cạnh dài mục tiêu
+        reduction: Tỉ lệ ảnh đã được thu nhỏ sẵn khi decode (lũy thừa của
+            2, xem services.decode_planner); tầng và tỉ lệ trả về tính theo
+            ảnh gốc
+
+    Returns:
+        Tuple (ảnh preview, thông tin tầng pyramid)
+    """
+    level = pyramid_level(image.shape, max_dimension)
+    data = image.data
+    for _ in range(level):
+        data = cv2.pyrDown(data)
+    preview = image if level == 0 else Image(image_data=data)
+    return preview, PreviewInfo(level=level + reduction.bit_length() - 1,
+                                scale=1 / (reduction << level), max_dimension=max_dimension)
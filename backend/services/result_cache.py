@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Tuple, Union
+from utils.lru_cache import ByteBudgetLRU
+
+
+class DiskCacheTier:
+    """
+    Tầng cache thứ hai trên đĩa: mỗi kết quả là một file, loại bỏ file truy
+    cập lâu nhất (theo mtime) khi tổng kích thước vượt quá max_bytes
+    """
+
+    SUFFIX = '.cache'
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # Nạp lại index từ các file đã có để cache tồn tại qua các lần khởi động
+        self._sizes: Dict[str, int] = {}
+        for name in os.listdir(directory):
+            if name.endswith(self.SUFFIX):
+                path = os.path.join(directory, name)
+                self._sizes[name[:-len(self.SUFFIX)]] = os.path.getsize(path)
+        self.current_bytes = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Đọc kết quả từ đĩa, trả về None nếu không có"""
+        with self._lock:
+            if key not in self._sizes:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    payload = f.read()
+                os.utime(path)
+            except OSError:
+                self.current_bytes -= self._sizes.pop(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return payload
+
+    def put(self, key: str, *chunks) -> None:
+        """Ghi kết quả (nối các chunk) xuống đĩa: ghi file tạm rồi đổi tên"""
+        size = sum(memoryview(chunk).nbytes for chunk in chunks)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, self._path(key))
+
+            self.current_bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._evict()
+
+    def _evict(self) -> None:
+        if self.current_bytes <= self.max_bytes:
+            return
+
+        def mtime(k: str) -> float:
+            try:
+                return os.path.getmtime(self._path(k))
+            except OSError:
+                return 0.0
+
+        for old_key in sorted(self._sizes, key=mtime):
+            if self.current_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+            self.current_bytes -= self._sizes.pop(old_key)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Trả về các bộ đếm của tầng đĩa"""
+        with self._lock:
+            return {
+                'entries': len(self._sizes),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class ResultCache:
+    """
+    Cache kết quả xử lý ảnh theo nội dung: key là hash của file upload cùng
+    thuật toán và tham số đã chuẩn hóa. Tầng 1 là LRU trong bộ nhớ giới hạn
+    theo byte, tầng 2 (tùy chọn) trên đĩa.
+    """
+
+    def __init__(self, max_bytes: int, disk_directory: Optional[str] = None,
+                 disk_max_bytes: int = 0):
+        """
+        Args:
+            max_bytes: Ngân sách bộ nhớ của tầng LRU (byte)
+            disk_directory: Thư mục của tầng đĩa (None để tắt)
+            disk_max_bytes: Ngân sách của tầng đĩa (byte)
+        """
+        self.memory = ByteBudgetLRU(max_bytes)
+        self.disk = DiskCacheTier(disk_directory, disk_max_bytes) if disk_directory else None
+
+    @staticmethod
+    def make_key(file_data: Union[bytes, str], algorithm: str, parameters: Dict[str, Any],
+                 output_format: str = 'json') -> str:
+        """
+        Tạo key từ nội dung file, thuật toán và tham số đã chuẩn hóa
+
+        Args:
+            file_data: Dữ liệu file ảnh, hoặc sha256 hex của nó (ảnh trong
+                ImageStore dùng chung key với lần upload trực tiếp)
+            algorithm: Thuật toán xử lý
+            parameters: Tham số đã chuẩn hóa (xem FilterFactory.normalize_parameters)
+            output_format: Định dạng kết quả ('json' hoặc định dạng ảnh)
+
+        Returns:
+            Key dạng hex
+        """
+        if isinstance(file_data, str):
+            digest = file_data
+        else:
+            digest = hashlib.sha256(file_data).hexdigest()
+        spec = json.dumps([digest, algorithm, parameters, output_format], sort_keys=True)
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Lấy kết quả theo key (trả về dict mới, caller có thể sửa tự do)
+        """
+        payload = self.memory.get(key)
+        if payload is None and self.disk is not None:
+            payload = self.disk.get(key)
+            if payload is not None:
+                self.memory.put(key, payload, len(payload))
+        if payload is None:
+            return None
+        return json.loads(payload)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Lưu kết quả vào các tầng cache"""
+        payload = json.dumps(result).encode('utf-8')
+        self.memory.put(key, payload, len(payload))
+        if self.disk is not None:
+            self.disk.put(key, payload)
+
+    def get_binary(self, key: str) -> Optional[Tuple[Dict[str, Any], memoryview]]:
+        """
+        Lấy kết quả nhị phân (metadata, dữ liệu ảnh đã encode) theo key
+        """
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            payload = self.disk.get(key)
+            if payload is not None:
+                # Trên đĩa: metadata JSON + '\n' + dữ liệu ảnh
+                split = payload.index(b'\n')
+                entry = (payload[:split], memoryview(payload)[split + 1:])
+                self.memory.put(key, entry, len(payload))
+        if entry is None:
+            return None
+        metadata, data = entry
+        return json.loads(metadata), memoryview(data)
+
+    def put_binary(self, key: str, metadata: Dict[str, Any], data) -> None:
+        """
+        Lưu kết quả nhị phân; data là buffer bất kỳ (ví dụ np.ndarray của
+        cv2.imencode) và được giữ nguyên, không chép
+        """
+        header = json.dumps(metadata).encode('utf-8')
+        self.memory.put(key, (header, data), len(header) + memoryview(data).nbytes)
+        if self.disk is not None:
+            self.disk.put(key, header, b'\n', data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Trả về bộ đếm hit/miss/eviction của từng tầng"""
+        return {
+            'memory': self.memory.stats(),
+            'disk': self.disk.stats() if self.disk is not None else None,
+        }
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import cv2
+import numpy as np
+from typing import Any, Optional, Tuple, Union
+from entities.image import Image
+from entities.filters import BaseFilter
+from .tiled_tiff import TiledTiffWriter, is_tiff_path
+from utils.constants import STRIP_HEIGHT
+
+
+class StripExecutor:
+    """
+    Chạy filter trên ảnh lớn theo từng dải ngang (strip) và ghi kết quả vào
+    một file memory-mapped, để bộ nhớ đỉnh tỉ lệ với chiều cao dải thay vì
+    chiều cao ảnh.
+
+    Mỗi dải được mở rộng thêm get_halo() hàng ở mỗi phía; phần halo bị cắt
+    bỏ sau khi xử lý nên kết quả giống hệt xử lý cả ảnh. Filter có bước toàn
+    cục (get_strip_plan, ví dụ hysteresis của Canny) chạy phần cục bộ theo
+    dải, sau đó bước toàn cục chạy tại chỗ trên output cũng theo dải.
+    """
+
+    def __init__(self, strip_height: int = STRIP_HEIGHT):
+        if strip_height < 1:
+            raise ValueError("Strip height phải lớn hơn 0")
+        self.strip_height = strip_height
+        # Giá trị trả về của bước toàn cục lần chạy gần nhất (ví dụ HysteresisStats)
+        self.global_pass_stats = None
+
+    def run(self, source: Any, filter_instance: BaseFilter,
+            output_path: Optional[str] = None) -> Union[np.memmap, TiledTiffWriter]:
+        """
+        Xử lý ảnh theo dải
+
+        Args:
+            source: Ảnh nguồn hỗ trợ cắt theo hàng (np.ndarray, np.memmap,
+                TiledTiffReader, ...)
+            filter_instance: Filter cần áp dụng
+            output_path: Đường dẫn file kết quả: .tif/.tiff ghi TIFF chia
+                tile, còn lại ghi .npy (mặc định: file .npy tạm)
+
+        Returns:
+            Kết quả dạng np.memmap (mở ở chế độ 'r+') hoặc TiledTiffWriter
+        """
+        height = source.shape[0]
+        local_filter, global_pass = filter_instance.get_strip_plan()
+        halo = local_filter.get_halo()
+
+        if output_path is None:
+            fd, output_path = tempfile.mkstemp(suffix='.npy')
+            os.close(fd)
+
+        output = None
+        for start in range(0, height, self.strip_height):
+            stop = min(start + self.strip_height, height)
+            band, offset = self._read_band(source, start, stop, halo)
+
+            processed = local_filter.apply(Image(image_data=band))
+            result = processed.data[offset:offset + (stop - start)]
+
+            if output is None:
+                output = self._open_output(output_path, (height,) + result.shape[1:],
+                                           result.dtype)
+            output[start:stop] = result
+
+        if output is None:
+            raise ValueError("Ảnh nguồn không có dữ liệu")
+
+        self.global_pass_stats = None
+        if global_pass is not None:
+            self.global_pass_stats = global_pass(output, self.strip_height)
+
+        output.flush()
+        return output
+
+    def _open_output(self, output_path: str, shape: Tuple[int, ...],
+                     dtype: np.dtype) -> Union[np.memmap, TiledTiffWriter]:
+        """Tạo file kết quả theo đuôi của output_path"""
+        if is_tiff_path(output_path):
+            return TiledTiffWriter(output_path, shape, dtype)
+        return np.lib.format.open_memmap(output_path, mode='w+', dtype=dtype, shape=shape)
+
+    def _read_band(self, source: Any, start: int, stop: int,
+                   halo: int) -> Tuple[np.ndarray, int]:
+        """
+        Đọc dải [start, stop) kèm halo, chuyển sang grayscale nếu cần
+
+        Returns:
+            Tuple (band, offset) với offset là vị trí hàng start trong band
+        """
+        band_start = max(0, start - halo)
+        band_stop = min(source.shape[0], stop + halo)
+        band = np.ascontiguousarray(source[band_start:band_stop])
+
+        # Chuyển grayscale theo từng dải (phép toán theo pixel nên kết quả
+        # giống hệt chuyển cả ảnh) để không phải giữ ảnh màu đầy đủ
+        if band.ndim == 3:
+            band = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY)
+
+        return band, start - band_start
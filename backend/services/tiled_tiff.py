@@ -0,0 +1,419 @@
+"""
+Đọc và ghi TIFF chia tile (hoặc strip) qua memory-map cho ảnh rất lớn
+
+TiledTiffReader memory-map file và chỉ đọc các tile phủ vùng được yêu cầu:
+tile không nén được trả thẳng dạng view của file map (không chép), tile
+nén deflate được giải nén và giữ trong một cache LRU giới hạn theo byte.
+TiledTiffWriter tạo trước file TIFF tile không nén và ghi từng vùng vào
+các tile qua memory-map. Cả hai cắt được theo hàng/cột như np.ndarray
+(source[y0:y1], source[y0:y1, x0:x1]) nên dùng trực tiếp được với
+StripExecutor. Ảnh màu được trả về theo thứ tự kênh BGR như cv2.imread.
+
+Hỗ trợ TIFF thường và BigTIFF, một ảnh (IFD đầu tiên), PlanarConfiguration
+1 (các kênh xen kẽ), nén none/deflate với predictor none/horizontal.
+"""
+
+import math
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.lru_cache import ByteBudgetLRU
+from utils.constants import TIFF_TILE_CACHE_BYTES, TIFF_TILE_SIZE
+
+# Tag TIFF được dùng
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+PHOTOMETRIC = 262
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+ROWS_PER_STRIP = 278
+STRIP_BYTE_COUNTS = 279
+PLANAR_CONFIGURATION = 284
+PREDICTOR = 317
+TILE_WIDTH = 322
+TILE_LENGTH = 323
+TILE_OFFSETS = 324
+TILE_BYTE_COUNTS = 325
+EXTRA_SAMPLES = 338
+SAMPLE_FORMAT = 339
+
+COMPRESSION_NONE = 1
+COMPRESSION_DEFLATE = (8, 32946)
+PHOTOMETRIC_MIN_IS_BLACK = 1
+PHOTOMETRIC_RGB = 2
+EXTRA_SAMPLES_UNASSOCIATED_ALPHA = 2
+
+# Kiểu giá trị của tag -> dtype (không có byte order)
+_TAG_TYPES = {1: 'u1', 2: 'u1', 3: 'u2', 4: 'u4', 6: 'i1', 7: 'u1', 8: 'i2', 9: 'i4',
+              11: 'f4', 12: 'f8', 16: 'u8', 17: 'i8', 18: 'u8'}
+# SampleFormat -> kind của numpy
+_SAMPLE_KINDS = {1: 'u', 2: 'i', 3: 'f'}
+
+
+def is_tiff_path(path: str) -> bool:
+    """File có đuôi .tif/.tiff"""
+    return path.lower().endswith(('.tif', '.tiff'))
+
+
+class _TiledImage(ABC):
+    """Phần chung của reader/writer: lưới tile và đọc/ghi theo vùng"""
+
+    height: int
+    width: int
+    samples: int
+    dtype: np.dtype
+    tile_length: int
+    tile_width: int
+    rgb: bool
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        if self.samples == 1:
+            return self.height, self.width
+        return self.height, self.width, self.samples
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return self.height * self.width * self.samples
+
+    @abstractmethod
+    def _tile(self, ty: int, tx: int) -> np.ndarray:
+        """Tile (hàng, cột) dạng mảng (số hàng, tile_width, samples)"""
+        pass
+
+    def _overlaps(self, y0: int, y1: int, x0: int, x1: int):
+        """Các tile phủ vùng [y0, y1) x [x0, x1): (ty, tx, lát cắt trong tile, lát cắt trong vùng)"""
+        for ty in range(y0 // self.tile_length, -(-y1 // self.tile_length)):
+            top = ty * self.tile_length
+            ry0, ry1 = max(y0, top), min(y1, top + self.tile_length)
+            for tx in range(x0 // self.tile_width, -(-x1 // self.tile_width)):
+                left = tx * self.tile_width
+                rx0, rx1 = max(x0, left), min(x1, left + self.tile_width)
+                yield (ty, tx,
+                       (slice(ry0 - top, ry1 - top), slice(rx0 - left, rx1 - left)),
+                       (slice(ry0 - y0, ry1 - y0), slice(rx0 - x0, rx1 - x0)))
+
+    def read_region(self, y0: int, y1: int, x0: int, x1: int) -> np.ndarray:
+        """
+        Đọc vùng [y0, y1) x [x0, x1), chỉ đụng tới các tile phủ vùng đó
+
+        Returns:
+            Mảng (h, w) hoặc (h, w, kênh) theo thứ tự BGR
+        """
+        out = np.empty((y1 - y0, x1 - x0, self.samples), dtype=self.dtype)
+        for ty, tx, inside, region in self._overlaps(y0, y1, x0, x1):
+            out[region] = self._tile(ty, tx)[inside]
+        if self.rgb:
+            out[..., [0, 2]] = out[..., [2, 0]]
+        return out[..., 0] if self.samples == 1 else out
+
+    def _bounds(self, key: Any) -> Tuple[int, int, int, int, List[int]]:
+        """Chuyển key kiểu ndarray (slice/int theo hàng, cột) thành vùng và các trục cần bỏ"""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 2:
+            raise IndexError("Chỉ hỗ trợ cắt theo hàng và cột")
+        key = key + (slice(None),) * (2 - len(key))
+        bounds, squeeze = [], []
+        for axis, (item, length) in enumerate(zip(key, (self.height, self.width))):
+            if isinstance(item, (int, np.integer)):
+                index = int(item) + length if item < 0 else int(item)
+                if not 0 <= index < length:
+                    raise IndexError(f"Chỉ số {item} nằm ngoài ảnh")
+                bounds.extend((index, index + 1))
+                squeeze.append(axis)
+            elif isinstance(item, slice):
+                start, stop, step = item.indices(length)
+                if step != 1:
+                    raise IndexError("Không hỗ trợ bước cắt khác 1")
+                bounds.extend((start, max(start, stop)))
+            else:
+                raise IndexError(f"Key không được hỗ trợ: {item!r}")
+        return bounds[0], bounds[1], bounds[2], bounds[3], squeeze
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        y0, y1, x0, x1, squeeze = self._bounds(key)
+        region = self.read_region(y0, y1, x0, x1)
+        return region.squeeze(axis=tuple(squeeze)) if squeeze else region
+
+
+class TiledTiffReader(_TiledImage):
+    """
+    Nguồn ảnh đọc lười từ file TIFF memory-mapped, truy cập theo vùng
+    """
+
+    def __init__(self, path: str, cache_bytes: int = TIFF_TILE_CACHE_BYTES):
+        """
+        Args:
+            path: Đường dẫn file TIFF
+            cache_bytes: Ngân sách cache các tile đã giải nén
+
+        Raises:
+            ValueError: Nếu file không phải TIFF hoặc dùng tính năng không
+                được hỗ trợ (nén khác deflate, kênh tách rời, ...)
+        """
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        self.cache = ByteBudgetLRU(cache_bytes)
+        self.tiles_decoded = 0
+        self.tiles_mapped = 0
+        self._parse()
+
+    def _parse(self) -> None:
+        """Đọc header và IFD đầu tiên"""
+        order = bytes(self._map[:2])
+        if order not in (b'II', b'MM'):
+            raise ValueError("File không phải TIFF")
+        self._order = '<' if order == b'II' else '>'
+        magic = self._read('u2', 2)
+        if magic == 42:
+            self._big, ifd = False, self._read('u4', 4)
+        elif magic == 43:
+            self._big, ifd = True, self._read('u8', 8)
+        else:
+            raise ValueError("File không phải TIFF")
+
+        count_type, field = ('u8', 8) if self._big else ('u2', 4)
+        entry_size = 20 if self._big else 12
+        count = self._read(count_type, ifd)
+        tags: Dict[int, np.ndarray] = {}
+        start = ifd + (8 if self._big else 2)
+        for position in range(start, start + count * entry_size, entry_size):
+            tag, tag_type = self._read('u2', position), self._read('u2', position + 2)
+            values = self._read('u8' if self._big else 'u4', position + 4)
+            if tag_type not in _TAG_TYPES:
+                continue
+            dtype = np.dtype(self._order + _TAG_TYPES[tag_type])
+            value_position = position + 4 + field
+            if dtype.itemsize * values > field:
+                value_position = self._read('u8' if self._big else 'u4', value_position)
+            tags[tag] = np.frombuffer(self._map, dtype=dtype, count=values, offset=value_position)
+
+        def value(tag: int, default: Optional[int] = None) -> int:
+            if tag not in tags:
+                if default is None:
+                    raise ValueError(f"TIFF thiếu tag {tag}")
+                return default
+            return int(tags[tag][0])
+
+        self.width = value(IMAGE_WIDTH)
+        self.height = value(IMAGE_LENGTH)
+        self.samples = value(SAMPLES_PER_PIXEL, 1)
+        bits = value(BITS_PER_SAMPLE, 1)
+        kind = _SAMPLE_KINDS.get(value(SAMPLE_FORMAT, 1))
+        if kind is None or bits % 8 or bits not in (8, 16, 32, 64):
+            raise ValueError(f"Kiểu mẫu TIFF không được hỗ trợ ({bits} bit)")
+        self._file_dtype = np.dtype(f'{self._order}{kind}{bits // 8}')
+        self.dtype = self._file_dtype.newbyteorder('=')
+
+        self.compression = value(COMPRESSION, COMPRESSION_NONE)
+        if self.compression != COMPRESSION_NONE and self.compression not in COMPRESSION_DEFLATE:
+            raise ValueError(f"Kiểu nén TIFF {self.compression} không được hỗ trợ")
+        self.predictor = value(PREDICTOR, 1)
+        if self.predictor not in (1, 2) or (self.predictor == 2 and kind == 'f'):
+            raise ValueError(f"Predictor TIFF {self.predictor} không được hỗ trợ")
+        if value(PLANAR_CONFIGURATION, 1) != 1:
+            raise ValueError("Chỉ hỗ trợ TIFF có các kênh xen kẽ (PlanarConfiguration 1)")
+        self.rgb = value(PHOTOMETRIC, PHOTOMETRIC_MIN_IS_BLACK) == PHOTOMETRIC_RGB and self.samples >= 3
+
+        if TILE_OFFSETS in tags:
+            self.tiled = True
+            self.tile_width = value(TILE_WIDTH)
+            self.tile_length = value(TILE_LENGTH)
+            offsets, byte_counts = tags[TILE_OFFSETS], tags[TILE_BYTE_COUNTS]
+        else:
+            # Mỗi strip là một tile rộng bằng ảnh
+            self.tiled = False
+            self.tile_width = self.width
+            self.tile_length = min(value(ROWS_PER_STRIP, self.height), self.height)
+            offsets, byte_counts = tags[STRIP_OFFSETS], tags[STRIP_BYTE_COUNTS]
+        self.tiles_across = -(-self.width // self.tile_width)
+        self.tiles_down = -(-self.height // self.tile_length)
+        if len(offsets) < self.tiles_across * self.tiles_down:
+            raise ValueError("TIFF thiếu offset của tile/strip")
+        self._offsets = offsets.astype(np.int64)
+        self._byte_counts = byte_counts.astype(np.int64)
+
+    def _read(self, dtype: str, position: int) -> int:
+        return int(np.frombuffer(self._map, dtype=self._order + dtype, count=1, offset=position)[0])
+
+    def _tile(self, ty: int, tx: int) -> np.ndarray:
+        # Strip cuối có thể ít hàng hơn; tile luôn đủ kích thước (có phần đệm)
+        rows = self.tile_length if self.tiled else min(self.tile_length,
+                                                       self.height - ty * self.tile_length)
+        shape = (rows, self.tile_width, self.samples)
+        index = ty * self.tiles_across + tx
+        offset, byte_count = int(self._offsets[index]), int(self._byte_counts[index])
+
+        if (self.compression == COMPRESSION_NONE and self.predictor == 1
+                and self._file_dtype == self.dtype):
+            # Không nén, đúng byte order: view thẳng vào file map
+            self.tiles_mapped += 1
+            return np.frombuffer(self._map, dtype=self.dtype, count=math.prod(shape),
+                                 offset=offset).reshape(shape)
+
+        key = (ty, tx)
+        tile = self.cache.get(key)
+        if tile is None:
+            data = self._map[offset:offset + byte_count]
+            if self.compression != COMPRESSION_NONE:
+                data = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+            tile = data[:math.prod(shape) * self.dtype.itemsize].view(self._file_dtype).reshape(shape)
+            if self.predictor == 2:
+                tile = np.cumsum(tile, axis=1, dtype=self._file_dtype)
+            tile = tile.astype(self.dtype, copy=False)
+            self.tiles_decoded += 1
+            self.cache.put(key, tile, tile.nbytes)
+        return tile
+
+    def stats(self) -> Dict[str, Any]:
+        """Số tile đã giải nén, số lần trả view của file map và thống kê cache"""
+        return {
+            'tiles_decoded': self.tiles_decoded,
+            'tiles_mapped': self.tiles_mapped,
+            'cache': self.cache.stats(),
+        }
+
+    def close(self) -> None:
+        """Bỏ cache và file map"""
+        self.cache.clear()
+        self._map._mmap.close()
+
+
+class TiledTiffWriter(_TiledImage):
+    """
+    File TIFF tile không nén được tạo trước, ghi và đọc lại theo vùng qua
+    memory-map (dùng làm output của StripExecutor)
+    """
+
+    def __init__(self, path: str, shape: Tuple[int, ...], dtype: Any,
+                 tile_size: int = TIFF_TILE_SIZE):
+        """
+        Args:
+            path: Đường dẫn file kết quả
+            shape: (h, w) hoặc (h, w, kênh); ảnh 3/4 kênh được ghi dạng RGB(A)
+                từ dữ liệu BGR(A)
+            dtype: Kiểu mẫu (số nguyên hoặc số thực 8-64 bit)
+            tile_size: Cạnh tile (bội số của 16 theo chuẩn TIFF)
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype).newbyteorder('=')
+        if self.dtype.kind not in _SAMPLE_KINDS.values():
+            raise ValueError(f"Không ghi được TIFF kiểu {self.dtype}")
+        if tile_size < 16 or tile_size % 16:
+            raise ValueError("Cạnh tile TIFF phải là bội số của 16")
+        self.height, self.width = int(shape[0]), int(shape[1])
+        self.samples = int(shape[2]) if len(shape) == 3 else 1
+        self.rgb = self.samples >= 3
+        self.tile_length = self.tile_width = tile_size
+        self.tiles_across = -(-self.width // tile_size)
+        self.tiles_down = -(-self.height // tile_size)
+
+        tile_bytes = tile_size * tile_size * self.samples * self.dtype.itemsize
+        count = self.tiles_across * self.tiles_down
+        big = count * tile_bytes + (1 << 20) > 0xFFFFFFFF
+        data_start = self._write_header(count, tile_bytes, big)
+        self._tiles = np.memmap(path, dtype=self.dtype.newbyteorder('<'), mode='r+',
+                                offset=data_start,
+                                shape=(self.tiles_down, self.tiles_across,
+                                       tile_size, tile_size, self.samples))
+
+    def _write_header(self, count: int, tile_bytes: int, big: bool) -> int:
+        """
+        Ghi header, IFD và mảng offset/byte count; đặt kích thước file (các
+        tile chưa ghi là vùng thưa trên đĩa)
+
+        Returns:
+            Vị trí byte bắt đầu vùng dữ liệu tile
+        """
+        offset_type, offset_code = (16, '<u8') if big else (4, '<u4')
+        kind = {value: key for key, value in _SAMPLE_KINDS.items()}[self.dtype.kind]
+        samples = np.full(self.samples, 1)
+        entries = [
+            (IMAGE_WIDTH, 4, '<u4', [self.width]),
+            (IMAGE_LENGTH, 4, '<u4', [self.height]),
+            (BITS_PER_SAMPLE, 3, '<u2', samples * self.dtype.itemsize * 8),
+            (COMPRESSION, 3, '<u2', [COMPRESSION_NONE]),
+            (PHOTOMETRIC, 3, '<u2', [PHOTOMETRIC_RGB if self.rgb else PHOTOMETRIC_MIN_IS_BLACK]),
+            (SAMPLES_PER_PIXEL, 3, '<u2', [self.samples]),
+            (PLANAR_CONFIGURATION, 3, '<u2', [1]),
+            (TILE_WIDTH, 4, '<u4', [self.tile_width]),
+            (TILE_LENGTH, 4, '<u4', [self.tile_length]),
+            (TILE_OFFSETS, offset_type, offset_code, None),
+            (TILE_BYTE_COUNTS, offset_type, offset_code, np.full(count, tile_bytes)),
+            (SAMPLE_FORMAT, 3, '<u2', samples * kind),
+        ]
+        # Kênh ngoài gray/RGB (BGRA -> RGBA, gray + alpha): kênh đầu là alpha
+        extra = self.samples - (3 if self.rgb else 1)
+        if extra > 0:
+            entries.insert(-1, (EXTRA_SAMPLES, 3, '<u2',
+                                [EXTRA_SAMPLES_UNASSOCIATED_ALPHA] + [0] * (extra - 1)))
+
+        header_size, field, entry_size = (16, 8, 20) if big else (8, 4, 12)
+        ifd_size = (8 if big else 2) + len(entries) * entry_size + field
+        # Vị trí giá trị ngoài IFD (khi không vừa trường 4/8 byte), căn 8 byte
+        cursor = header_size + ifd_size
+        positions = []
+        for _, _, code, values in entries:
+            size = np.dtype(code).itemsize * (count if values is None else len(values))
+            positions.append(cursor if size > field else None)
+            if size > field:
+                cursor += -(-size // 8) * 8
+        data_start = -(-cursor // 4096) * 4096
+
+        body = bytearray(data_start)
+        if big:
+            body[:16] = b'II' + np.array([43, 8, 0], '<u2').tobytes() + np.array([header_size], '<u8').tobytes()
+            body[16:24] = np.array([len(entries)], '<u8').tobytes()
+        else:
+            body[:8] = b'II' + np.array([42], '<u2').tobytes() + np.array([header_size], '<u4').tobytes()
+            body[8:10] = np.array([len(entries)], '<u2').tobytes()
+        position = header_size + (8 if big else 2)
+        for (tag, tag_type, code, values), value_position in zip(entries, positions):
+            if values is None:
+                values = data_start + np.arange(count, dtype=np.int64) * tile_bytes
+            payload = np.asarray(values).astype(code).tobytes()
+            body[position:position + 4] = np.array([tag, tag_type], '<u2').tobytes()
+            body[position + 4:position + 4 + field] = np.array([len(values)], '<u8' if big else '<u4').tobytes()
+            if value_position is None:
+                body[position + 4 + field:position + 4 + field + len(payload)] = payload
+            else:
+                body[value_position:value_position + len(payload)] = payload
+                body[position + 4 + field:position + 4 + 2 * field] = np.array(
+                    [value_position], '<u8' if big else '<u4').tobytes()
+            position += entry_size
+
+        with open(self.path, 'wb') as f:
+            f.write(body)
+            f.truncate(data_start + count * tile_bytes)
+        return data_start
+
+    def _tile(self, ty: int, tx: int) -> np.ndarray:
+        return self._tiles[ty, tx]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        y0, y1, x0, x1, squeeze = self._bounds(key)
+        region = np.asarray(value, dtype=self.dtype)
+        for axis in squeeze:
+            region = np.expand_dims(region, axis)
+        if self.samples == 1:
+            region = region[..., np.newaxis] if region.ndim < 3 else region
+        elif self.rgb:
+            region = region.copy()
+            region[..., [0, 2]] = region[..., [2, 0]]
+        region = np.broadcast_to(region, (y1 - y0, x1 - x0, self.samples))
+        for ty, tx, inside, part in self._overlaps(y0, y1, x0, x1):
+            self._tiles[ty, tx][inside] = region[part]
+
+    def flush(self) -> None:
+        """Ghi các trang đã sửa xuống đĩa"""
+        self._tiles.flush()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test parity giữa các backend tính toán (numpy / opencv / scipy)
+
+Sai khác cho phép so với backend 'numpy':
+- Median (mọi backend): giống hệt, kể cả ảnh float32 và kernel lớn
+- Canny 'scipy': tối đa 0.1% pixel khác (làm tròn float32)
+- Canny 'opencv': bên trong viền 1 pixel, tối đa 0.5% pixel khác và IoU của
+  tập pixel cạnh tối thiểu 0.9 (gradient int16, NMS phá hòa theo một phía)
+"""
+
+import io
+import os
+import tempfile
+import numpy as np
+import cv2
+
+from app import app
+from entities.image import Image
+from entities.backends import OpenCVCannyEdgeDetector, SciPyCannyEdgeDetector
+from services.filter_factory import FilterFactory
+from services.strip_executor import StripExecutor
+
+CANNY_CASES = [
+    {'kernel_size': 3},
+    {'kernel_size': 5, 'sigma': 1.4},
+    {'kernel_size': 7, 'sigma': 2.0, 'low_threshold': 20, 'high_threshold': 60},
+]
+
+
+def create_test_image(h=160, w=200, seed=0, channels=3):
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, channels), 190, dtype=np.float32)
+    for _ in range(10):
+        center = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+        color = tuple(float(c) for c in rng.integers(0, 256, channels))
+        cv2.circle(img, center, int(rng.integers(8, 60)), color, -1)
+    img += rng.normal(0, 10, img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def run(algorithm, parameters, image):
+    return FilterFactory.create_filter(algorithm, parameters).apply(Image(image_data=image)).data
+
+
+def test_median_backends_match_exactly():
+    image = create_test_image()
+    inputs = [image, image[..., 0], image[..., 0].astype(np.float32)]
+    for data in inputs:
+        for kernel_size in (3, 5, 7, 9):
+            expected = run('median', {'kernel_size': kernel_size}, data)
+            for backend in ('opencv', 'scipy'):
+                result = run('median', {'kernel_size': kernel_size, 'backend': backend}, data)
+                assert result.dtype == expected.dtype
+                np.testing.assert_array_equal(result, expected)
+
+
+def test_canny_scipy_parity():
+    for seed in range(3):
+        image = create_test_image(seed=seed)
+        for params in CANNY_CASES:
+            expected = run('canny', params, image)
+            result = run('canny', dict(params, backend='scipy'), image)
+            assert result.dtype == np.uint8 and result.shape == expected.shape
+            assert np.mean(result != expected) <= 0.001
+
+
+def test_canny_opencv_parity():
+    for seed in range(3):
+        image = create_test_image(seed=seed)
+        for params in CANNY_CASES:
+            expected = run('canny', params, image) > 0
+            result = run('canny', dict(params, backend='opencv'), image) > 0
+            # OpenCV không xóa viền 1 pixel như NMS của backend numpy
+            result, expected = result[1:-1, 1:-1], expected[1:-1, 1:-1]
+            assert np.mean(result != expected) <= 0.005
+            iou = np.sum(result & expected) / np.sum(result | expected)
+            assert iou >= 0.9
+
+
+def test_factory_selects_backend_class():
+    assert type(FilterFactory.create_filter('canny', {'backend': 'opencv'})) is OpenCVCannyEdgeDetector
+    assert FilterFactory.create_filter('median', {}).backend == 'numpy'
+    assert FilterFactory.get_backends('canny') == ['numpy', 'opencv', 'scipy']
+
+    pipeline = FilterFactory.create_filter('pipeline', {
+        'backend': 'scipy',
+        'stages': [
+            {'algorithm': 'median', 'parameters': {}},
+            {'algorithm': 'canny', 'parameters': {'backend': 'numpy'}},
+        ],
+    })
+    assert [stage.backend for stage in pipeline.stages] == ['scipy', 'numpy']
+
+    try:
+        FilterFactory.create_filter('median', {'backend': 'cuda'})
+    except ValueError:
+        return
+    raise AssertionError("Backend không tồn tại phải bị từ chối")
+
+
+def test_backend_is_part_of_normalized_parameters():
+    default = FilterFactory.normalize_parameters('median', {})
+    assert default == {'kernel_size': 3, 'backend': 'numpy'}
+    assert FilterFactory.normalize_parameters('median', {'backend': 'scipy'}) != default
+
+    pipeline = FilterFactory.normalize_parameters('pipeline', {
+        'backend': 'opencv', 'stages': [{'algorithm': 'median'}]
+    })
+    assert pipeline['stages'][0]['parameters']['backend'] == 'opencv'
+
+
+def test_scipy_canny_strips_match_whole_image():
+    image = create_test_image(150, 120, seed=5)
+    detector = SciPyCannyEdgeDetector(FilterFactory.create_parameters('canny', {}))
+    expected = detector.apply(Image(image_data=image)).data
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, 'out.npy')
+        result = StripExecutor(16).run(image, detector, output_path)
+        np.testing.assert_array_equal(np.asarray(result), expected)
+        del result
+
+
+def test_api_reports_and_uses_backends():
+    client = app.test_client()
+    info = client.get('/algorithms/median').get_json()
+    assert info['backends'] == ['numpy', 'opencv', 'scipy']
+    assert info['default_backend'] == 'numpy'
+
+    _, buffer = cv2.imencode('.png', create_test_image(60, 80))
+    response = client.post('/process', data={
+        'image': (io.BytesIO(buffer.tobytes()), 'a.png'),
+        'algorithm': 'canny', 'backend': 'opencv'
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json()['backend'] == 'opencv'
+
+    response = client.post('/process', data={
+        'image': (io.BytesIO(buffer.tobytes()), 'a.png'),
+        'algorithm': 'median', 'backend': 'cuda'
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    test_median_backends_match_exactly()
+    test_canny_scipy_parity()
+    test_canny_opencv_parity()
+    test_factory_selects_backend_class()
+    test_backend_is_part_of_normalized_parameters()
+    test_scipy_canny_strips_match_whole_image()
+    test_api_reports_and_uses_backends()
+    print("Test completed!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test batch endpoint /process/batch
+"""
+
+import io
+import json
+import numpy as np
+import cv2
+
+from app import app
+
+
+def create_jpeg(seed=0):
+    """Tạo ảnh JPEG test"""
+    img = np.random.default_rng(seed).integers(0, 256, (40, 50, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode('.jpg', img)
+    return buffer.tobytes()
+
+
+def post_batch(files, **form):
+    data = {'images': [(io.BytesIO(content), name) for name, content in files]}
+    data.update(form)
+    return app.test_client().post('/process/batch', data=data,
+                                  content_type='multipart/form-data')
+
+
+def test_batch_streams_one_line_per_file_with_item_errors():
+    files = [('a.jpg', create_jpeg(0)), ('broken.jpg', b'not an image'), ('c.jpg', create_jpeg(1))]
+    items = [None, None, {'algorithm': 'canny', 'parameters': {'kernel_size': 3}}]
+    response = post_batch(files, algorithm='median', kernel_size='5', items=json.dumps(items))
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = {entry['index']: entry for entry in map(json.loads, response.data.decode().splitlines())}
+
+    assert sorted(lines) == [0, 1, 2]
+    assert lines[0]['status'] == 'success' and lines[0]['algorithm_used'] == 'median'
+    assert lines[0]['kernel_size'] == 5
+    assert lines[1]['status'] == 'error' and lines[1]['filename'] == 'broken.jpg'
+    assert lines[2]['algorithm_used'] == 'canny' and lines[2]['kernel_size'] == 3
+
+
+def test_batch_matches_single_image_path():
+    content = create_jpeg(2)
+    batch = json.loads(post_batch([('a.jpg', content)], algorithm='median').data)
+    single = app.test_client().post('/process', data={
+        'image': (io.BytesIO(content), 'a.jpg'), 'algorithm': 'median'
+    }, content_type='multipart/form-data').get_json()
+    assert batch['processed_image'] == single['processed_image']
+
+
+def test_batch_rejects_invalid_item_parameters_per_item():
+    items = [{'algorithm': 'unknown'}]
+    response = post_batch([('a.jpg', create_jpeg())], items=json.dumps(items))
+    entry = json.loads(response.data)
+    assert entry['status'] == 'error'
+
+
+def test_batch_without_files_is_bad_request():
+    response = app.test_client().post('/process/batch', data={},
+                                      content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    test_batch_streams_one_line_per_file_with_item_errors()
+    test_batch_matches_single_image_path()
+    test_batch_rejects_invalid_item_parameters_per_item()
+    test_batch_without_files_is_bad_request()
+    print("Test completed!")
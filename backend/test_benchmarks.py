@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test bộ benchmark filter: sinh case, chạy case nhỏ và chế độ compare baseline
+"""
+
+import json
+import os
+import tempfile
+
+from benchmarks import bench_filters
+from benchmarks.bench_filters import build_cases, compare, run_case
+from utils.stage_cache import STAGE_CACHE
+
+
+def document(**throughputs):
+    return {'results': {name: {'mpix_per_s': value} for name, value in throughputs.items()}}
+
+
+def test_build_cases_skips_large_sliding_median():
+    cases = build_cases(('256', '8k'), (5,), (3, 7, 11))
+    assert 'canny/8k/k5/float32' in cases
+    assert 'median/8k/k3/float32' in cases
+    assert 'median/8k/k11/uint8' in cases
+    assert 'median/256/k7/float32' in cases
+    assert 'median/8k/k7/float32' not in cases
+
+
+def test_run_case_reports_reference():
+    result = run_case('canny/256/k3/uint8', repeat=1)
+    assert result['shape'] == [256, 256]
+    assert result['mpix_per_s'] > 0
+    assert result['reference'] == 'cv2.Canny' and result['reference_mpix_per_s'] > 0
+
+    result = run_case('median/256/k7/float32', repeat=1)
+    assert result['reference'] is None and result['reference_seconds'] is None
+
+
+def test_run_case_bypasses_stage_cache():
+    # Các lần đo Canny phải chạy đủ Gaussian, Sobel và NMS
+    before = STAGE_CACHE.stats()
+    run_case('canny/256/k5/uint8', repeat=2)
+    after = STAGE_CACHE.stats()
+    assert after['hits'] == before['hits'] and after['entries'] == before['entries']
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = document(a=100.0, b=100.0, c=100.0, gone=100.0)
+    current = document(a=85.0, b=79.0, c=130.0)
+    rows, regressions = compare(baseline, current, threshold=0.2)
+
+    assert regressions == ['b']
+    assert [row['case'] for row in rows] == ['a', 'b', 'c']
+    assert abs(rows[2]['change'] - 0.3) < 1e-9
+
+
+def test_compare_mode_exit_code():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'baseline.json')
+    output = os.path.join(directory, 'current.json')
+
+    assert bench_filters.main(['run', '--sizes', '256', '--filters', 'median',
+                               '--repeat', '1', '--output', path]) == 0
+    with open(path, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert 'median/256/k3/uint8' in saved['results'] and 'numpy' in saved['environment']
+
+    # Baseline nhanh bất thường -> phải báo regression
+    for result in saved['results'].values():
+        result['mpix_per_s'] *= 1000
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(saved, f)
+    assert bench_filters.main(['compare', path, '--repeat', '1', '--output', output]) == 1
+    with open(output, 'r', encoding='utf-8') as f:
+        assert set(json.load(f)['results']) == set(saved['results'])
+
+
+if __name__ == "__main__":
+    test_build_cases_skips_large_sliding_median()
+    test_run_case_reports_reference()
+    test_run_case_bypasses_stage_cache()
+    test_compare_flags_regressions_beyond_threshold()
+    test_compare_mode_exit_code()
+    print("Test completed!")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test chế độ trả ảnh nhị phân của /process (content negotiation theo Accept)
+"""
+
+import base64
+import email
+import io
+import json
+import numpy as np
+import cv2
+
+from app import app
+
+
+def create_jpeg(seed=0):
+    """Tạo ảnh JPEG test"""
+    img = np.random.default_rng(seed).integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode('.jpg', img)
+    return buffer.tobytes()
+
+
+def post_process(content, accept=None, **form):
+    data = {'image': (io.BytesIO(content), 'a.jpg'), 'algorithm': 'median'}
+    data.update(form)
+    headers = {'Accept': accept} if accept else {}
+    return app.test_client().post('/process', data=data, headers=headers,
+                                  content_type='multipart/form-data')
+
+
+def decode(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+
+
+def test_default_response_is_json():
+    response = post_process(create_jpeg(), accept='*/*')
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['status'] == 'success'
+
+
+def test_png_response_matches_json_result():
+    content = create_jpeg(1)
+    json_result = post_process(content).get_json()
+    response = post_process(content, accept='image/png')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert response.headers['X-Algorithm-Used'] == 'median'
+    assert response.headers['X-Processed-Width'] == '80'
+    assert response.headers['X-Processed-Height'] == '60'
+    assert json.loads(response.headers['X-Parameters'])['kernel_size'] == json_result['kernel_size']
+
+    # PNG không mất dữ liệu nên phải khớp ảnh JPEG base64 chất lượng 95 gần đúng
+    png = decode(response.data)
+    jpeg = decode(base64.b64decode(json_result['processed_image']))
+    assert png.shape == jpeg.shape
+    assert np.abs(png.astype(int) - jpeg.astype(int)).mean() < 3
+
+
+def test_jpeg_response_is_same_bytes_as_json_base64():
+    content = create_jpeg(2)
+    json_result = post_process(content, kernel_size='3').get_json()
+    response = post_process(content, accept='image/jpeg', kernel_size='3')
+
+    assert response.mimetype == 'image/jpeg'
+    assert response.data == base64.b64decode(json_result['processed_image'])
+
+
+def test_multipart_response_contains_metadata_and_image():
+    content = create_jpeg(3)
+    response = post_process(content, accept='multipart/mixed')
+
+    assert response.mimetype == 'multipart/mixed'
+    assert int(response.headers['Content-Length']) == len(response.data)
+    message = email.message_from_bytes(
+        b'Content-Type: ' + response.headers['Content-Type'].encode() + b'\r\n\r\n' + response.data
+    )
+    metadata_part, image_part = message.get_payload()
+    metadata = json.loads(metadata_part.get_payload())
+    assert metadata['algorithm_used'] == 'median'
+    assert image_part.get_content_type() == 'image/jpeg'
+    image = decode(image_part.get_payload(decode=True))
+    assert image.shape[:2] == (metadata['processed_metadata']['height'],
+                               metadata['processed_metadata']['width'])
+
+
+def test_binary_request_errors_are_json():
+    response = post_process(b'not an image', accept='image/png')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+if __name__ == "__main__":
+    test_default_response_is_json()
+    test_png_response_matches_json_result()
+    test_jpeg_response_is_same_bytes_as_json_base64()
+    test_multipart_response_contains_metadata_and_image()
+    test_binary_request_errors_are_json()
+    print("Test completed!")
@@ -5,8 +5,14 @@ Test manual Canny edge detection
 
 import numpy as np
 import cv2
-import matplotlib.pyplot as plt
-from app import canny_edge_detection
+from entities.image import Image
+from entities.filters import CannyEdgeDetector, CannyParameters
+
+
+def canny_edge_detection(img, low, high, sigma):
+    """Chạy CannyEdgeDetector trên mảng numpy, trả về ảnh cạnh"""
+    params = CannyParameters(sigma=sigma, low_threshold=low, high_threshold=high)
+    return CannyEdgeDetector(params).apply(Image(image_data=img)).data
 
 def create_test_image():
     """Tạo ảnh test với các hình dạng đơn giản"""
@@ -82,6 +88,8 @@ def compare_with_opencv():
 
 def visualize_results(img, manual_result, opencv_result):
     """Hiển thị kết quả"""
+    import matplotlib.pyplot as plt
+
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
     
     axes[0].imshow(img, cmap='gray')
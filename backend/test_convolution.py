@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test parity giữa engine tích chập tách được và implementation 2D ban đầu
+"""
+
+import numpy as np
+import cv2
+
+from entities.filters import CannyEdgeDetector, CannyParameters
+from entities.convolution import SeparableConvolver, gaussian_kernel, SOBEL_X, SOBEL_Y
+
+SOBEL_X_2D = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32)
+SOBEL_Y_2D = np.array([[-1, -2, -1], [0, 0, 0], [1, 2, 1]], dtype=np.float32)
+
+
+def create_test_image(h=120, w=160, seed=0):
+    """Tạo ảnh test với các hình dạng đơn giản và noise"""
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w), 200, dtype=np.uint8)
+    cv2.rectangle(img, (20, 20), (90, 70), 30, -1)
+    cv2.circle(img, (120, 80), 25, 90, -1)
+    noise = rng.normal(0, 10, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.float32)
+
+
+def reference_canny(detector, image, sigma, low, high, kernel_size):
+    """Pipeline Canny dùng tích chập 2D ban đầu"""
+    smoothed = detector._convolve(image, detector._gaussian_kernel(kernel_size, sigma))
+    gx = detector._convolve(smoothed, SOBEL_X_2D)
+    gy = detector._convolve(smoothed, SOBEL_Y_2D)
+    magnitude = np.sqrt(gx ** 2 + gy ** 2)
+    angle = np.arctan2(gy, gx) * (180 / np.pi) % 180
+    nms = detector._non_max_suppression(magnitude, angle)
+    return detector._hysteresis(detector._double_threshold(nms, low, high))
+
+
+def test_separable_kernels_match_2d():
+    detector = CannyEdgeDetector(CannyParameters())
+    for size in (3, 5, 9, 15):
+        for sigma in (0.5, 1.0, 3.0):
+            np.testing.assert_allclose(
+                gaussian_kernel(size, sigma).to_2d(),
+                detector._gaussian_kernel(size, sigma),
+                rtol=1e-12
+            )
+    np.testing.assert_array_equal(SOBEL_X.to_2d(), SOBEL_X_2D)
+    np.testing.assert_array_equal(SOBEL_Y.to_2d(), SOBEL_Y_2D)
+
+
+def test_convolve_matches_reference():
+    detector = CannyEdgeDetector(CannyParameters())
+    image = create_test_image()
+    convolver = SeparableConvolver()
+
+    for size in (3, 5, 7, 15):
+        expected = detector._convolve(image, detector._gaussian_kernel(size, 1.4))
+        result = convolver.convolve(image, gaussian_kernel(size, 1.4))
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, expected, atol=1e-3)
+
+    for separable, dense in ((SOBEL_X, SOBEL_X_2D), (SOBEL_Y, SOBEL_Y_2D)):
+        np.testing.assert_allclose(
+            convolver.convolve(image, separable),
+            detector._convolve(image, dense),
+            atol=1e-3
+        )
+
+
+def test_convolve_edge_border_on_small_image():
+    # Kernel lớn hơn ảnh: biên 'edge' phải lặp lại pixel biên như np.pad
+    detector = CannyEdgeDetector(CannyParameters())
+    image = create_test_image()[:4, :6]
+    result = SeparableConvolver().convolve(image, gaussian_kernel(15, 2.0))
+    expected = detector._convolve(image, detector._gaussian_kernel(15, 2.0))
+    np.testing.assert_allclose(result, expected, atol=1e-3)
+
+
+def test_convolve_writes_into_preallocated_buffer():
+    image = create_test_image()
+    out = np.empty(image.shape, dtype=np.float32)
+    result = SeparableConvolver().convolve(image, gaussian_kernel(5, 1.0), out=out)
+    assert result is out
+
+
+def test_canny_matches_reference_pipeline():
+    image = create_test_image()
+    for kernel_size in (3, 5, 15):
+        for sigma in (0.8, 1.5):
+            detector = CannyEdgeDetector(CannyParameters(sigma=sigma, kernel_size=kernel_size))
+            expected = reference_canny(detector, image, sigma, 50, 150, kernel_size)
+            result = detector._canny(image, sigma, 50, 150, kernel_size)
+            np.testing.assert_array_equal(result, expected)
+
+
+if __name__ == "__main__":
+    test_separable_kernels_match_2d()
+    test_convolve_matches_reference()
+    test_convolve_edge_border_on_small_image()
+    test_convolve_writes_into_preallocated_buffer()
+    test_canny_matches_reference_pipeline()
+    print("Test completed!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test decode theo nhu cầu của filter (services.decode_planner)
+"""
+
+import numpy as np
+import cv2
+
+import services.image_processor as image_processor_module
+from app import app
+from entities.filters import InputRequirements
+from services.decode_planner import DecodePlan, ImageHeader, plan_decode, read_header
+from services.filter_factory import FilterFactory
+from services.image_processor import ImageProcessor
+from services.result_cache import ResultCache
+
+
+def create_test_image(h=600, w=800, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 200, dtype=np.uint8)
+    cv2.rectangle(img, (100, 120), (500, 400), (30, 60, 90), -1)
+    cv2.circle(img, (600, 300), 150, (120, 20, 20), -1)
+    noise = rng.normal(0, 8, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def encode(image, ext):
+    return cv2.imencode(ext, image)[1].tobytes()
+
+
+def test_read_header_jpeg_and_png():
+    image = create_test_image(h=300, w=500)
+    assert read_header(encode(image, '.jpg')) == ImageHeader('jpeg', 500, 300, 3)
+    assert read_header(encode(image, '.png')) == ImageHeader('png', 500, 300, 3)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    assert read_header(encode(gray, '.jpg')).channels == 1
+    assert read_header(encode(gray, '.png')).channels == 1
+    assert read_header(encode(cv2.cvtColor(image, cv2.COLOR_BGR2BGRA), '.png')).channels == 4
+    assert read_header(encode(image, '.bmp')) is None
+    assert read_header(encode(image, '.jpg')[:20]) is None
+    assert read_header(b'') is None
+
+
+def test_filters_declare_grayscale_input():
+    for algorithm, parameters in (('canny', {}), ('median', {'backend': 'opencv'}),
+                                  ('pipeline', {'stages': [{'algorithm': 'median'},
+                                                           {'algorithm': 'canny'}]})):
+        requirements = FilterFactory.create_filter(algorithm, parameters).input_requirements()
+        assert requirements.grayscale and requirements.max_dimension is None
+
+
+def test_plan_reduces_only_jpeg_within_pyramid_level():
+    gray = InputRequirements(grayscale=True)
+    assert plan_decode(gray, ImageHeader('jpeg', 3840, 2160)) == DecodePlan(True, 1)
+    assert plan_decode(gray, ImageHeader('jpeg', 3840, 2160), 512) == DecodePlan(True, 4)
+    assert plan_decode(gray, ImageHeader('jpeg', 7680, 4320), 256) == DecodePlan(True, 8)
+    assert plan_decode(gray, ImageHeader('jpeg', 800, 600), 512) == DecodePlan(True, 1)
+    assert plan_decode(gray, ImageHeader('png', 3840, 2160), 512) == DecodePlan(True, 1)
+    assert plan_decode(InputRequirements(), None, 512) == DecodePlan(False, 1)
+    assert plan_decode(InputRequirements(max_dimension=1200), ImageHeader('jpeg', 4000, 3000)
+                       ).reduction == 2
+
+    assert DecodePlan(True, 4).flags == cv2.IMREAD_REDUCED_GRAYSCALE_4
+    assert DecodePlan(False, 1).flags == cv2.IMREAD_COLOR
+
+
+def test_grayscale_decode_matches_color_decode():
+    image = create_test_image()
+    processor = ImageProcessor(ResultCache(0))
+    for ext in ('.jpg', '.png'):
+        file_data = encode(image, ext)
+        result = processor.process_image_from_file(file_data, 'median', {'kernel_size': 3})
+        # original_metadata mô tả ảnh nguồn, không phải ảnh grayscale đã decode
+        assert result['original_metadata']['channels'] == 3
+        assert result['processed_metadata']['channels'] == 1
+
+        planned = processor._create_image_from_bytes(
+            file_data, DecodePlan(grayscale=True)).data.astype(int)
+        color = processor._create_image_from_bytes(file_data).to_grayscale().data
+        # JPEG decode kênh Y trực tiếp, PNG khác cvtColor ở phép làm tròn
+        assert np.abs(planned - color).max() <= 8
+        assert np.abs(planned - color).mean() < 0.6
+
+
+def test_jpeg_preview_decodes_reduced():
+    image = create_test_image(h=1200, w=1600)
+    processor = ImageProcessor(ResultCache(0))
+
+    result = processor.process_image_from_file(encode(image, '.jpg'), 'canny', None,
+                                               preview_size=400)
+
+    assert result['preview']['level'] == 2 and result['preview']['scale'] == 0.25
+    assert (result['original_metadata']['width'], result['original_metadata']['height']) == (1600, 1200)
+    assert (result['processed_metadata']['width'], result['processed_metadata']['height']) == (400, 300)
+
+
+def test_original_channels_from_header():
+    processor = ImageProcessor(ResultCache(0))
+    gray = cv2.cvtColor(create_test_image(), cv2.COLOR_BGR2GRAY)
+    result = processor.process_image_from_file(encode(gray, '.png'), 'median')
+    assert result['original_metadata']['channels'] == 1
+    # Định dạng không đọc được header: số kênh như khi decode màu
+    result = processor.process_image_from_file(encode(create_test_image(), '.bmp'), 'median')
+    assert result['original_metadata']['channels'] == 3
+
+    response = app.test_client().post('/process?algorithm=median',
+                                      data=encode(create_test_image(h=60, w=80), '.png'),
+                                      content_type='application/octet-stream',
+                                      headers={'Accept': 'image/png'})
+    assert response.status_code == 200 and response.headers['X-Original-Channels'] == '3'
+
+
+def test_cache_key_depends_on_decode_planning():
+    processor = ImageProcessor(ResultCache(0))
+    file_data = encode(create_test_image(h=60, w=80), '.png')
+    planned = processor._cache_key(file_data, 'median', {'kernel_size': 3})
+    image_processor_module.DECODE_PLANNING = False
+    try:
+        assert processor._cache_key(file_data, 'median', {'kernel_size': 3}) != planned
+    finally:
+        image_processor_module.DECODE_PLANNING = True
+
+
+def test_planning_can_be_disabled():
+    image_processor_module.DECODE_PLANNING = False
+    try:
+        processor = ImageProcessor(ResultCache(0))
+        result = processor.process_image_from_file(encode(create_test_image(), '.jpg'), 'canny')
+        assert result['original_metadata']['channels'] == 3
+    finally:
+        image_processor_module.DECODE_PLANNING = True
+
+
+if __name__ == "__main__":
+    test_read_header_jpeg_and_png()
+    test_filters_declare_grayscale_input()
+    test_plan_reduces_only_jpeg_within_pyramid_level()
+    test_grayscale_decode_matches_color_decode()
+    test_jpeg_preview_decodes_reduced()
+    test_original_channels_from_header()
+    test_cache_key_depends_on_decode_planning()
+    test_planning_can_be_disabled()
+    print("Test completed!")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test encode gọn cho bản đồ cạnh (entities.edge_encoding) và output_format
+"""
+
+import base64
+import io
+import numpy as np
+import cv2
+
+from app import app
+from entities.edge_encoding import EDGE_FORMATS, decode_edges, encode_edges, is_binary_mask
+from services.image_processor import ImageProcessor
+from services.result_cache import ResultCache
+
+
+def random_mask(h, w, density, seed=0):
+    rng = np.random.default_rng(seed)
+    return ((rng.random((h, w)) < density) * 255).astype(np.uint8)
+
+
+def create_png(seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((120, 160, 3), 200, dtype=np.uint8)
+    cv2.rectangle(img, (30, 20), (120, 90), (30, 60, 90), -1)
+    noise = rng.normal(0, 5, img.shape)
+    return cv2.imencode('.png', np.clip(img + noise, 0, 255).astype(np.uint8))[1].tobytes()
+
+
+def test_roundtrip_all_formats():
+    masks = [random_mask(h, w, density, seed)
+             for seed, (h, w, density) in enumerate([(1, 1, 0.5), (7, 13, 0.0), (9, 5, 1.0),
+                                                     (31, 17, 0.1), (40, 64, 0.5), (3, 300, 0.9)])]
+    # Cạnh chạm biên phải của hàng trước và biên trái của hàng sau
+    edge_rows = np.zeros((4, 6), dtype=np.uint8)
+    edge_rows[:, 0] = edge_rows[:, -1] = 255
+    masks.append(edge_rows)
+
+    for mask in masks:
+        for edge_format in EDGE_FORMATS:
+            payload, info = encode_edges(mask, edge_format)
+            assert info['format'] == edge_format and info['shape'] == list(mask.shape)
+            assert np.array_equal(decode_edges(payload.tobytes(), info), mask)
+
+
+def test_rle_and_sparse_layout():
+    mask = np.zeros((2, 8), dtype=np.uint8)
+    mask[0, 2:5] = 255
+    mask[1, 0] = 255
+
+    payload, info = encode_edges(mask, 'rle')
+    assert payload.view(info['dtype']).tolist() == [2, 3, 3, 0, 1, 7]
+
+    payload, info = encode_edges(mask, 'sparse')
+    assert info['count'] == 4
+    assert payload.view(info['dtype']).tolist() == [0, 2, 0, 3, 0, 4, 1, 0]
+
+
+def test_non_binary_rejected():
+    assert not is_binary_mask(np.full((4, 4), 128, dtype=np.uint8))
+    assert not is_binary_mask(np.zeros((4, 4, 3), dtype=np.uint8))
+    try:
+        encode_edges(np.full((4, 4), 128, dtype=np.uint8), 'rle')
+        assert False, 'Phải báo lỗi với ảnh không nhị phân'
+    except ValueError:
+        pass
+
+
+def test_auto_picks_smallest_payload():
+    processor = ImageProcessor(ResultCache(0))
+    result = processor.process_image_from_file(create_png(), 'canny', None, output_format='auto')
+
+    encoding = result['encoding']
+    candidates = encoding['candidates']
+    assert set(candidates) == set(EDGE_FORMATS) | {'png'}
+    assert encoding['bytes'] == min(c['bytes'] for c in candidates.values())
+    assert all(c['encode_ms'] >= 0 for c in candidates.values())
+
+    payload = base64.b64decode(result['processed_image'])
+    assert len(payload) == encoding['bytes']
+    png_result = processor.process_image_from_file(create_png(), 'canny', None, output_format='png')
+    expected = cv2.imdecode(np.frombuffer(base64.b64decode(png_result['processed_image']), np.uint8),
+                            cv2.IMREAD_UNCHANGED)
+    if encoding['format'] == 'png':
+        decoded = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_UNCHANGED)
+    else:
+        decoded = decode_edges(payload, encoding)
+    assert np.array_equal(decoded, expected)
+
+    # Ảnh không nhị phân (median) vẫn trả JPEG
+    median = processor.process_image_from_file(create_png(), 'median', None, output_format='auto')
+    assert median['encoding']['format'] == 'jpeg'
+    assert list(median['encoding']['candidates']) == ['jpeg']
+
+
+def test_output_format_in_api():
+    client = app.test_client()
+    response = client.post('/process', data={
+        'image': (io.BytesIO(create_png(1)), 'a.png'), 'algorithm': 'canny', 'output_format': 'rle'
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['encoding']['format'] == 'rle'
+    assert decode_edges(base64.b64decode(result['processed_image']), result['encoding']).shape == (120, 160)
+
+    # Mặc định vẫn là JPEG; định dạng gọn cho ảnh không nhị phân hoặc sai tên bị từ chối
+    default = client.post('/process?algorithm=canny', data=create_png(1),
+                          content_type='application/octet-stream')
+    assert default.get_json()['encoding']['format'] == 'jpeg'
+    invalid = client.post('/process?algorithm=canny&output_format=gif', data=create_png(1),
+                          content_type='application/octet-stream')
+    assert invalid.status_code == 400
+    not_binary = client.post('/process?algorithm=median&output_format=sparse', data=create_png(1),
+                             content_type='application/octet-stream')
+    assert not_binary.status_code == 400
+
+
+if __name__ == "__main__":
+    test_roundtrip_all_formats()
+    test_rle_and_sparse_layout()
+    test_non_binary_rejected()
+    test_auto_picks_smallest_payload()
+    test_output_format_in_api()
+    print("Test completed!")
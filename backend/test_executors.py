@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test executor chạy filter trên pool worker process
+"""
+
+import os
+import numpy as np
+
+from entities.image import Image
+from entities.filters import MedianFilter, MedianParameters
+import services.executors as executors_module
+from services.executors import InlineExecutor, ProcessPoolFilterExecutor, worker_stage_cache_bytes
+from services.image_processor import ImageProcessor
+from services.result_cache import ResultCache
+from utils.constants import STAGE_CACHE_MAX_BYTES, STAGE_CACHE_MIN_WORKER_BYTES
+
+
+class CrashingFilter(MedianFilter):
+    """Filter làm worker process thoát đột ngột"""
+
+    def apply(self, image):
+        os._exit(1)
+
+
+class StageCacheBudgetFilter(MedianFilter):
+    """Filter trả về ngân sách STAGE_CACHE của process đang chạy"""
+
+    def apply(self, image):
+        from utils.stage_cache import STAGE_CACHE
+        return Image(image_data=np.array([[STAGE_CACHE.lru.max_bytes]], dtype=np.int64))
+
+
+def create_test_image():
+    return np.random.default_rng(0).integers(0, 256, (64, 80, 3), dtype=np.uint8)
+
+
+def test_process_pool_matches_inline():
+    executor = ProcessPoolFilterExecutor(max_workers=1, max_tasks_per_child=2)
+    try:
+        median = MedianFilter(MedianParameters(kernel_size=5))
+        image = Image(image_data=create_test_image())
+        expected = InlineExecutor().run(median, image).data
+        # Nhiều task hơn max_tasks_per_child: worker được thay mới giữa chừng
+        for _ in range(3):
+            np.testing.assert_array_equal(executor.run(median, image).data, expected)
+    finally:
+        executor.shutdown()
+
+
+def test_process_pool_recovers_after_worker_crash():
+    executor = ProcessPoolFilterExecutor(max_workers=1, max_retries=1)
+    try:
+        image = Image(image_data=create_test_image())
+        try:
+            executor.run(CrashingFilter(MedianParameters()), image)
+            assert False, "Phải raise khi worker crash"
+        except RuntimeError:
+            pass
+        assert executor.restarts == 2
+
+        median = MedianFilter(MedianParameters())
+        np.testing.assert_array_equal(executor.run(median, image).data,
+                                      median.apply(image).data)
+    finally:
+        executor.shutdown()
+
+
+def test_process_pool_splits_stage_cache_budget():
+    executor = ProcessPoolFilterExecutor(max_workers=2)
+    try:
+        image = Image(image_data=create_test_image())
+        budget = executor.run(StageCacheBudgetFilter(MedianParameters()), image).data
+        assert int(budget[0, 0]) == STAGE_CACHE_MAX_BYTES // 2
+    finally:
+        executor.shutdown()
+
+
+def test_worker_stage_cache_fits_4k_magnitude():
+    magnitude_4k = 3840 * 2160 * np.dtype(np.float32).itemsize
+    for workers in (1, 2, 8, 9, 64):
+        budget = worker_stage_cache_bytes(workers)
+        assert magnitude_4k <= budget <= STAGE_CACHE_MAX_BYTES
+    assert worker_stage_cache_bytes(16) == STAGE_CACHE_MIN_WORKER_BYTES
+
+    max_bytes = executors_module.STAGE_CACHE_MAX_BYTES
+    executors_module.STAGE_CACHE_MAX_BYTES = 0
+    try:
+        assert worker_stage_cache_bytes(4) == 0
+    finally:
+        executors_module.STAGE_CACHE_MAX_BYTES = max_bytes
+
+
+def test_image_processor_uses_configured_executor():
+    executor = ProcessPoolFilterExecutor(max_workers=1)
+    try:
+        processor = ImageProcessor(ResultCache(0), executor=executor)
+        image = create_test_image()
+        result = processor.process_image_from_array(image, 'median', {'kernel_size': 3})
+        expected = ImageProcessor(ResultCache(0)).process_image_from_array(image, 'median', {'kernel_size': 3})
+        np.testing.assert_array_equal(result.data, expected.data)
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    test_process_pool_matches_inline()
+    test_process_pool_recovers_after_worker_crash()
+    test_process_pool_splits_stage_cache_budget()
+    test_worker_stage_cache_fits_4k_magnitude()
+    test_image_processor_uses_configured_executor()
+    print("Test completed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test hysteresis liên thông toàn ảnh của Canny
+"""
+
+import numpy as np
+from scipy import ndimage
+
+from entities.hysteresis import hysteresis, strip_hysteresis, STRONG, WEAK
+
+
+def reference_hysteresis(thresh):
+    """Lặp binary_dilation trong mặt nạ ứng viên cho tới khi hội tụ"""
+    candidates = thresh > 0
+    edges = thresh == STRONG
+    while True:
+        grown = ndimage.binary_dilation(edges, structure=np.ones((3, 3), bool)) & candidates
+        if np.array_equal(grown, edges):
+            return edges.astype(np.uint8) * STRONG
+        edges = grown
+
+
+def random_threshold_map(shape, seed, density=0.45):
+    rng = np.random.default_rng(seed)
+    values = rng.random(shape)
+    thresh = np.zeros(shape, dtype=np.uint8)
+    thresh[values < density] = WEAK
+    thresh[values < 0.02] = STRONG
+    return thresh
+
+
+def test_long_weak_path_is_connected():
+    thresh = np.zeros((40, 400), dtype=np.uint8)
+    thresh[20, 10:390] = WEAK
+    thresh[20, 10] = STRONG
+    thresh[5, 50:60] = WEAK   # thành phần yếu không nối với pixel mạnh
+
+    edges, stats = hysteresis(thresh)
+
+    assert edges[20, 10:390].all() and edges[20, 389] == STRONG
+    assert not edges[5].any()
+    assert stats.strong_pixels == 1
+    assert stats.weak_pixels == 379 + 10
+    assert stats.promoted_pixels == 379
+    assert stats.components == 2
+    assert stats.label_passes == 1
+
+
+def test_matches_iterative_dilation():
+    for seed in range(5):
+        thresh = random_threshold_map((64, 80), seed)
+        edges, _ = hysteresis(thresh)
+        np.testing.assert_array_equal(edges, reference_hysteresis(thresh))
+
+
+def test_in_place_output():
+    thresh = random_threshold_map((50, 50), 7)
+    expected, _ = hysteresis(thresh)
+    result, _ = hysteresis(thresh, out=thresh)
+    assert result is thresh
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_strip_hysteresis_matches_whole_image():
+    for seed in range(3):
+        thresh = random_threshold_map((97, 60), seed)
+        expected, whole_stats = hysteresis(thresh)
+        for strip_height in (1, 4, 17, 200):
+            data = thresh.copy()
+            stats = strip_hysteresis(data, strip_height)
+            np.testing.assert_array_equal(data, expected)
+            assert stats.components == whole_stats.components
+            assert stats.promoted_pixels == whole_stats.promoted_pixels
+            assert stats.label_passes == 2 * -(-97 // strip_height)
+
+
+def test_strip_hysteresis_joins_diagonal_across_strips():
+    # Đường chéo chỉ nối theo góc qua biên giữa hai dải
+    thresh = np.zeros((8, 8), dtype=np.uint8)
+    for i in range(8):
+        thresh[i, i] = WEAK
+    thresh[7, 7] = STRONG
+    strip_hysteresis(thresh, 2)
+    assert all(thresh[i, i] == STRONG for i in range(8))
+
+
+if __name__ == "__main__":
+    test_long_weak_path_is_connected()
+    test_matches_iterative_dilation()
+    test_in_place_output()
+    test_strip_hysteresis_matches_whole_image()
+    test_strip_hysteresis_joins_diagonal_across_strips()
+    print("Test completed!")
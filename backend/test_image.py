@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test Image entity: view chỉ đọc, copy-on-write và bộ đếm byte bị chép
+"""
+
+import numpy as np
+import cv2
+
+from entities.image import Image, COPY_COUNTER
+from services.image_processor import ImageProcessor
+from services.result_cache import ResultCache
+
+
+def create_image(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (64, 96, 3), dtype=np.uint8)
+
+
+def test_image_adopts_buffer_without_copy():
+    array = create_image()
+    COPY_COUNTER.reset()
+    image = Image(image_data=array)
+
+    assert np.shares_memory(image.data, array)
+    assert not image.data.flags.writeable
+    assert image.data is image.data
+    assert COPY_COUNTER.snapshot() == {'copies': 0, 'bytes_copied': 0}
+
+
+def test_explicit_copy_is_counted():
+    array = create_image()
+    COPY_COUNTER.reset()
+    image = Image(image_data=array, copy=True)
+
+    assert not np.shares_memory(image.data, array)
+    assert COPY_COUNTER.snapshot() == {'copies': 1, 'bytes_copied': array.nbytes}
+
+
+def test_copy_on_write():
+    image = Image(image_data=create_image())
+    COPY_COUNTER.reset()
+    clone = image.copy()
+    assert np.shares_memory(clone.data, image.data)
+    assert COPY_COUNTER.snapshot()['copies'] == 0
+
+    writable = clone.writable_data()
+    writable[...] = 0
+    assert writable.flags.writeable
+    assert image.data.any()
+    assert COPY_COUNTER.snapshot() == {'copies': 1, 'bytes_copied': image.data.nbytes}
+
+
+def test_read_only_data_rejects_writes():
+    image = Image(image_data=create_image())
+    try:
+        image.data[0, 0] = 0
+    except ValueError:
+        return
+    raise AssertionError("Ghi vào Image.data phải bị từ chối")
+
+
+def test_canny_request_makes_no_full_frame_copies():
+    _, buffer = cv2.imencode('.png', create_image(1))
+    processor = ImageProcessor(result_cache=ResultCache(max_bytes=0))
+
+    COPY_COUNTER.reset()
+    result = processor.process_image_from_file(buffer.tobytes(), 'canny')
+
+    assert result['processed_image']
+    assert COPY_COUNTER.snapshot()['copies'] == 0
+
+
+if __name__ == "__main__":
+    test_image_adopts_buffer_without_copy()
+    test_explicit_copy_is_counted()
+    test_copy_on_write()
+    test_read_only_data_rejects_writes()
+    test_canny_request_makes_no_full_frame_copies()
+    print("Test completed!")
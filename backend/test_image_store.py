@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test kho ảnh đã decode (POST /images) và xử lý ảnh theo image_id
+"""
+
+import base64
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import cv2
+
+from app import app, image_controller
+from entities.image import COPY_COUNTER
+from services.image_store import ImageStore, ImageNotFoundError
+from utils.metrics import METRICS
+
+
+def create_png(seed=0, h=60, w=80):
+    """Tạo ảnh PNG test (lossless để so sánh pixel)"""
+    img = np.random.default_rng(seed).integers(0, 256, (h, w, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode('.png', img)
+    return img, buffer.tobytes()
+
+
+def upload(content):
+    return app.test_client().post('/images', data={'image': (io.BytesIO(content), 'a.png')},
+                                  content_type='multipart/form-data')
+
+
+def test_store_roundtrip_is_zero_copy_memmap():
+    img, content = create_png()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = ImageStore(tmp_dir, 10 * 1024 * 1024, 60)
+        stored = store.put(content)
+
+        COPY_COUNTER.reset()
+        opened = store.get(stored.image_id)
+        assert isinstance(opened.image.data.base, np.memmap)
+        assert not opened.image.data.flags.writeable
+        np.testing.assert_array_equal(opened.image.data, img)
+        assert COPY_COUNTER.snapshot()['copies'] == 0
+
+        # Upload lại cùng file trả về cùng id, không tạo thêm ảnh
+        assert store.put(content).image_id == stored.image_id
+        assert store.stats()['entries'] == 1
+
+        # Index được đọc lại từ thư mục khi khởi động
+        assert ImageStore(tmp_dir, 10 * 1024 * 1024, 60).get(stored.image_id) is not None
+
+
+def test_store_ttl_and_size_eviction():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = ImageStore(tmp_dir, 10 * 1024 * 1024, ttl=0.05)
+        stored = store.put(create_png()[1])
+        time.sleep(0.1)
+        try:
+            store.get(stored.image_id)
+            assert False, "Ảnh phải hết hạn"
+        except ImageNotFoundError:
+            pass
+        assert store.stats()['expirations'] == 1
+        assert os.listdir(tmp_dir) == []
+
+        # Vừa đủ chỗ cho hai ảnh: ảnh truy cập lâu nhất bị loại
+        one_image = 60 * 80 * 3 + 128
+        store = ImageStore(tmp_dir, 2 * one_image, ttl=60)
+        first, second = (store.put(create_png(seed)[1]) for seed in (1, 2))
+        store.get(first.image_id)
+        store.put(create_png(3)[1])
+        store.get(first.image_id)
+        try:
+            store.get(second.image_id)
+            assert False, "Ảnh truy cập lâu nhất phải bị loại"
+        except ImageNotFoundError:
+            pass
+        assert store.stats()['evictions'] == 1
+        assert store.stats()['bytes'] <= store.max_bytes
+
+
+def test_process_by_image_id_skips_decode():
+    img, content = create_png(4)
+    response = upload(content)
+    assert response.status_code == 201
+    info = response.get_json()
+    assert (info['width'], info['height'], info['channels']) == (80, 60, 3)
+    image_id = info['image_id']
+
+    client = app.test_client()
+    by_file = client.post('/process', data={'image': (io.BytesIO(content), 'a.png'),
+                                            'algorithm': 'median', 'kernel_size': '5'},
+                          content_type='multipart/form-data').get_json()
+
+    image_controller.image_processor.result_cache.memory.clear()
+    METRICS.start_collecting()
+    by_id = image_controller.image_processor.process_image_from_file(
+        image_controller.image_processor.image_store.get(image_id), 'median', {'kernel_size': 5}
+    )
+    stages = [name for name, _ in METRICS.stop_collecting()]
+    assert 'decode' not in stages and 'filter' in stages
+
+    # File được decode thẳng sang grayscale nên có thể lệch 1 mức xám (cộng
+    # sai số nén của kết quả JPEG)
+    def pixels(result):
+        data = base64.b64decode(result['processed_image'])
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE).astype(int)
+    assert np.abs(pixels(by_id) - pixels(by_file)).mean() < 2
+
+    response = client.post('/process', data={'image_id': image_id, 'algorithm': 'median',
+                                             'kernel_size': '5'})
+    assert response.status_code == 200
+    assert response.get_json()['processed_image'] == by_id['processed_image']
+
+    png = client.post('/process', data={'image_id': image_id, 'algorithm': 'median'},
+                      headers={'Accept': 'image/png'})
+    assert png.mimetype == 'image/png'
+
+
+def test_unknown_image_id_and_delete():
+    client = app.test_client()
+    response = client.post('/process', data={'image_id': 'missing', 'algorithm': 'median'})
+    assert response.status_code == 404
+    assert client.post('/jobs', data={'image_id': 'missing'}).status_code == 404
+    assert client.get('/images/missing').status_code == 404
+
+    image_id = upload(create_png(5)[1]).get_json()['image_id']
+    assert client.get(f'/images/{image_id}').get_json()['expires_in'] > 0
+    assert client.delete(f'/images/{image_id}').status_code == 200
+    assert client.delete(f'/images/{image_id}').status_code == 404
+
+    assert upload(b'not an image').status_code == 400
+    assert 'image_store_entries' in client.get('/metrics').data.decode()
+
+
+if __name__ == "__main__":
+    test_store_roundtrip_is_zero_copy_memmap()
+    test_store_ttl_and_size_eviction()
+    test_process_by_image_id_skips_decode()
+    test_unknown_image_id_and_delete()
+    print("Test completed!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test job API bất đồng bộ (/jobs)
+"""
+
+import io
+import threading
+import time
+import numpy as np
+import cv2
+
+from app import app, image_controller
+from services.image_processor import ImageProcessor
+from services.executors import InlineExecutor
+from services.job_manager import JobManager
+from services.result_cache import ResultCache
+
+
+def create_jpeg(seed=0):
+    """Tạo ảnh JPEG test"""
+    img = np.random.default_rng(seed).integers(0, 256, (40, 50, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode('.jpg', img)
+    return buffer.tobytes()
+
+
+class BlockingExecutor(InlineExecutor):
+    """Executor chờ tới khi được cho phép chạy"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def run(self, filter_instance, image):
+        self.release.wait(10)
+        return super().run(filter_instance, image)
+
+
+def submit(client, content, **form):
+    data = {'image': (io.BytesIO(content), 'a.jpg')}
+    data.update(form)
+    return client.post('/jobs', data=data, content_type='multipart/form-data')
+
+
+def wait_done(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f'/jobs/{job_id}').get_json()['job']
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("Job không hoàn thành")
+
+
+def test_submit_poll_and_fetch_result():
+    client = app.test_client()
+    content = create_jpeg()
+    response = submit(client, content, algorithm='median', kernel_size='5')
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    job = wait_done(client, job_id)
+    assert job['status'] == 'done' and job['progress'] == 1.0
+
+    result = client.get(f'/jobs/{job_id}/result')
+    assert result.status_code == 200
+    single = client.post('/process', data={
+        'image': (io.BytesIO(content), 'a.jpg'), 'algorithm': 'median', 'kernel_size': '5'
+    }, content_type='multipart/form-data').get_json()
+    assert result.get_json()['processed_image'] == single['processed_image']
+
+
+def test_failed_job_and_unknown_job():
+    client = app.test_client()
+    job_id = submit(client, b'not an image').get_json()['job_id']
+    assert wait_done(client, job_id)['status'] == 'failed'
+    assert client.get(f'/jobs/{job_id}/result').status_code == 400
+    assert client.get('/jobs/unknown').status_code == 404
+
+
+def test_queue_full_returns_429_and_results_expire():
+    client = app.test_client()
+    executor = BlockingExecutor()
+    processor = ImageProcessor(ResultCache(0), executor=executor)
+    original = image_controller.job_manager
+    image_controller.job_manager = JobManager(processor, max_queue_depth=1,
+                                              num_workers=1, result_ttl=0)
+    try:
+        running = submit(client, create_jpeg(1)).get_json()['job_id']
+        deadline = time.time() + 5
+        while image_controller.job_manager.get(running).status != 'running':
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        queued = submit(client, create_jpeg(2))
+        assert queued.status_code == 202
+        assert client.get(f"/jobs/{queued.get_json()['job_id']}/result").status_code == 202
+        assert submit(client, create_jpeg(3)).status_code == 429
+
+        executor.release.set()
+        image_controller.job_manager._queue.join()
+        time.sleep(0.01)
+        # result_ttl=0: kết quả hết hạn ngay sau khi job kết thúc
+        assert client.get(f'/jobs/{running}').status_code == 404
+    finally:
+        executor.release.set()
+        image_controller.job_manager = original
+
+
+if __name__ == "__main__":
+    test_submit_poll_and_fetch_result()
+    test_failed_job_and_unknown_job()
+    test_queue_full_returns_429_and_results_expire()
+    print("Test completed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test các thuật toán lọc trung vị nhanh so với np.median
+"""
+
+import numpy as np
+
+from entities.image import Image
+from entities.filters import MedianFilter, MedianParameters
+from entities.median import histogram_median, sorting_network_median
+
+
+def create_noisy_image(h=47, w=61, seed=0):
+    """Tạo ảnh test có nhiễu muối tiêu"""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, (h, w), dtype=np.uint8)
+    img[img < 20] = 0
+    img[img > 235] = 255
+    return img
+
+
+def test_histogram_median_bit_identical():
+    median = MedianFilter(MedianParameters())
+    images = [
+        create_noisy_image(),
+        create_noisy_image(5, 9, seed=1),      # nhỏ hơn kernel lớn
+        np.full((20, 30), 77, dtype=np.uint8),  # ảnh hằng
+        np.tile(np.arange(256, dtype=np.uint8), (12, 1)),
+    ]
+    for image in images:
+        for kernel_size in range(3, 17, 2):
+            expected = median._sliding_window_median(image, kernel_size)
+            np.testing.assert_array_equal(histogram_median(image, kernel_size), expected)
+
+
+def test_histogram_median_large_kernels():
+    # k² > 255: số đếm của histogram không được tràn uint8
+    median = MedianFilter(MedianParameters())
+    images = [
+        np.full((40, 40), 200, dtype=np.uint8),
+        np.random.default_rng(6).integers(0, 256, (60, 60), dtype=np.uint8),
+    ]
+    for image in images:
+        for kernel_size in (17, 31):
+            expected = median._sliding_window_median(image, kernel_size)
+            np.testing.assert_array_equal(histogram_median(image, kernel_size), expected)
+            result = MedianFilter(MedianParameters(kernel_size=kernel_size)).apply(
+                Image(image_data=image))
+            np.testing.assert_array_equal(result.data, expected)
+
+
+def test_sorting_network_bit_identical():
+    median = MedianFilter(MedianParameters())
+    images = [
+        create_noisy_image(),
+        create_noisy_image(1, 1, seed=2),
+        create_noisy_image(3, 2, seed=3),
+        create_noisy_image(300, 7, seed=4),    # nhiều dải hàng
+        create_noisy_image(20, 20, seed=5).astype(np.float32),
+    ]
+    for image in images:
+        for kernel_size in (3, 5):
+            expected = median._sliding_window_median(image, kernel_size)
+            result = sorting_network_median(image, kernel_size)
+            assert result.dtype == image.dtype
+            np.testing.assert_array_equal(result, expected)
+
+
+def test_median_filter_output_unchanged():
+    image = create_noisy_image()
+    for kernel_size in (3, 5, 7, 11, 15):
+        median = MedianFilter(MedianParameters(kernel_size=kernel_size))
+        result = median.apply(Image(image_data=image))
+        expected = median._sliding_window_median(image, kernel_size)
+        assert result.dtype == np.uint8
+        np.testing.assert_array_equal(result.data, expected)
+
+
+if __name__ == "__main__":
+    test_histogram_median_bit_identical()
+    test_histogram_median_large_kernels()
+    test_sorting_network_bit_identical()
+    test_median_filter_output_unchanged()
+    print("Test completed!")
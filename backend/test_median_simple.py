@@ -5,7 +5,13 @@ Simple test for median filter
 
 import numpy as np
 import cv2
-from app import median_filter
+from entities.image import Image
+from entities.filters import MedianFilter, MedianParameters
+
+
+def median_filter(img, kernel_size=3):
+    """Chạy MedianFilter trên mảng numpy"""
+    return MedianFilter(MedianParameters(kernel_size=kernel_size)).apply(Image(image_data=img)).data
 
 def test_median_filter():
     # Tạo ảnh test đơn giản
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test số đo theo stage, endpoint /metrics và header Server-Timing
+"""
+
+import io
+import tracemalloc
+import numpy as np
+import cv2
+
+from app import app
+from utils.metrics import MetricsRegistry, Histogram
+
+CANNY_STAGES = ['decode', 'grayscale', 'canny_gaussian', 'canny_sobel', 'canny_nms',
+                'canny_threshold', 'canny_hysteresis', 'filter', 'encode', 'base64']
+
+
+def post_process(seed, **form):
+    img = np.random.default_rng(seed).integers(0, 256, (80, 120, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode('.png', img)
+    data = {'image': (io.BytesIO(buffer.tobytes()), 'a.png')}
+    data.update(form)
+    return app.test_client().post('/process', data=data, content_type='multipart/form-data')
+
+
+def server_timing(response):
+    entries = {}
+    for entry in response.headers['Server-Timing'].split(', '):
+        name, duration = entry.split(';dur=')
+        entries[name] = float(duration)
+    return entries
+
+
+def test_server_timing_lists_canny_stages():
+    response = post_process(1001, algorithm='canny')
+    timings = server_timing(response)
+    assert response.status_code == 200
+    assert all(stage in timings for stage in CANNY_STAGES)
+    assert timings['filter'] >= timings['canny_nms']
+
+
+def test_server_timing_lists_median_stages():
+    timings = server_timing(post_process(1002, algorithm='median', kernel_size='5'))
+    assert 'median_filter' in timings and 'canny_nms' not in timings
+
+
+def test_metrics_endpoint_exports_histograms():
+    post_process(1003, algorithm='canny')
+    response = app.test_client().get('/metrics')
+    text = response.data.decode()
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE image_stage_duration_seconds histogram' in text
+    assert 'image_stage_duration_seconds_bucket{stage="canny_hysteresis",le="+Inf"}' in text
+    assert 'image_stage_duration_seconds_count{stage="decode"}' in text
+    assert 'result_cache_misses_total{tier="memory"}' in text
+    assert 'image_bytes_copied_total' in text
+    assert 'Server-Timing' not in response.headers
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1.0, 2.0))
+    for value in (0.5, 1.0, 1.5, 3.0):
+        histogram.observe(value)
+    lines = histogram.render('x', 'stage="s"')
+    assert lines[:3] == ['x_bucket{stage="s",le="1.0"} 2',
+                         'x_bucket{stage="s",le="2.0"} 3',
+                         'x_bucket{stage="s",le="+Inf"} 4']
+    assert lines[-1] == 'x_count{stage="s"} 4'
+
+
+def test_nested_stages_track_peak_memory():
+    registry = MetricsRegistry(track_memory=True)
+    try:
+        with registry.stage('outer'):
+            with registry.stage('inner'):
+                block = np.ones(4 << 20, dtype=np.uint8)
+                del block
+            small = np.ones(1 << 20, dtype=np.uint8)
+            del small
+    finally:
+        tracemalloc.stop()
+
+    peaks = registry._peaks
+    assert peaks['inner'].sum >= 4 << 20
+    assert peaks['outer'].sum >= peaks['inner'].sum
+    assert peaks['inner'].sum < 5 << 20
+    assert 'image_stage_peak_bytes_bucket{stage="outer"' in registry.render_prometheus()
+
+
+if __name__ == "__main__":
+    test_server_timing_lists_canny_stages()
+    test_server_timing_lists_median_stages()
+    test_metrics_endpoint_exports_histograms()
+    test_histogram_buckets_are_cumulative()
+    test_nested_stages_track_peak_memory()
+    print("Test completed!")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test ảnh nhiều frame (services.multiframe, ImageProcessor.process_frames)
+"""
+
+import io
+import numpy as np
+import cv2
+
+import services.image_processor as image_processor_module
+from app import app
+from entities.image import Image
+from services.filter_factory import FilterFactory
+from services.image_processor import ImageProcessor
+from services.multiframe import Frame, detect_container, encode_container, iter_frames
+from services.result_cache import ResultCache
+from utils.stage_cache import STAGE_CACHE
+
+
+def create_frames(count=5, h=60, w=80):
+    frames = []
+    for index in range(count):
+        frame = np.full((h, w, 3), 200, dtype=np.uint8)
+        cv2.circle(frame, (10 + 12 * index, h // 2), 10, (30, 60, 90), -1)
+        frames.append(frame)
+    return frames
+
+
+def encode(frames, container):
+    if container == 'tiff':
+        return cv2.imencodemulti('.tiff', frames)[1].tobytes()
+    if container == 'gif':
+        animation = cv2.Animation()
+        animation.frames = frames
+        animation.durations = [40 + 10 * i for i in range(len(frames))]
+        return cv2.imencodeanimation('.gif', animation)[1].tobytes()
+    return b''.join(cv2.imencode('.jpg', frame)[1].tobytes() for frame in frames)
+
+
+def test_detect_container():
+    frames = create_frames()
+    for container in ('tiff', 'gif', 'mjpeg'):
+        assert detect_container(encode(frames, container)) == container
+    assert detect_container(memoryview(encode(frames, 'mjpeg'))) == 'mjpeg'
+    assert detect_container(cv2.imencode('.jpg', frames[0])[1].tobytes()) is None
+    assert detect_container(cv2.imencode('.png', frames[0])[1].tobytes()) is None
+
+
+def test_iter_frames_decodes_every_frame():
+    frames = create_frames(count=20)
+    for container in ('tiff', 'gif', 'mjpeg'):
+        decoded = list(iter_frames(encode(frames, container), container, grayscale=True))
+        assert [frame.index for frame in decoded] == list(range(20))
+        assert all(frame.image.shape == (60, 80) for frame in decoded)
+        if container == 'gif':
+            # Qua nhiều nhóm GIF_DECODE_CHUNK, giữ thời lượng từng frame
+            assert [frame.duration for frame in decoded] == [40 + 10 * i for i in range(20)]
+    expected = cv2.cvtColor(frames[7], cv2.COLOR_BGR2GRAY)
+    tiff = list(iter_frames(encode(frames, 'tiff'), 'tiff', grayscale=True))
+    assert np.abs(tiff[7].image.astype(int) - expected).max() <= 1
+
+    try:
+        list(iter_frames(b'GIF89a' + b'\0' * 20, 'gif'))
+        assert False, 'Phải báo lỗi với GIF hỏng'
+    except ValueError:
+        pass
+
+
+def test_process_frames_matches_single_frame_filter():
+    frames = create_frames(count=12)
+    processor = ImageProcessor(ResultCache(0))
+    parameters = {'kernel_size': 5}
+    container, results = processor.process_frames(encode(frames, 'tiff'), 'median', parameters,
+                                                  encode_format='png', prefetch=3)
+    results = list(results)
+    assert container == 'tiff'
+    assert [frame.index for frame in results] == list(range(12))
+
+    filter_instance = FilterFactory.create_filter('median', parameters)
+    for frame, source in zip(results, iter_frames(encode(frames, 'tiff'), 'tiff', grayscale=True)):
+        expected = filter_instance.apply(Image(image_data=source.image)).data
+        assert np.array_equal(frame.image, expected)
+        assert np.array_equal(cv2.imdecode(frame.encoded, cv2.IMREAD_UNCHANGED), expected)
+
+
+def test_prefetch_bounds_frames_in_flight():
+    decoded = []
+
+    def frames():
+        for index in range(20):
+            decoded.append(index)
+            yield Frame(index, np.zeros((16, 16), dtype=np.uint8))
+
+    processor = ImageProcessor(ResultCache(0))
+    filter_instance = FilterFactory.create_filter('median', {'kernel_size': 3})
+    pipeline = processor._frame_pipeline(frames(), filter_instance, None, prefetch=4)
+    first = next(pipeline)
+    assert first.index == 0 and len(decoded) == 4
+    assert len(list(pipeline)) == 19 and len(decoded) == 20
+
+
+def test_frame_limit():
+    limit = image_processor_module.MULTIFRAME_MAX_FRAMES
+    image_processor_module.MULTIFRAME_MAX_FRAMES = 3
+    try:
+        processor = ImageProcessor(ResultCache(0))
+        _, results = processor.process_frames(encode(create_frames(), 'mjpeg'), 'canny')
+        list(results)
+        assert False, 'Phải báo lỗi khi vượt số frame tối đa'
+    except ValueError:
+        pass
+    finally:
+        image_processor_module.MULTIFRAME_MAX_FRAMES = limit
+
+
+def test_container_roundtrip():
+    processor = ImageProcessor(ResultCache(0))
+    for container in ('tiff', 'gif', 'mjpeg'):
+        buffer, metadata = processor.process_frames_to_container(
+            encode(create_frames(), container), 'canny'
+        )
+        assert metadata['container'] == container and metadata['frames'] == 5
+        assert detect_container(buffer.tobytes()) == container
+        decoded = list(iter_frames(buffer.tobytes(), container, grayscale=True))
+        assert len(decoded) == 5
+    assert len(encode_container([], 'mjpeg')) == 0
+
+
+def test_frames_bypass_stage_cache():
+    client = app.test_client()
+    before = STAGE_CACHE.stats()
+    for algorithm in ('canny', 'pipeline'):
+        query = ('?algorithm=pipeline&stages=' + '[{"algorithm": "median"}, {"algorithm": "canny"}]'
+                 if algorithm == 'pipeline' else '?algorithm=canny')
+        response = client.post('/process/frames' + query, data=encode(create_frames(count=8), 'tiff'),
+                               content_type='application/octet-stream')
+        assert response.status_code == 200
+    after = STAGE_CACHE.stats()
+    assert after['entries'] == before['entries'] and after['misses'] == before['misses']
+
+
+def test_frames_api():
+    client = app.test_client()
+    data = encode(create_frames(), 'gif')
+    response = client.post('/process/frames?algorithm=canny', data=data,
+                           content_type='application/octet-stream')
+    assert response.status_code == 200 and response.mimetype == 'image/gif'
+    assert response.headers['X-Frame-Count'] == '5'
+    assert response.headers['X-Container'] == 'gif'
+
+    stream = client.post('/process/frames', data={
+        'image': (io.BytesIO(data), 'clip.gif'), 'algorithm': 'median', 'kernel_size': '3'
+    }, content_type='multipart/form-data', headers={'Accept': 'multipart/mixed'})
+    assert stream.mimetype == 'multipart/mixed'
+    body = stream.data
+    assert body.count(b'Content-Type: image/png') == 5
+    assert b'X-Frame-Index: 4' in body and b'X-Frame-Duration: 80' in body
+
+    single = client.post('/process/frames?algorithm=canny',
+                         data=cv2.imencode('.png', create_frames()[0])[1].tobytes(),
+                         content_type='application/octet-stream')
+    assert single.status_code == 400
+    invalid = client.post('/process/frames?algorithm=unknown', data=data,
+                          content_type='application/octet-stream')
+    assert invalid.status_code == 400
+
+
+if __name__ == "__main__":
+    test_detect_container()
+    test_iter_frames_decodes_every_frame()
+    test_process_frames_matches_single_frame_filter()
+    test_prefetch_bounds_frames_in_flight()
+    test_frame_limit()
+    test_container_roundtrip()
+    test_frames_bypass_stage_cache()
+    test_frames_api()
+    print("Test completed!")
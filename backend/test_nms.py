@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test non-maximum suppression trên view lân cận
+"""
+
+import tracemalloc
+import numpy as np
+
+from entities.filters import CannyEdgeDetector, CannyParameters
+from entities.nms import non_max_suppression, quantize_direction
+import entities.nms as nms
+
+
+def gradients(h, w, seed=0):
+    image = np.random.default_rng(seed).integers(0, 256, (h, w)).astype(np.float32)
+    return CannyEdgeDetector(CannyParameters())._sobel_gradients(image)
+
+
+def test_matches_roll_implementation():
+    detector = CannyEdgeDetector(CannyParameters())
+    for shape in ((1, 5), (3, 3), (37, 53), (120, 160)):
+        magnitude, angle = gradients(*shape)
+        expected = detector._roll_non_max_suppression(magnitude, angle)
+        np.testing.assert_array_equal(non_max_suppression(magnitude, angle), expected)
+
+
+def test_matches_roll_implementation_across_bands():
+    detector = CannyEdgeDetector(CannyParameters())
+    magnitude, angle = gradients(64, 40, seed=1)
+    expected = detector._roll_non_max_suppression(magnitude, angle)
+    original = nms.NMS_BAND_BYTES
+    try:
+        for band_bytes in (1, 4 * 38 * 5, 4 * 38 * 63):
+            nms.NMS_BAND_BYTES = band_bytes
+            np.testing.assert_array_equal(non_max_suppression(magnitude, angle), expected)
+    finally:
+        nms.NMS_BAND_BYTES = original
+
+
+def test_quantize_direction_rounds_half_to_even():
+    angle = np.array([0, 22.5, 22.6, 67.5, 112.5, 157.5, 170, 179.9], dtype=np.float32)
+    np.testing.assert_array_equal(quantize_direction(angle), [0, 0, 1, 2, 2, 0, 0, 0])
+
+
+def test_writes_into_caller_buffer():
+    magnitude, angle = gradients(30, 30)
+    out = np.full_like(magnitude, 7)
+    result = non_max_suppression(magnitude, angle, out)
+    assert result is out
+    assert not out[0].any() and not out[:, -1].any()
+    try:
+        non_max_suppression(magnitude, angle, magnitude)
+    except ValueError:
+        return
+    raise AssertionError("Buffer out trùng magnitude phải bị từ chối")
+
+
+def test_peak_memory_is_several_times_lower():
+    magnitude, angle = gradients(1024, 1024)
+    detector = CannyEdgeDetector(CannyParameters())
+    out = np.empty_like(magnitude)
+
+    tracemalloc.start()
+    detector._roll_non_max_suppression(magnitude, angle)
+    _, roll_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    non_max_suppression(magnitude, angle, out)
+    _, view_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert view_peak * 20 < roll_peak
+
+
+if __name__ == "__main__":
+    test_matches_roll_implementation()
+    test_matches_roll_implementation_across_bands()
+    test_quantize_direction_rounds_half_to_even()
+    test_writes_into_caller_buffer()
+    test_peak_memory_is_several_times_lower()
+    print("Test completed!")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test pipeline nhiều filter trong một request
+"""
+
+import base64
+import io
+import json
+import os
+import tempfile
+import numpy as np
+import cv2
+
+from app import app
+from entities.image import Image
+from entities.filters import MedianFilter, MedianParameters
+from entities.pipeline import FilterPipeline, PipelineParameters
+from services.filter_factory import FilterFactory
+from services.strip_executor import StripExecutor
+
+STAGES = [
+    {'algorithm': 'median', 'parameters': {'kernel_size': 5}},
+    {'algorithm': 'canny', 'parameters': {'sigma': 1.4}},
+]
+
+
+def create_test_image(h=90, w=120, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 200, dtype=np.uint8)
+    cv2.rectangle(img, (15, 20), (70, 60), (30, 60, 90), -1)
+    cv2.circle(img, (90, 50), 25, (120, 20, 20), -1)
+    noise = rng.normal(0, 15, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def run_sequential(image, stages):
+    current = Image(image_data=image)
+    for stage in stages:
+        current = FilterFactory.create_filter(stage['algorithm'], stage['parameters']).apply(current)
+    return current.data
+
+
+def test_pipeline_matches_sequential_filters():
+    image = create_test_image()
+    pipeline = FilterFactory.create_filter('pipeline', {'stages': STAGES})
+    result = pipeline.apply(Image(image_data=image)).data
+
+    assert result.dtype == np.uint8
+    np.testing.assert_array_equal(result, run_sequential(image, STAGES))
+
+
+def test_adjacent_stages_share_buffer():
+    outputs = []
+
+    class RecordingMedian(MedianFilter):
+        def apply(self, image, out=None):
+            outputs.append(out)
+            return super().apply(image, out=out)
+
+    stages = [RecordingMedian(MedianParameters(kernel_size=k)) for k in (3, 5, 7)]
+    pipeline = FilterPipeline(PipelineParameters(), stages)
+    image = create_test_image()
+    result = pipeline.apply(Image(image_data=image)).data
+
+    assert all(out is outputs[0] for out in outputs)
+    assert np.shares_memory(result, outputs[0])
+    np.testing.assert_array_equal(result, run_sequential(image, [
+        {'algorithm': 'median', 'parameters': {'kernel_size': k}} for k in (3, 5, 7)
+    ]))
+
+
+def test_pipeline_strips_match_whole_image():
+    image = create_test_image(h=130)
+    pipeline = FilterFactory.create_filter('pipeline', {'stages': STAGES})
+    expected = pipeline.apply(Image(image_data=image)).data
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = StripExecutor(16).run(image, pipeline, os.path.join(tmp_dir, 'out.npy'))
+        np.testing.assert_array_equal(np.asarray(result), expected)
+        del result
+
+
+def test_pipeline_rejects_empty_and_nested_stages():
+    for stages in ([], [{'algorithm': 'pipeline', 'parameters': {'stages': STAGES}}]):
+        try:
+            FilterFactory.create_filter('pipeline', {'stages': stages})
+        except ValueError:
+            continue
+        raise AssertionError("Pipeline không hợp lệ phải bị từ chối")
+
+
+def test_process_endpoint_runs_pipeline_with_single_encode():
+    image = create_test_image()
+    _, buffer = cv2.imencode('.png', image)
+    response = app.test_client().post('/process', data={
+        'image': (io.BytesIO(buffer.tobytes()), 'a.png'),
+        'algorithm': 'pipeline',
+        'stages': json.dumps(STAGES),
+    }, content_type='multipart/form-data')
+
+    result = response.get_json()
+    assert response.status_code == 200
+    assert result['algorithm_used'] == 'pipeline'
+    assert [stage['algorithm'] for stage in result['stages']] == ['median', 'canny']
+    assert result['stages'][1]['parameters']['kernel_size'] == 5
+
+    decoded = cv2.imdecode(np.frombuffer(base64.b64decode(result['processed_image']), np.uint8),
+                           cv2.IMREAD_GRAYSCALE)
+    expected = run_sequential(image, STAGES)
+    assert np.abs(decoded.astype(int) - expected.astype(int)).mean() < 5
+
+
+def test_process_endpoint_rejects_invalid_stages():
+    response = app.test_client().post('/process', data={
+        'image': (io.BytesIO(b'x'), 'a.png'),
+        'algorithm': 'pipeline',
+        'stages': json.dumps([{'parameters': {}}]),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    test_pipeline_matches_sequential_filters()
+    test_adjacent_stages_share_buffer()
+    test_pipeline_strips_match_whole_image()
+    test_pipeline_rejects_empty_and_nested_stages()
+    test_process_endpoint_runs_pipeline_with_single_encode()
+    test_process_endpoint_rejects_invalid_stages()
+    print("Test completed!")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test tách polyline từ bản đồ cạnh (entities.polylines) và output_format=polylines
+"""
+
+import io
+import numpy as np
+import cv2
+
+from app import app
+from entities.polylines import rasterize_polylines, simplify_polylines, trace_edges
+
+
+def random_mask(h, w, density, seed=0):
+    rng = np.random.default_rng(seed)
+    return ((rng.random((h, w)) < density) * 255).astype(np.uint8)
+
+
+def create_png(seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((120, 160, 3), 200, dtype=np.uint8)
+    cv2.rectangle(img, (30, 20), (120, 90), (30, 60, 90), -1)
+    noise = rng.normal(0, 5, img.shape)
+    return cv2.imencode('.png', np.clip(img + noise, 0, 255).astype(np.uint8))[1].tobytes()
+
+
+def test_chains_cover_mask_exactly():
+    for seed in range(200):
+        rng = np.random.default_rng(seed)
+        h, w = rng.integers(1, 25, 2)
+        mask = random_mask(h, w, rng.random() * 0.6, seed)
+        chains = trace_edges(mask)
+
+        for chain in chains:
+            steps = np.abs(np.diff(chain, axis=0))
+            assert len(chain) == 1 or (steps.max() == 1 and steps.max(axis=1).min() == 1)
+        assert np.array_equal(rasterize_polylines(chains, mask.shape), mask)
+        # Ngưỡng 0 chỉ bỏ điểm thẳng hàng: vẽ lại vẫn ra đúng ảnh cạnh
+        assert np.array_equal(rasterize_polylines(simplify_polylines(chains, 0), mask.shape), mask)
+
+
+def test_line_junction_and_loop():
+    mask = np.zeros((20, 30), dtype=np.uint8)
+    # Chữ T: ba chuỗi gặp nhau tại (10, 5)
+    mask[5, 2:19] = 255
+    mask[6:15, 10] = 255
+    # Đường chéo dạng bậc thang không tạo điểm rẽ nhánh
+    for i in range(8):
+        mask[2 + i, 20 + i] = mask[2 + i, 21 + i] = 255
+    # Vòng kín
+    cv2.rectangle(mask, (22, 13), (27, 17), 255, 1)
+
+    chains = trace_edges(mask)
+    t_chains = [c for c in chains if c[:, 0].max() <= 18]
+    assert len(t_chains) == 3
+    assert all((10, 5) in map(tuple, c[[0, -1]].tolist()) for c in t_chains)
+
+    staircase = [c for c in chains if c[:, 0].min() >= 20 and c[:, 1].max() <= 9]
+    assert len(staircase) == 1 and len(staircase[0]) == 16
+
+    loop = [c for c in chains if c[:, 1].min() >= 13]
+    assert len(loop) == 1 and np.array_equal(loop[0][0], loop[0][-1])
+    simplified = simplify_polylines(loop, 0)[0]
+    assert len(simplified) == 5 and np.array_equal(simplified[0], simplified[-1])
+
+    # Đoạn thẳng chỉ còn hai đầu
+    straight = simplify_polylines([c for c in t_chains if c[:, 1].max() == 14], 0)[0]
+    assert sorted(map(tuple, straight.tolist())) == [(10, 5), (10, 14)]
+    assert trace_edges(np.zeros((4, 4), dtype=np.uint8)) == []
+
+
+def test_tolerance_reduces_points():
+    mask = np.zeros((200, 200), dtype=np.uint8)
+    cv2.circle(mask, (100, 100), 80, 255, 1)
+    chains = trace_edges(mask)
+    counts = [sum(len(p) for p in simplify_polylines(chains, tolerance))
+              for tolerance in (0, 1, 4)]
+    assert counts[0] > counts[1] > counts[2] >= 4
+
+
+def test_polylines_output_in_api():
+    client = app.test_client()
+    response = client.post('/process', data={
+        'image': (io.BytesIO(create_png()), 'a.png'), 'algorithm': 'canny',
+        'output_format': 'polylines', 'polyline_tolerance': '1'
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    result = response.get_json()
+    assert 'processed_image' not in result
+    encoding = result['encoding']
+    assert encoding['format'] == 'polylines' and encoding['tolerance'] == 1.0
+    assert encoding['count'] == len(result['polylines']) > 0
+    assert encoding['points'] == sum(len(p) for p in result['polylines']) // 2
+    assert result['processed_metadata']['width'] == 160
+
+    # Đường viền hình chữ nhật 90x70 gần như chỉ còn các góc
+    longest = max(result['polylines'], key=len)
+    assert len(longest) // 2 < 20
+
+    not_binary = client.post('/process?algorithm=median&output_format=polylines',
+                             data=create_png(), content_type='application/octet-stream')
+    assert not_binary.status_code == 400
+    invalid = client.post('/process?algorithm=canny&output_format=polylines&polyline_tolerance=-1',
+                          data=create_png(), content_type='application/octet-stream')
+    assert invalid.status_code == 400
+
+
+if __name__ == "__main__":
+    test_chains_cover_mask_exactly()
+    test_line_junction_and_loop()
+    test_tolerance_reduces_points()
+    test_polylines_output_in_api()
+    print("Test completed!")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test chế độ preview trên tầng pyramid
+"""
+
+import base64
+import io
+import json
+import numpy as np
+import cv2
+
+from app import app
+from entities.image import Image
+from services.filter_factory import FilterFactory
+from services.preview import build_preview, pyramid_level
+
+
+def create_test_image(h=600, w=800, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 200, dtype=np.uint8)
+    cv2.rectangle(img, (100, 120), (500, 400), (30, 60, 90), -1)
+    cv2.circle(img, (600, 300), 150, (120, 20, 20), -1)
+    noise = rng.normal(0, 8, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def post_process(image, **form):
+    _, buffer = cv2.imencode('.png', image)
+    data = {'image': (io.BytesIO(buffer.tobytes()), 'a.png')}
+    data.update(form)
+    return app.test_client().post('/process', data=data, content_type='multipart/form-data')
+
+
+def test_pyramid_level_keeps_longest_edge_above_target():
+    assert pyramid_level((600, 800), 512) == 0
+    assert pyramid_level((600, 1024), 512) == 1
+    assert pyramid_level((2160, 3840), 512) == 2
+    assert pyramid_level((4320, 7680), 512) == 3
+    assert pyramid_level((2160, 3840), 64) == 5
+
+    preview, info = build_preview(Image(image_data=create_test_image()), 400)
+    assert info.level == 1 and info.scale == 0.5
+    assert preview.shape == (300, 400, 3)
+
+
+def test_scale_parameters_for_canny_and_median():
+    scaled = FilterFactory.scale_parameters(
+        'canny', {'sigma': 2.0, 'kernel_size': 9, 'low_threshold': 40, 'backend': 'scipy'}, 0.25
+    )
+    assert scaled == {'sigma': 0.5, 'kernel_size': 3, 'low_threshold': 40, 'backend': 'scipy'}
+    assert FilterFactory.scale_parameters('canny', {}, 0.5)['kernel_size'] == 3
+    assert FilterFactory.scale_parameters('canny', {'sigma': 1.0}, 1 / 64)['sigma'] == 0.1
+    assert FilterFactory.scale_parameters('median', {'kernel_size': 15}, 0.5) == {'kernel_size': 9}
+
+    pipeline = FilterFactory.scale_parameters('pipeline', {'stages': [
+        {'algorithm': 'median', 'parameters': {'kernel_size': 9}}, {'algorithm': 'canny'}
+    ]}, 0.5)
+    assert pipeline['stages'][0]['parameters'] == {'kernel_size': 5}
+    assert pipeline['stages'][1]['parameters'] == {'kernel_size': 3, 'sigma': 0.5}
+
+
+def test_preview_response_is_downscaled():
+    image = create_test_image()
+    response = post_process(image, algorithm='canny', kernel_size='7', sigma='2.0', preview_size='400')
+    result = response.get_json()
+
+    assert response.status_code == 200
+    assert result['preview']['level'] == 1
+    assert result['preview']['parameters']['sigma'] == 1.0
+    assert result['preview']['parameters']['kernel_size'] == 5
+    assert result['original_metadata']['width'] == 800
+    assert result['processed_metadata']['width'] == 400
+    # Tham số trả về là tham số người dùng gửi, không phải tham số đã đổi
+    assert result['sigma'] == 2.0
+
+    full = post_process(image, algorithm='canny', kernel_size='7', sigma='2.0').get_json()
+    assert 'preview' not in full and full['processed_metadata']['width'] == 800
+
+
+def test_preview_edges_follow_full_resolution_edges():
+    image = create_test_image()
+    preview = post_process(image, algorithm='canny', preview_size='400', kernel_size='5')
+    full = post_process(image, algorithm='canny', kernel_size='5')
+
+    def decode(response):
+        data = base64.b64decode(response.get_json()['processed_image'])
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE) > 127
+
+    preview_edges, full_edges = decode(preview), decode(full)
+    # Cạnh ở preview (phóng lên lại) phải nằm gần cạnh ở độ phân giải đầy đủ
+    near_full = cv2.dilate(full_edges.astype(np.uint8), np.ones((5, 5), np.uint8)) > 0
+    ys, xs = np.nonzero(preview_edges)
+    assert len(ys) > 0
+    assert np.mean(near_full[ys * 2, xs * 2]) > 0.8
+
+
+def test_preview_binary_response_and_validation():
+    image = create_test_image()
+    response = app.test_client().post('/process', data={
+        'image': (io.BytesIO(cv2.imencode('.png', image)[1].tobytes()), 'a.png'),
+        'algorithm': 'median', 'preview': 'true'
+    }, headers={'Accept': 'image/png'}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert json.loads(response.headers['X-Preview'])['level'] == 0
+    assert response.headers['X-Processed-Width'] == '800'
+
+    assert post_process(image, algorithm='median', preview_size='10').status_code == 400
+
+
+if __name__ == "__main__":
+    test_pyramid_level_keeps_longest_edge_above_target()
+    test_scale_parameters_for_canny_and_median()
+    test_preview_response_is_downscaled()
+    test_preview_edges_follow_full_resolution_edges()
+    test_preview_binary_response_and_validation()
+    print("Test completed!")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test upload thô (application/octet-stream) và giới hạn MAX_FILE_SIZE
+"""
+
+import io
+import numpy as np
+import cv2
+from werkzeug.exceptions import ClientDisconnected
+
+from app import app
+from utils.constants import MAX_FILE_SIZE
+
+
+class CountingStream(io.RawIOBase):
+    """Body giả dài size byte (toàn 0), đếm số byte server đã đọc"""
+
+    def __init__(self, size):
+        self.size = size
+        self.position = 0
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self.position = self.size + offset if whence == io.SEEK_END else offset
+        return self.position
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self.size - self.position, 64 * 1024)
+        buffer[:n] = bytes(n)
+        self.position += n
+        self.bytes_read += n
+        return n
+
+
+class DisconnectingStream(CountingStream):
+    """Body bị cắt: client ngắt kết nối sau lần đọc đầu tiên"""
+
+    def readinto(self, buffer):
+        if self.bytes_read:
+            raise ClientDisconnected()
+        return super().readinto(buffer)
+
+
+def create_png(seed=0):
+    img = np.random.default_rng(seed).integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    return cv2.imencode('.png', img)[1].tobytes()
+
+
+def post_raw(query='', **kwargs):
+    return app.test_client().post('/process' + query, content_type='application/octet-stream',
+                                  **kwargs)
+
+
+def test_raw_upload_matches_multipart():
+    content = create_png()
+    raw = post_raw('?algorithm=median&kernel_size=5', data=content)
+    assert raw.status_code == 200
+    assert raw.get_json()['kernel_size'] == 5
+    assert 'upload;dur=' in raw.headers['Server-Timing']
+
+    multipart = app.test_client().post('/process', data={
+        'image': (io.BytesIO(content), 'a.png'), 'algorithm': 'median', 'kernel_size': '5'
+    }, content_type='multipart/form-data')
+    assert raw.get_json()['processed_image'] == multipart.get_json()['processed_image']
+
+    # Query string chọn preview và response nhị phân giống form data
+    png = post_raw('?algorithm=canny&preview_size=64', data=content,
+                   headers={'Accept': 'image/png'})
+    assert png.mimetype == 'image/png' and 'X-Preview' in png.headers
+
+
+def test_body_goes_to_imdecode_without_copy():
+    captured = []
+    imdecode = cv2.imdecode
+
+    def spy(buffer, flags):
+        captured.append(buffer)
+        return imdecode(buffer, flags)
+
+    cv2.imdecode = spy
+    try:
+        assert post_raw('?algorithm=median', data=create_png(1)).status_code == 200
+    finally:
+        cv2.imdecode = imdecode
+
+    # np.frombuffer trên memoryview của buffer cấp phát trước
+    assert isinstance(captured[0].base, memoryview)
+    assert isinstance(captured[0].base.obj, np.ndarray)
+
+
+def test_content_length_over_limit_rejected_before_reading():
+    stream = CountingStream(MAX_FILE_SIZE + 1)
+    response = post_raw(input_stream=stream,
+                        environ_overrides={'CONTENT_LENGTH': str(MAX_FILE_SIZE + 1)})
+    assert response.status_code == 413
+    assert stream.bytes_read == 0
+
+
+def test_unknown_length_stops_after_limit():
+    stream = CountingStream(3 * MAX_FILE_SIZE)
+    # Chunked transfer encoding: không có Content-Length
+    response = post_raw(input_stream=stream, environ_overrides={
+        'HTTP_TRANSFER_ENCODING': 'chunked', 'wsgi.input_terminated': True
+    })
+    assert response.status_code == 413
+    assert stream.bytes_read == MAX_FILE_SIZE + 1
+
+
+def test_invalid_raw_uploads():
+    assert post_raw(data=b'').status_code == 400
+    short = post_raw(input_stream=io.BytesIO(b'abc'), environ_overrides={'CONTENT_LENGTH': '100'})
+    assert short.status_code == 400
+    assert post_raw('?algorithm=unknown', data=create_png()).status_code == 400
+
+    multipart = app.test_client().post('/process', data={
+        'image': (io.BytesIO(b'\0' * (MAX_FILE_SIZE + 1)), 'a.png')
+    }, content_type='multipart/form-data')
+    assert multipart.status_code == 413
+
+
+def test_truncated_body_reports_disconnect():
+    for environ in ({'CONTENT_LENGTH': '200000'},
+                    {'HTTP_TRANSFER_ENCODING': 'chunked', 'wsgi.input_terminated': True}):
+        response = post_raw(input_stream=DisconnectingStream(200000), environ_overrides=environ)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Client ngắt kết nối trước khi gửi đủ body'
+
+
+def test_images_and_jobs_accept_raw_upload():
+    client = app.test_client()
+    response = client.post('/images', data=create_png(2), content_type='application/octet-stream')
+    assert response.status_code == 201 and response.get_json()['width'] == 80
+
+    job = client.post('/jobs?algorithm=median', data=create_png(3),
+                      content_type='application/octet-stream')
+    assert job.status_code == 202
+
+
+if __name__ == "__main__":
+    test_raw_upload_matches_multipart()
+    test_body_goes_to_imdecode_without_copy()
+    test_content_length_over_limit_rejected_before_reading()
+    test_unknown_length_stops_after_limit()
+    test_invalid_raw_uploads()
+    test_truncated_body_reports_disconnect()
+    test_images_and_jobs_accept_raw_upload()
+    print("Test completed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test cache kết quả theo nội dung (ResultCache)
+"""
+
+import tempfile
+import numpy as np
+import cv2
+
+from services.image_processor import ImageProcessor
+from services.result_cache import ResultCache
+
+
+def create_jpeg(seed=0):
+    """Tạo ảnh JPEG test"""
+    img = np.random.default_rng(seed).integers(0, 256, (40, 50, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode('.jpg', img)
+    return buffer.tobytes()
+
+
+def test_cache_hit_skips_decode_filter_and_encode():
+    processor = ImageProcessor(ResultCache(max_bytes=10 * 1024 * 1024))
+    file_data = create_jpeg()
+
+    first = processor.process_image_from_file(file_data, 'median', {'kernel_size': 3})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Cache hit không được decode lại ảnh")
+
+    processor._create_image_from_bytes = fail
+    second = processor.process_image_from_file(file_data, 'median', {'kernel_size': 3.0})
+
+    assert second == first
+    stats = processor.get_cache_stats()['memory']
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+    # Kết quả trả về là bản sao, sửa đổi không ảnh hưởng tới cache
+    second['status'] = 'success'
+    assert 'status' not in processor.process_image_from_file(file_data, 'median', {'kernel_size': 3})
+
+
+def test_key_depends_on_content_algorithm_and_parameters():
+    params = {'kernel_size': 3}
+    key = ResultCache.make_key(b'abc', 'median', params)
+    assert key == ResultCache.make_key(b'abc', 'median', dict(params))
+    assert key != ResultCache.make_key(b'abd', 'median', params)
+    assert key != ResultCache.make_key(b'abc', 'canny', params)
+    assert key != ResultCache.make_key(b'abc', 'median', {'kernel_size': 5})
+
+
+def test_memory_lru_evicts_by_byte_budget():
+    cache = ResultCache(max_bytes=100)
+    cache.put('a', {'v': 'x' * 30})
+    cache.put('b', {'v': 'y' * 30})
+    assert cache.get('a') is not None      # 'a' được dùng gần nhất
+    cache.put('c', {'v': 'z' * 30})
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['memory']['evictions'] == 1
+
+
+def test_disk_tier_survives_restart_and_evicts_by_size():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResultCache(max_bytes=0, disk_directory=tmp_dir, disk_max_bytes=10 * 1024)
+        cache.put('key1', {'v': 1})
+        assert cache.get('key1') == {'v': 1}
+
+        restarted = ResultCache(max_bytes=1024, disk_directory=tmp_dir, disk_max_bytes=100)
+        assert restarted.get('key1') == {'v': 1}
+        assert restarted.stats()['disk']['hits'] == 1
+
+        for i in range(10):
+            restarted.put(f'big{i}', {'v': 'x' * 20})
+        disk = restarted.stats()['disk']
+        assert disk['bytes'] <= 100 and disk['evictions'] > 0
+
+
+if __name__ == "__main__":
+    test_cache_hit_skips_decode_filter_and_encode()
+    test_key_depends_on_content_algorithm_and_parameters()
+    test_memory_lru_evicts_by_byte_budget()
+    test_disk_tier_survives_restart_and_evicts_by_size()
+    print("Test completed!")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test cache magnitude sau NMS của Canny (STAGE_CACHE)
+"""
+
+import os
+import tempfile
+import numpy as np
+import cv2
+
+from app import app
+from entities.image import Image
+from entities.filters import CannyEdgeDetector, CannyParameters
+from services.filter_factory import FilterFactory
+from services.strip_executor import StripExecutor
+from utils.metrics import METRICS
+from utils.stage_cache import STAGE_CACHE, StageCache
+
+
+def create_test_image(h=120, w=160, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 200, dtype=np.uint8)
+    cv2.rectangle(img, (20, 25), (90, 80), (30, 60, 90), -1)
+    cv2.circle(img, (115, 70), 30, (120, 20, 20), -1)
+    noise = rng.normal(0, 12, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def run_canny(image, **params):
+    METRICS.start_collecting()
+    edges = CannyEdgeDetector(CannyParameters(**params)).apply(Image(image_data=image)).data
+    stages = [name for name, _ in METRICS.stop_collecting()]
+    return edges, stages
+
+
+def test_threshold_change_skips_gradients_and_nms():
+    STAGE_CACHE.clear()
+    image = create_test_image()
+    _, stages = run_canny(image, low_threshold=40, high_threshold=120)
+    assert 'canny_nms' in stages
+
+    edges, stages = run_canny(image, low_threshold=20, high_threshold=60)
+    assert 'canny_gaussian' not in stages and 'canny_nms' not in stages
+    assert 'canny_threshold' in stages and 'canny_hysteresis' in stages
+
+    # Kết quả giống hệt khi chạy không có cache
+    STAGE_CACHE.clear()
+    expected, _ = run_canny(image, low_threshold=20, high_threshold=60)
+    np.testing.assert_array_equal(edges, expected)
+
+
+def test_key_depends_on_image_sigma_kernel_and_backend():
+    STAGE_CACHE.clear()
+    image = create_test_image()
+    run_canny(image)
+    for changed in ({'sigma': 1.5}, {'kernel_size': 7}):
+        _, stages = run_canny(image, **changed)
+        assert 'canny_nms' in stages
+    _, stages = run_canny(create_test_image(seed=1))
+    assert 'canny_nms' in stages
+
+    scipy_canny = FilterFactory.create_filter('canny', {'backend': 'scipy'})
+    METRICS.start_collecting()
+    scipy_canny.apply(Image(image_data=image))
+    assert 'canny_nms' in [name for name, _ in METRICS.stop_collecting()]
+    assert len(STAGE_CACHE.lru) == 5
+
+
+def test_cached_magnitude_is_read_only_and_lru_bounded():
+    cache = StageCache(max_bytes=3 * 100 * 4)
+    arrays = [np.full((10, 10), i, dtype=np.float32) for i in range(4)]
+    keys = [cache.key(array, 'stage') for array in arrays]
+    for key, array in zip(keys, arrays):
+        cache.put(key, array)
+    assert not arrays[0].flags.writeable
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[3]) is arrays[3]
+    assert cache.stats()['evictions'] == 1
+
+    assert StageCache(max_bytes=0).key(arrays[0], 'stage') is None
+
+
+def test_strips_do_not_fill_cache():
+    STAGE_CACHE.clear()
+    image = create_test_image(150, 120)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = StripExecutor(16).run(image, CannyEdgeDetector(CannyParameters()),
+                                       os.path.join(tmp_dir, 'out.npy'))
+        del result
+    assert len(STAGE_CACHE.lru) == 0
+
+
+def test_metrics_export_stage_cache_counters():
+    text = app.test_client().get('/metrics').data.decode()
+    assert 'stage_cache_hits_total' in text
+    assert 'stage_cache_bytes' in text
+
+
+if __name__ == "__main__":
+    test_threshold_change_skips_gradients_and_nms()
+    test_key_depends_on_image_sigma_kernel_and_backend()
+    test_cached_magnitude_is_read_only_and_lru_bounded()
+    test_strips_do_not_fill_cache()
+    test_metrics_export_stage_cache_counters()
+    print("Test completed!")
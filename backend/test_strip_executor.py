@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test xử lý ảnh lớn theo dải (StripExecutor)
+"""
+
+import os
+import tempfile
+import tracemalloc
+import numpy as np
+import cv2
+
+from entities.image import Image
+from entities.filters import CannyEdgeDetector, CannyParameters, MedianFilter, MedianParameters
+from services.strip_executor import StripExecutor
+from services.image_processor import ImageProcessor
+
+
+def create_test_image(h=150, w=120, seed=0):
+    """Tạo ảnh màu test với các hình dạng đơn giản và noise"""
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 220, dtype=np.uint8)
+    cv2.rectangle(img, (10, 15), (70, 60), (20, 40, 60), -1)
+    cv2.circle(img, (80, 110), 30, (90, 120, 30), -1)
+    cv2.line(img, (0, h - 1), (w - 1, 0), (0, 0, 0), 2)
+    noise = rng.normal(0, 12, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def assert_strips_match(filter_instance, image, strip_heights=(1, 7, 32, 1000)):
+    expected = filter_instance.apply(Image(image_data=image)).data
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for strip_height in strip_heights:
+            output_path = os.path.join(tmp_dir, f'out_{strip_height}.npy')
+            result = StripExecutor(strip_height).run(image, filter_instance, output_path)
+            assert isinstance(result, np.memmap)
+            np.testing.assert_array_equal(np.asarray(result), expected)
+            del result
+
+
+def test_canny_strips_match_whole_image():
+    image = create_test_image()
+    for kernel_size in (3, 5, 15):
+        detector = CannyEdgeDetector(CannyParameters(sigma=1.2, low_threshold=20,
+                                                     high_threshold=60,
+                                                     kernel_size=kernel_size))
+        assert_strips_match(detector, image)
+
+
+def test_canny_strips_record_hysteresis_stats():
+    image = create_test_image()
+    executor = StripExecutor(16)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = executor.run(image, CannyEdgeDetector(CannyParameters()),
+                              os.path.join(tmp_dir, 'out.npy'))
+        stats = executor.global_pass_stats
+        assert stats.label_passes == 2 * -(-image.shape[0] // 16)
+        assert stats.pixels == image.shape[0] * image.shape[1]
+        assert stats.strong_pixels + stats.promoted_pixels == np.count_nonzero(result)
+        del result
+
+
+def test_median_strips_match_whole_image():
+    image = create_test_image()
+    for kernel_size in (3, 7):
+        assert_strips_match(MedianFilter(MedianParameters(kernel_size=kernel_size)), image)
+
+
+def test_process_large_image_from_memmapped_npy():
+    image = create_test_image()
+    processor = ImageProcessor()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, 'source.npy')
+        np.save(source_path, image)
+        result = processor.process_large_image(source_path, 'median', {'kernel_size': 5},
+                                               output_path=os.path.join(tmp_dir, 'out.npy'),
+                                               strip_height=16)
+        expected = processor.process_image_from_array(image, 'median', {'kernel_size': 5})
+        np.testing.assert_array_equal(np.asarray(result), expected.data)
+        del result
+
+
+def test_process_large_image_rejects_opencv_canny():
+    processor = ImageProcessor()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, 'source.npy')
+        np.save(source_path, create_test_image())
+        for algorithm, parameters in (('canny', {'backend': 'opencv'}),
+                                      ('pipeline', {'stages': [{'algorithm': 'median'},
+                                                               {'algorithm': 'canny'}],
+                                                    'backend': 'opencv'})):
+            try:
+                processor.process_large_image(source_path, algorithm, parameters,
+                                              output_path=os.path.join(tmp_dir, 'out.npy'))
+                assert False, 'Phải báo lỗi với Canny backend opencv'
+            except ValueError as e:
+                assert 'Backend opencv của Canny không hỗ trợ xử lý ảnh lớn theo dải' in str(e)
+
+        # Backend opencv của median chạy theo dải bình thường
+        result = processor.process_large_image(source_path, 'median', {'backend': 'opencv'},
+                                               output_path=os.path.join(tmp_dir, 'out.npy'))
+        assert result.shape == (150, 120)
+        del result
+
+
+def test_peak_memory_scales_with_strip_height():
+    image = np.random.default_rng(1).integers(0, 256, (1024, 256), dtype=np.uint8)
+    detector = CannyEdgeDetector(CannyParameters())
+
+    tracemalloc.start()
+    detector.apply(Image(image_data=image))
+    _, whole_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = StripExecutor(64).run(image, detector, os.path.join(tmp_dir, 'out.npy'))
+        _, strip_peak = tracemalloc.get_traced_memory()
+        del result
+    tracemalloc.stop()
+
+    assert strip_peak * 4 < whole_peak
+
+
+if __name__ == "__main__":
+    test_canny_strips_match_whole_image()
+    test_canny_strips_record_hysteresis_stats()
+    test_median_strips_match_whole_image()
+    test_process_large_image_from_memmapped_npy()
+    test_process_large_image_rejects_opencv_canny()
+    test_peak_memory_scales_with_strip_height()
+    print("Test completed!")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test đọc/ghi TIFF chia tile qua memory-map (services.tiled_tiff) và
+process_large_image với TIFF
+"""
+
+import os
+import struct
+import tempfile
+import numpy as np
+import cv2
+
+from entities.image import Image
+from services.filter_factory import FilterFactory
+from services.image_processor import ImageProcessor
+from services.result_cache import ResultCache
+from services.tiled_tiff import TiledTiffReader, TiledTiffWriter
+
+
+def create_image(h=300, w=420, channels=3, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, channels), 180, dtype=np.uint8)
+    cv2.rectangle(img, (w // 5, h // 4), (w // 2, h // 2), (20, 90, 160)[:channels], -1)
+    cv2.circle(img, (2 * w // 3, 2 * h // 3), h // 6, (140, 30, 60)[:channels], -1)
+    noise = rng.normal(0, 4, img.shape)
+    img = np.clip(img + noise, 0, 255).astype(np.uint8)
+    return img[..., 0] if channels == 1 else img
+
+
+def temp_path(suffix='.tif'):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def test_writer_roundtrip_readable_by_opencv():
+    rng = np.random.default_rng(1)
+    cases = [create_image(), create_image(h=130, w=517, channels=1),
+             rng.integers(0, 60000, (90, 70), dtype=np.uint16),
+             rng.random((50, 80)).astype(np.float32)]
+    for img in cases:
+        path = temp_path()
+        try:
+            writer = TiledTiffWriter(path, img.shape, img.dtype, tile_size=64)
+            writer[:] = img
+            writer.flush()
+            assert writer.shape == img.shape and writer.size == img.size
+            assert np.array_equal(writer[10:40, 33:], img[10:40, 33:])
+
+            assert np.array_equal(cv2.imread(path, cv2.IMREAD_UNCHANGED), img)
+            reader = TiledTiffReader(path)
+            assert reader.shape == img.shape and reader.dtype == img.dtype
+            assert np.array_equal(reader[:], img)
+            assert np.array_equal(reader[7], img[7]) and np.array_equal(reader[:, -1], img[:, -1])
+            # Tile không nén được đọc thẳng từ file map, không qua cache
+            assert reader.stats()['tiles_decoded'] == 0
+            reader.close()
+        finally:
+            os.remove(path)
+
+    try:
+        TiledTiffWriter('unused.tif', (10, 10), np.uint8, tile_size=40)
+        assert False, 'Phải báo lỗi khi cạnh tile không phải bội số của 16'
+    except ValueError:
+        pass
+
+
+def read_tags(path):
+    """Tag -> (kiểu, số giá trị, trường giá trị) trong IFD đầu của TIFF thường little-endian"""
+    with open(path, 'rb') as f:
+        data = f.read(65536)
+    ifd = struct.unpack_from('<I', data, 4)[0]
+    count = struct.unpack_from('<H', data, ifd)[0]
+    entries = (struct.unpack_from('<HHII', data, ifd + 2 + 12 * i) for i in range(count))
+    return {tag: (tag_type, values, field) for tag, tag_type, values, field in entries}
+
+
+def test_alpha_channel_written_as_extra_sample():
+    rgba = np.random.default_rng(2).integers(0, 256, (90, 70, 4), dtype=np.uint8)
+    paths = {channels: temp_path() for channels in (3, 4)}
+    try:
+        for channels, path in paths.items():
+            writer = TiledTiffWriter(path, rgba.shape[:2] + (channels,), np.uint8, tile_size=32)
+            writer[:] = rgba[..., :channels]
+            writer.flush()
+        # ExtraSamples = 2 (alpha không nhân sẵn) chỉ với ảnh 4 kênh; tag theo thứ tự tăng dần
+        tags = read_tags(paths[4])
+        assert tags[338] == (3, 1, 2) and list(tags) == sorted(tags)
+        assert 338 not in read_tags(paths[3])
+
+        assert np.array_equal(TiledTiffReader(paths[4])[:], rgba)
+        # OpenCV đọc ảnh RGBA qua giao diện RGBA của libtiff (nhân màu với
+        # alpha), nên chỉ so sánh kênh alpha
+        decoded = cv2.imread(paths[4], cv2.IMREAD_UNCHANGED)
+        assert decoded.shape == rgba.shape and np.array_equal(decoded[..., 3], rgba[..., 3])
+    finally:
+        for path in paths.values():
+            os.remove(path)
+
+
+def test_region_reads_only_needed_tiles():
+    img = create_image(h=512, w=512)
+    path = temp_path()
+    try:
+        writer = TiledTiffWriter(path, img.shape, img.dtype, tile_size=128)
+        writer[:] = img
+        writer.flush()
+        reader = TiledTiffReader(path)
+        region = reader.read_region(130, 250, 260, 380)
+        assert np.array_equal(region, img[130:250, 260:380])
+        assert reader.stats()['tiles_mapped'] == 1
+        reader[100:300, 0:10]
+        assert reader.stats()['tiles_mapped'] == 1 + 3
+    finally:
+        os.remove(path)
+
+
+def test_compressed_strips_use_bounded_cache():
+    img = create_image(h=600, w=400)
+    for compression in (1, 8, 32946):
+        path = temp_path()
+        try:
+            cv2.imwrite(path, img, [cv2.IMWRITE_TIFF_COMPRESSION, compression])
+            reader = TiledTiffReader(path, cache_bytes=64 * 1024)
+            assert not reader.tiled and reader.tile_width == img.shape[1]
+            assert np.array_equal(reader[:], img)
+            assert np.array_equal(reader[100:140], img[100:140])
+            stats = reader.stats()
+            if compression == 1:
+                assert stats['tiles_decoded'] == 0
+            else:
+                assert stats['tiles_decoded'] > 0
+                assert stats['cache']['bytes'] <= 64 * 1024
+                assert stats['cache']['evictions'] > 0
+        finally:
+            os.remove(path)
+
+    # LZW (mặc định của OpenCV) không được hỗ trợ
+    path = temp_path()
+    try:
+        cv2.imwrite(path, img)
+        try:
+            TiledTiffReader(path)
+            assert False, 'Phải báo lỗi với TIFF nén LZW'
+        except ValueError:
+            pass
+    finally:
+        os.remove(path)
+
+
+def test_process_large_image_tiff_to_tiff():
+    img = create_image(h=700, w=300)
+    processor = ImageProcessor(ResultCache(0))
+    source, lzw, output = temp_path(), temp_path(), temp_path()
+    try:
+        writer = TiledTiffWriter(source, img.shape, img.dtype, tile_size=64)
+        writer[:] = img
+        writer.flush()
+        cv2.imwrite(lzw, img)
+        # TIFF chia tile: chuyển grayscale theo dải; LZW: cv2.imread grayscale
+        sources = {source: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY),
+                   lzw: cv2.imread(lzw, cv2.IMREAD_GRAYSCALE)}
+
+        for algorithm, parameters in (('median', {'kernel_size': 5}),
+                                      ('canny', {'sigma': 1.0, 'low_threshold': 30,
+                                                 'high_threshold': 80, 'kernel_size': 5})):
+            for path, gray in sources.items():
+                expected = FilterFactory.create_filter(algorithm, parameters).apply(
+                    Image(image_data=gray)).data
+                result = processor.process_large_image(path, algorithm, parameters,
+                                                       output_path=output, strip_height=100)
+                assert isinstance(result, TiledTiffWriter)
+                assert np.array_equal(result[:], expected)
+                assert np.array_equal(cv2.imread(output, cv2.IMREAD_UNCHANGED), expected)
+    finally:
+        for path in (source, lzw, output):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    test_writer_roundtrip_readable_by_opencv()
+    test_alpha_channel_written_as_extra_sample()
+    test_region_reads_only_needed_tiles()
+    test_compressed_strips_use_bounded_cache()
+    test_process_large_image_tiff_to_tiff()
+    print("Test completed!")
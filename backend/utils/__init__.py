@@ -1,4 +1,5 @@
 from .validators import ParameterValidator
 from .constants import SUPPORTED_IMAGE_FORMATS, MAX_FILE_SIZE
+from .lru_cache import ByteBudgetLRU
 
-__all__ = ['ParameterValidator', 'SUPPORTED_IMAGE_FORMATS', 'MAX_FILE_SIZE']
+__all__ = ['ParameterValidator', 'SUPPORTED_IMAGE_FORMATS', 'MAX_FILE_SIZE', 'ByteBudgetLRU']
@@ -2,6 +2,8 @@
 Constants cho image processing service
 """
 
+import os
+
 # Supported image formats
 SUPPORTED_IMAGE_FORMATS = {
     'image/jpeg': ['.jpg', '.jpeg'],
@@ -13,6 +15,100 @@ SUPPORTED_IMAGE_FORMATS = {
 # Maximum file size (10MB)
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Kích thước chunk khi stream ảnh nhị phân trong response
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Định dạng ảnh kết quả trong response JSON (trường output_format): ảnh
+# JPEG/PNG, encode gọn cho ảnh nhị phân (entities.edge_encoding), 'auto' để
+# chọn payload nhỏ nhất (ảnh không nhị phân vẫn trả JPEG), hoặc 'polylines'
+# (các chuỗi cạnh dạng polyline, entities.polylines)
+OUTPUT_FORMATS = ('jpeg', 'png', 'packbits', 'rle', 'sparse', 'auto', 'polylines')
+DEFAULT_OUTPUT_FORMAT = 'jpeg'
+
+# Ngưỡng Douglas–Peucker (pixel) khi rút gọn polyline: mặc định 0 chỉ bỏ các
+# điểm thẳng hàng, và giới hạn giá trị client được chọn
+DEFAULT_POLYLINE_TOLERANCE = 0.0
+POLYLINE_TOLERANCE_LIMITS = {'min': 0.0, 'max': 100.0}
+
+# Cache kết quả xử lý (ResultCache): ngân sách bộ nhớ của tầng LRU (0 để tắt)
+RESULT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Tầng cache trên đĩa (None để tắt) và ngân sách của nó
+RESULT_CACHE_DIR = None
+RESULT_CACHE_DISK_MAX_BYTES = 1024 * 1024 * 1024
+
+# Kho ảnh đã decode (POST /images, services.image_store): thư mục lưu các
+# mảng .npy (None: thư mục tạm), tổng dung lượng tối đa và thời gian giữ ảnh
+# kể từ lần truy cập cuối (giây)
+IMAGE_STORE_DIR = None
+IMAGE_STORE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+IMAGE_STORE_TTL = 1800
+
+# Batch endpoint: số ảnh tối đa mỗi request và số worker xử lý song song
+BATCH_MAX_FILES = 50
+BATCH_MAX_WORKERS = 4
+
+# Ảnh nhiều frame (/process/frames, services.multiframe): số frame tối đa,
+# số frame được decode trước và đang xử lý cùng lúc, số worker chạy filter
+# và số frame GIF decode mỗi lần (decoder GIF của OpenCV decode lại từ frame
+# đầu cho mỗi lần gọi)
+MULTIFRAME_MAX_FRAMES = 1000
+MULTIFRAME_PREFETCH = 8
+MULTIFRAME_WORKERS = 4
+GIF_DECODE_CHUNK = 16
+
+# Job bất đồng bộ: độ sâu tối đa của hàng đợi (vượt quá trả về 429), số worker
+# và thời gian giữ kết quả sau khi job kết thúc (giây)
+JOB_QUEUE_MAX_DEPTH = 32
+JOB_WORKERS = 2
+JOB_RESULT_TTL = 600
+
+# Executor chạy filter: 'inline' (trong process hiện tại) hoặc 'process'
+# (pool worker process, truyền ảnh qua shared memory)
+EXECUTOR_BACKEND = 'inline'
+PROCESS_POOL_SIZE = os.cpu_count() or 1
+PROCESS_POOL_MAX_TASKS_PER_CHILD = 100
+PROCESS_POOL_MAX_RETRIES = 1
+
+# Cache kết quả trung gian của filter (utils.stage_cache): magnitude sau NMS
+# của Canny theo (ảnh, backend, sigma, kernel_size), để đổi ngưỡng chỉ chạy
+# lại ngưỡng kép và hysteresis. 0 để tắt. Cache nằm trong từng process: với
+# EXECUTOR_BACKEND = 'process', mỗi worker có cache riêng với ngân sách
+# STAGE_CACHE_MAX_BYTES / PROCESS_POOL_SIZE nhưng không nhỏ hơn
+# STAGE_CACHE_MIN_WORKER_BYTES (đủ cho hai magnitude float32 của ảnh
+# 3840x2160, 33MB mỗi mảng). Khi pool có nhiều worker, tổng bộ nhớ có thể
+# tới PROCESS_POOL_SIZE x STAGE_CACHE_MIN_WORKER_BYTES
+STAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+STAGE_CACHE_MIN_WORKER_BYTES = 64 * 1024 * 1024
+
+# Số hàng mỗi dải khi xử lý ảnh lớn theo dải (StripExecutor)
+STRIP_HEIGHT = 256
+
+# Ảnh lớn dạng TIFF (services.tiled_tiff): ngân sách cache các tile đã giải
+# nén khi đọc (nên chứa được ít nhất một hàng tile cộng halo) và cạnh tile
+# của file TIFF kết quả
+TIFF_TILE_CACHE_BYTES = 256 * 1024 * 1024
+TIFF_TILE_SIZE = 256
+
+# Đo bộ nhớ đỉnh của từng stage bằng tracemalloc (utils.metrics). Tắt mặc
+# định vì tracemalloc làm chậm mọi lần cấp phát; thời gian luôn được đo
+METRICS_TRACK_MEMORY = False
+
+# Backend tính toán mặc định của các filter khi request không chọn:
+# 'numpy' (implementation thủ công), 'opencv' hoặc 'scipy'
+DEFAULT_FILTER_BACKEND = 'numpy'
+
+# Decode theo nhu cầu của filter (services.decode_planner): decode thẳng sang
+# grayscale khi filter chỉ đọc grayscale và decode JPEG thu nhỏ ở chế độ
+# preview. Tắt để decode màu đầy đủ như cũ (kết quả grayscale có thể lệch
+# vài mức xám so với cvtColor, xem README)
+DECODE_PLANNING = True
+
+# Chế độ preview: cạnh dài mục tiêu (pixel) mặc định của tầng pyramid và
+# giới hạn giá trị client được chọn
+PREVIEW_MAX_DIMENSION = 512
+PREVIEW_DIMENSION_LIMITS = {'min': 64, 'max': 2048}
+
 # Default parameters
 DEFAULT_CANNY_PARAMS = {
     'sigma': 1.0,
@@ -0,0 +1,106 @@
+"""
+LRU cache trong bộ nhớ giới hạn theo tổng số byte
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ByteBudgetLRU:
+    """
+    LRU cache thread-safe, loại bỏ phần tử ít dùng nhất khi tổng kích thước
+    vượt quá max_bytes. Có bộ đếm hit/miss/eviction.
+    """
+
+    def __init__(self, max_bytes: int,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        """
+        Args:
+            max_bytes: Tổng kích thước tối đa (byte)
+            on_evict: Callback gọi với (key, value) khi một phần tử bị loại
+        """
+        self.max_bytes = max_bytes
+        self._on_evict = on_evict
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Lấy giá trị theo key, trả về None nếu không có"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> bool:
+        """
+        Thêm giá trị vào cache
+
+        Returns:
+            False nếu giá trị lớn hơn toàn bộ ngân sách và không được lưu
+        """
+        if size > self.max_bytes:
+            return False
+
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                old_key, (old_value, old_size) = self._entries.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+                evicted.append((old_key, old_value))
+
+        if self._on_evict is not None:
+            for old_key, old_value in evicted:
+                self._on_evict(old_key, old_value)
+        return True
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Xóa và trả về giá trị theo key (không tính là eviction)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.current_bytes -= entry[1]
+            return entry[0]
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Trả về các bộ đếm của cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,179 @@
+"""
+Đo thời gian và bộ nhớ đỉnh theo từng stage xử lý, xuất dạng Prometheus
+"""
+
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .constants import METRICS_TRACK_MEMORY
+
+# Bucket (giây) của histogram thời gian
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Bucket (byte) của histogram bộ nhớ đỉnh: 64KB .. 1GB, mỗi bucket x4
+MEMORY_BUCKETS = tuple(float(1 << shift) for shift in range(16, 31, 2))
+
+
+class Histogram:
+    """Histogram tích lũy kiểu Prometheus (không thread-safe, khóa ở registry)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        """Các dòng _bucket/_sum/_count cho một bộ label"""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum!r}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class _StageFrame:
+    __slots__ = ('start_bytes', 'child_peak')
+
+    def __init__(self, start_bytes: int):
+        self.start_bytes = start_bytes
+        self.child_peak = 0
+
+
+class MetricsRegistry:
+    """
+    Registry các histogram theo stage
+
+    stage(name) đo thời gian bằng perf_counter (chi phí vài micro giây). Khi
+    bật track_memory, bộ nhớ đỉnh của stage (so với lúc bắt đầu) được đo bằng
+    tracemalloc; stage lồng nhau được xử lý bằng một stack theo thread. Vì
+    tracemalloc tính chung cho cả process nên số đo chỉ xấp xỉ khi nhiều
+    request chạy song song.
+
+    collect() gom thời gian các stage chạy trên thread hiện tại, dùng cho
+    header Server-Timing của một request.
+    """
+
+    def __init__(self, track_memory: bool = METRICS_TRACK_MEMORY):
+        self.track_memory = track_memory
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Histogram] = {}
+        self._peaks: Dict[str, Histogram] = {}
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Đo một stage xử lý"""
+        frame = self._enter_memory() if self.track_memory else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = self._exit_memory(frame) if frame is not None else None
+            self.observe(name, elapsed, peak)
+
+    def observe(self, name: str, seconds: float, peak_bytes: Optional[int] = None) -> None:
+        """Ghi nhận thời gian (và bộ nhớ đỉnh) của một stage"""
+        with self._lock:
+            histogram = self._durations.get(name)
+            if histogram is None:
+                histogram = self._durations[name] = Histogram(DURATION_BUCKETS)
+            histogram.observe(seconds)
+            if peak_bytes is not None:
+                histogram = self._peaks.get(name)
+                if histogram is None:
+                    histogram = self._peaks[name] = Histogram(MEMORY_BUCKETS)
+                histogram.observe(peak_bytes)
+
+        timings = getattr(self._local, 'timings', None)
+        if timings is not None:
+            timings.append((name, seconds))
+
+    def _enter_memory(self) -> _StageFrame:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        stack = self._stack()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # Giữ lại đỉnh của stage cha trước khi reset cho stage con
+            stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        tracemalloc.reset_peak()
+        frame = _StageFrame(current)
+        stack.append(frame)
+        return frame
+
+    def _exit_memory(self, frame: _StageFrame) -> int:
+        stack = self._stack()
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame.child_peak)
+        stack.pop()
+        if stack:
+            stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        return max(0, peak - frame.start_bytes)
+
+    def _stack(self) -> List[_StageFrame]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start_collecting(self) -> None:
+        """Bắt đầu gom thời gian các stage trên thread hiện tại"""
+        self._local.timings = []
+
+    def stop_collecting(self) -> List[Tuple[str, float]]:
+        """Dừng gom, trả về danh sách (stage, giây) theo thứ tự kết thúc"""
+        timings = getattr(self._local, 'timings', None) or []
+        self._local.timings = None
+        return timings
+
+    @staticmethod
+    def server_timing(timings: List[Tuple[str, float]]) -> str:
+        """
+        Giá trị header Server-Timing: thời gian (ms) cộng dồn theo stage, giữ
+        thứ tự xuất hiện đầu tiên
+        """
+        totals: Dict[str, float] = {}
+        for name, seconds in timings:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return ', '.join(f'{name};dur={seconds * 1000:.3f}' for name, seconds in totals.items())
+
+    def render_prometheus(self, extra_lines: Sequence[str] = ()) -> str:
+        """Xuất toàn bộ histogram theo text format của Prometheus"""
+        lines = []
+        with self._lock:
+            for name, help_text, histograms in (
+                ('image_stage_duration_seconds', 'Thời gian xử lý mỗi stage (giây)', self._durations),
+                ('image_stage_peak_bytes', 'Bộ nhớ cấp phát đỉnh của mỗi stage (byte)', self._peaks),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for stage in sorted(histograms):
+                    lines.extend(histograms[stage].render(name, f'stage="{stage}"'))
+        lines.extend(extra_lines)
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """Xóa toàn bộ số đo"""
+        with self._lock:
+            self._durations.clear()
+            self._peaks.clear()
+
+
+# Registry dùng chung cho toàn service
+METRICS = MetricsRegistry()
@@ -0,0 +1,64 @@
+"""
+Cache kết quả trung gian của filter (ví dụ magnitude sau NMS của Canny) theo
+nội dung ảnh và tham số của các bước đã chạy
+"""
+
+import hashlib
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from .constants import STAGE_CACHE_MAX_BYTES
+from .lru_cache import ByteBudgetLRU
+
+
+class StageCache:
+    """
+    LRU giới hạn theo byte chứa các mảng trung gian. Mảng được lưu ở chế độ
+    read-only và trả về trực tiếp (không chép), caller không được ghi vào.
+    """
+
+    def __init__(self, max_bytes: int = STAGE_CACHE_MAX_BYTES):
+        """
+        Args:
+            max_bytes: Ngân sách bộ nhớ (byte), 0 để tắt cache
+        """
+        self.lru = ByteBudgetLRU(max_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self.lru.max_bytes > 0
+
+    @staticmethod
+    def image_digest(array: np.ndarray) -> str:
+        """Hash nội dung ảnh (kèm shape và dtype)"""
+        digest = hashlib.sha256(f'{array.shape}{array.dtype.str}'.encode())
+        digest.update(memoryview(np.ascontiguousarray(array)).cast('B'))
+        return digest.hexdigest()
+
+    def key(self, array: np.ndarray, *spec: Hashable) -> Optional[Tuple[Hashable, ...]]:
+        """Key cho ảnh và tham số của stage, None nếu cache bị tắt"""
+        if not self.enabled:
+            return None
+        return (self.image_digest(array),) + spec
+
+    def get(self, key: Optional[Tuple[Hashable, ...]]) -> Optional[np.ndarray]:
+        if key is None:
+            return None
+        return self.lru.get(key)
+
+    def put(self, key: Optional[Tuple[Hashable, ...]], array: np.ndarray) -> None:
+        if key is None:
+            return
+        array.flags.writeable = False
+        self.lru.put(key, array, array.nbytes)
+
+    def clear(self) -> None:
+        self.lru.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self.lru.stats()
+
+
+# Cache dùng chung cho các filter
+STAGE_CACHE = StageCache()
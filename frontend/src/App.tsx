@@ -3,7 +3,11 @@ import React, { useCallback, useEffect, useRef, useState } from "react";
 import "./App.css";
 import { useImageProccess } from "./hooks/useImageProccess";
 import { Status } from "./types";
-import { STATUS } from "./utils/constants";
+import {
+  FULL_RESOLUTION_DELAY_MS,
+  PREVIEW_SIZE,
+  STATUS,
+} from "./utils/constants";
 
 type ImageState = {
   original: string | null;
@@ -21,19 +25,43 @@ const App: React.FC = () => {
   const [file, setFile] = useState<File>();
   const inputRef = useRef<HTMLInputElement>(null);
   const [status, setStatus] = useState<Status>(STATUS.IDLE);
+  // Chỉ hiển thị kết quả của lần đổi tham số mới nhất
+  const requestIdRef = useRef(0);
+  const fullResultIdRef = useRef(0);
 
   const handleProccessImage = useCallback(
-    async (file: File, algorithm: string, kernelSize: number) => {
-      setStatus(STATUS.LOADING);
+    async (
+      file: File,
+      algorithm: string,
+      kernelSize: number,
+      requestId: number,
+      preview: boolean
+    ) => {
+      if (!preview) setStatus(STATUS.LOADING);
       const formData = new FormData();
       formData.append("image", file);
       formData.append("algorithm", algorithm);
       formData.append("kernel_size", kernelSize.toString());
+      if (preview) formData.append("preview_size", PREVIEW_SIZE.toString());
 
       try {
         const response = await processImage(formData);
+        if (requestId !== requestIdRef.current) return;
+        // Preview chỉ cập nhật ảnh, trạng thái do request đầy đủ quyết định
+        if (preview) {
+          // Bỏ preview về muộn hơn kết quả đầy đủ
+          if (fullResultIdRef.current === requestId) return;
+          if (response.isOk && response.data) {
+            setImages((prev) => ({
+              ...prev,
+              processed: `data:image/jpeg;base64,${response.data}`,
+            }));
+          }
+          return;
+        }
 
         if (response.isOk && response.data) {
+          fullResultIdRef.current = requestId;
           setImages((prev) => ({
             ...prev,
             processed: `data:image/jpeg;base64,${response.data}`,
@@ -44,7 +72,9 @@ const App: React.FC = () => {
           setStatus(STATUS.ERROR);
         }
       } catch (error) {
-        setStatus(STATUS.ERROR);
+        if (!preview && requestId === requestIdRef.current) {
+          setStatus(STATUS.ERROR);
+        }
       }
     },
     []
@@ -98,7 +128,14 @@ const App: React.FC = () => {
 
   useEffect(() => {
     if (!file || !algorithm) return;
-    handleProccessImage(file, algorithm, kernelSize);
+    // Preview trên ảnh thu nhỏ ngay, kết quả đầy đủ khi tham số ngừng thay đổi
+    const requestId = ++requestIdRef.current;
+    handleProccessImage(file, algorithm, kernelSize, requestId, true);
+    const timer = setTimeout(
+      () => handleProccessImage(file, algorithm, kernelSize, requestId, false),
+      FULL_RESOLUTION_DELAY_MS
+    );
+    return () => clearTimeout(timer);
   }, [file, algorithm, kernelSize]);
 
   return (
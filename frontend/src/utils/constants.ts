@@ -1,5 +1,10 @@
 export const BASE_URL = "http://localhost:5000";
 
+// Cạnh dài (pixel) của ảnh preview khi vừa đổi tham số, và thời gian chờ
+// tham số ổn định trước khi xin kết quả độ phân giải đầy đủ
+export const PREVIEW_SIZE = 512;
+export const FULL_RESOLUTION_DELAY_MS = 400;
+
 export const STATUS = {
   IDLE: "idle",
   LOADING: "loading",